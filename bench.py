@@ -0,0 +1,257 @@
+# bench.py
+# End-to-end benchmark of the ETL pipeline and the dashboard queries on
+# synthetic pulse trees (see synthetic.py) at 1x / 10x / 100x the real snapshot.
+#
+# Every stage is timed (best of --repeat runs) and, with --memory, run once
+# more under tracemalloc for its peak python/numpy allocation (process-pool
+# workers are not traced; run with --workers 1 to include parsing). Results
+# go to one JSON file per run, with the scale, the git revision and the
+# machine (under bench_results/, which is not tracked: copy a baseline you
+# want to keep elsewhere), so runs can be compared stage by stage:
+#
+#   python bench.py run --scale x10                       generate (once) and benchmark
+#   python bench.py run --scale x1 --mysql                also load + query MySQL (scratch DB!)
+#   python bench.py compare bench_results/base.json bench_results/new.json
+#
+# --mysql loads the synthetic tables into the database of config.py, replacing
+# its contents: point PHONEPE_DB_NAME at a scratch schema first.
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tracemalloc
+import subprocess
+
+import numpy as np
+
+import synthetic
+
+BENCH_DATA = "bench_data"
+BENCH_RESULTS = "bench_results"
+
+# the real snapshot is ~36 states x ~20 districts, 2018-2024, top lists of 10
+SCALES = {
+    "x1": dict(states=36, districts=20, pincodes=10, years=7, quarters=4, top=10),
+    "x10": dict(states=36, districts=200, pincodes=10, years=7, quarters=4, top=100),
+    "x100": dict(states=36, districts=2000, pincodes=10, years=7, quarters=4, top=1000),
+}
+
+# relative slowdown reported as a regression by compare
+TOLERANCE = 0.10
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+class Bench:
+    def __init__(self, repeat=1, memory=False):
+        self.repeat = repeat
+        self.memory = memory
+        self.results = {}
+
+    def stage(self, name, func, repeat=None):
+        """Run ``func`` and record its best time (and peak allocation); returns its last result."""
+        times = []
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - started)
+        entry = {"seconds": min(times), "runs": len(times)}
+        if self.memory:
+            tracemalloc.start()
+            try:
+                result = func()
+                entry["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            finally:
+                tracemalloc.stop()
+        self.results[name] = entry
+        memory = f" peak {entry['peak_mb']:.1f} MB" if "peak_mb" in entry else ""
+        print(f"✅ {name}: {entry['seconds']:.3f}s{memory}")
+        return result
+
+    def note(self, name, **fields):
+        self.results.setdefault(name, {}).update(fields)
+
+
+def tree_size(root):
+    files = size = 0
+    for dirpath, _, filenames in os.walk(root):
+        for file in filenames:
+            if file.endswith(".json"):
+                files += 1
+                size += os.path.getsize(os.path.join(dirpath, file))
+    return files, size
+
+
+def run_pipeline_stages(bench, root, work, workers):
+    from extract import SOURCES, extract_all, extract_incremental
+    from enrich import CoordinateIndex
+    from pack import write_pack
+    from pipeline import clean_table
+
+    pack_path = os.path.join(work, "pulse.pack")
+    raw_dir = os.path.join(work, "raw")
+
+    frames = bench.stage("extract", lambda: extract_all(SOURCES, root, workers))
+    bench.note("extract", rows=int(sum(len(df) for df in frames.values())))
+
+    bench.stage("pack", lambda: write_pack(root, pack_path), repeat=1)
+    bench.stage("extract_pack", lambda: extract_all(SOURCES, pack_path, workers))
+
+    def first_extract():
+        shutil.rmtree(raw_dir, ignore_errors=True)
+        return extract_incremental(SOURCES, root, raw_dir, workers)
+    bench.stage("extract_incremental_full", first_extract, repeat=1)
+    bench.stage("extract_incremental_noop", lambda: extract_incremental(SOURCES, root, raw_dir, workers))
+
+    coordinates = bench.stage("coordinates", lambda: CoordinateIndex.from_csv(os.path.join(root, "dist_lat_long.csv")))
+
+    def clean():
+        ids = {"State": {}, "District": {}}
+        return {name: clean_table(df, ids, coordinates)[0] for name, df in frames.items()}
+    clean_frames = bench.stage("clean", clean)
+    bench.note("clean", rows=int(sum(len(df) for df in clean_frames.values())),
+               mb=sum(df.memory_usage(deep=True).sum() for df in clean_frames.values()) / 2 ** 20)
+    return clean_frames
+
+
+def run_mysql_stages(bench, clean_frames, method, query_repeat):
+    from config import get_connection
+    from schema import create_tables
+    from loader import load_tables
+    from columnar import fetch_frame
+    import queries
+
+    conn = get_connection()
+    try:
+        create_tables(conn)
+    finally:
+        conn.close()
+    bench.stage("mysql_load", lambda: load_tables(clean_frames, method=method), repeat=1)
+
+    conn = get_connection()
+    try:
+        for i, (sql, params) in enumerate(queries.dashboard_queries()):
+            times, rows = [], 0
+            for _ in range(query_repeat):
+                started = time.perf_counter()
+                rows = len(fetch_frame(conn, sql, params))
+                times.append(time.perf_counter() - started)
+            bench.results[f"query_{i:02d}"] = {"seconds": float(np.median(times)), "runs": query_repeat,
+                                               "rows": rows, "sql": " ".join(sql.split())}
+        total = sum(entry["seconds"] for name, entry in bench.results.items() if name.startswith("query_"))
+        print(f"✅ {len(queries.dashboard_queries())} dashboard queries: {total:.3f}s (median of {query_repeat})")
+    finally:
+        conn.close()
+
+
+def run(args):
+    params = dict(SCALES[args.scale])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    label = args.label or args.scale
+    root = os.path.join(args.data, label, "data")
+    work = os.path.join(args.data, label, "work")
+
+    bench = Bench(args.repeat, args.memory)
+    if args.regenerate or not os.path.isdir(root):
+        shutil.rmtree(root, ignore_errors=True)
+        bench.stage("generate", lambda: synthetic.generate(root, seed=args.seed, **params), repeat=1)
+    files, size = tree_size(root)
+    print(f"📦 {files} json files, {size / 2 ** 20:.1f} MB under {root}")
+    os.makedirs(work, exist_ok=True)
+
+    clean_frames = run_pipeline_stages(bench, root, work, args.workers)
+    if args.mysql:
+        run_mysql_stages(bench, clean_frames, args.method, args.query_repeat)
+    else:
+        print("⏭️ MySQL load and dashboard queries skipped (use --mysql with a scratch PHONEPE_DB_NAME)")
+
+    out = args.out or os.path.join(BENCH_RESULTS, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    report = {
+        "meta": {"scale": args.scale, "label": label, "params": params, "seed": args.seed,
+                 "files": files, "bytes": size, "workers": args.workers, "repeat": args.repeat,
+                 "memory": args.memory, "mysql": args.mysql, "git": git_revision(),
+                 "python": platform.python_version(), "machine": platform.platform(),
+                 "cpus": os.cpu_count(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": bench.results,
+    }
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=1, default=float)
+    print(f"✅ Results written to {out}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        base = json.load(f)
+    with open(args.candidate) as f:
+        new = json.load(f)
+    if base["meta"]["params"] != new["meta"]["params"]:
+        print(f"⚠️ different scales: {base['meta']['params']} vs {new['meta']['params']}")
+    print(f"{'stage':<28} {'base s':>9} {'new s':>9} {'ratio':>7}")
+    regressions = 0
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        old, cur = base["results"].get(name, {}), new["results"].get(name, {})
+        if "seconds" not in old or "seconds" not in cur:
+            print(f"{name:<28} {old.get('seconds', float('nan')):>9.3f} {cur.get('seconds', float('nan')):>9.3f}")
+            continue
+        ratio = cur["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        flag = ""
+        if ratio > 1 + args.tolerance:
+            flag, regressions = " ⚠️ slower", regressions + 1
+        elif ratio < 1 - args.tolerance:
+            flag = " ✅ faster"
+        memory = ""
+        if "peak_mb" in old and "peak_mb" in cur:
+            memory = f"  peak {old['peak_mb']:.0f} -> {cur['peak_mb']:.0f} MB"
+        print(f"{name:<28} {old['seconds']:>9.3f} {cur['seconds']:>9.3f} {ratio:>6.2f}x{flag}{memory}")
+    print(f"{regressions} stages slower than {args.tolerance:.0%} "
+          f"({base['meta'].get('git')} -> {new['meta'].get('git')})")
+    sys.exit(1 if regressions and args.fail else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline and dashboard queries on synthetic data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("run", help="generate a synthetic tree if needed and benchmark it")
+    p.add_argument("--scale", choices=sorted(SCALES), default="x1")
+    for key in SCALES["x1"]:
+        p.add_argument(f"--{key}", type=int, default=None, help=f"override the scale's {key}")
+    p.add_argument("--label", help="name of the data folder and results file (default: the scale)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--data", default=BENCH_DATA, help="folder for the synthetic trees")
+    p.add_argument("--regenerate", action="store_true", help="rewrite the tree even if it exists")
+    p.add_argument("--workers", type=int, default=None, help="extraction worker processes")
+    p.add_argument("--repeat", type=int, default=3, help="runs per stage (best is kept)")
+    p.add_argument("--memory", action="store_true", help="also measure each stage's peak allocation")
+    p.add_argument("--mysql", action="store_true", help="also load MySQL and time the dashboard queries")
+    p.add_argument("--method", choices=["executemany", "infile"], default="executemany", help="MySQL load method")
+    p.add_argument("--query-repeat", type=int, default=5, help="runs per dashboard query (median is kept)")
+    p.add_argument("--out", help="results file (default: bench_results/<label>-<time>.json)")
+    p.set_defaults(func=run)
+
+    p = commands.add_parser("compare", help="compare two results files stage by stage")
+    p.add_argument("baseline")
+    p.add_argument("candidate")
+    p.add_argument("--tolerance", type=float, default=TOLERANCE, help="relative change reported (default 0.10)")
+    p.add_argument("--fail", action="store_true", help="exit with status 1 on a regression")
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
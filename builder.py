@@ -0,0 +1,150 @@
+# builder.py
+# Columnar, chunked row builder used by the extractor.
+#
+# Instead of appending one python object per cell to a dict of lists, rows are
+# written in slices into preallocated, typed numpy chunks:
+#   - "category" columns (State, District, Brand, ...) store int32 codes into a
+#     dictionary kept by the builder, so a repeated name costs 4 bytes
+#   - numeric columns store int8/int16/int64/float64 values directly
+# A chunk starts small and doubles as rows arrive, up to CHUNK_ROWS, so a
+# builder filled from one batch of files only allocates about what the batch
+# holds. Full chunks are trimmed and kept and turned into one DataFrame with
+# categorical columns at the end.
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CHUNK_ROWS = 1 << 16
+FIRST_ROWS = 1 << 10
+
+
+class ChunkBuilder:
+    def __init__(self, dtypes, chunk_rows=CHUNK_ROWS, first_rows=FIRST_ROWS):
+        """``dtypes`` maps column -> "category" or a numpy dtype name."""
+        self.dtypes = dict(dtypes)
+        self.chunk_rows = chunk_rows
+        self.first_rows = min(first_rows, chunk_rows)
+        self.dictionaries = {column: {} for column, dtype in self.dtypes.items() if dtype == "category"}
+        self.chunks = []
+        self.rows = 0
+        self._new_chunk()
+
+    def _storage_dtype(self, column):
+        dtype = self.dtypes[column]
+        return np.int32 if dtype == "category" else np.dtype(dtype)
+
+    def _new_chunk(self):
+        self.current = {column: np.empty(self.first_rows, self._storage_dtype(column)) for column in self.dtypes}
+        self.filled = 0
+
+    def _reserve(self, rows):
+        """Grow the current chunk (doubling, at most chunk_rows) to hold ``rows`` more rows."""
+        needed = self.filled + rows
+        capacity = len(next(iter(self.current.values()))) if self.current else needed
+        if needed <= capacity:
+            return
+        capacity = min(self.chunk_rows, max(needed, 2 * capacity))
+        for column, array in self.current.items():
+            grown = np.empty(capacity, array.dtype)
+            grown[:self.filled] = array[:self.filled]
+            self.current[column] = grown
+
+    def codes(self, column, values):
+        """Dictionary-encode values of a category column (None -> -1)."""
+        dictionary = self.dictionaries[column]
+        return [-1 if value is None else dictionary.setdefault(value, len(dictionary)) for value in values]
+
+    def _encode(self, column, values):
+        if column in self.dictionaries:
+            return self.codes(column, values)
+        if self.dtypes[column] != "float64" and any(value is None for value in values):
+            # missing values in an integer column: fall back to float64 + NaN
+            self._upcast(column)
+            return [np.nan if value is None else value for value in values]
+        return values
+
+    def _upcast(self, column):
+        self.dtypes[column] = "float64"
+        self.current[column] = self.current[column].astype(np.float64)
+        for chunk in self.chunks:
+            chunk[column] = chunk[column].astype(np.float64)
+
+    def extend(self, constants, columns, count):
+        """Append ``count`` rows.
+
+        ``constants`` maps column -> one value repeated on every row (State,
+        Year, Quarter of a file) and ``columns`` maps column -> list of values.
+        """
+        if count == 0:
+            return
+        encoded = {column: self._encode(column, [value])[0] for column, value in constants.items()}
+        values = {column: self._encode(column, column_values) for column, column_values in columns.items()}
+
+        start = 0
+        while start < count:
+            take = min(count - start, self.chunk_rows - self.filled)
+            self._reserve(take)
+            stop = self.filled + take
+            for column, value in encoded.items():
+                self.current[column][self.filled:stop] = value
+            for column, column_values in values.items():
+                self.current[column][self.filled:stop] = column_values[start:start + take]
+            self.filled = stop
+            start += take
+            if self.filled == self.chunk_rows:
+                self.flush()
+        self.rows += count
+
+    def flush(self):
+        """Store the current chunk (trimmed) and start a new one."""
+        if self.filled == 0:
+            return
+        self.chunks.append({column: array[:self.filled].copy() for column, array in self.current.items()})
+        self._new_chunk()
+
+    def to_frame(self, columns=None):
+        """Build the final DataFrame (category columns with sorted categories).
+
+        The stored chunks are handed over, so the builder is empty afterwards.
+        """
+        self.flush()
+        columns = columns or list(self.dtypes)
+        chunks, self.chunks = self.chunks, []
+
+        data = {}
+        for column in columns:
+            array = (np.concatenate([chunk[column] for chunk in chunks]) if chunks
+                     else np.empty(0, self._storage_dtype(column)))
+            if column in self.dictionaries:
+                data[column] = sorted_categorical(array, list(self.dictionaries[column]))
+            else:
+                data[column] = array
+        return pd.DataFrame(data, columns=columns)
+
+
+def sorted_categorical(codes, categories):
+    """Categorical from codes into ``categories``, with the categories sorted."""
+    categories = np.array(categories, dtype=object)
+    order = np.argsort(categories.astype(str), kind="stable")
+    remap = np.empty(len(order) + 1, dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    remap[-1] = -1  # keeps -1 (missing) as -1
+    return pd.Categorical.from_codes(remap[codes], categories=categories[order])
+
+
+def concat_frames(frames):
+    """Concatenate builder frames, merging the dictionaries of category columns."""
+    frames = [frame for frame in frames if len(frame.columns)]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    data = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            data[column] = union_categoricals([part.array for part in parts], sort_categories=True)
+        else:
+            data[column] = np.concatenate([part.to_numpy() for part in parts])
+    return pd.DataFrame(data, columns=frames[0].columns)
@@ -0,0 +1,226 @@
+# cache.py
+# Query-result and figure caches for the dashboard.
+#
+# Results are keyed on (data version, SQL text, parameters) and figures on
+# (data version, view, chart, filter selection). The data version is a counter
+# in the data_version table that the loader bumps in the same transaction as
+# every load, so a refresh becomes visible to the caches exactly when the new
+# rows do: entries of older versions are never hit again and are dropped.
+# Memory is bounded by the entries' byte size.
+
+import contextvars
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DB_POOL_SIZE, get_connection
+from columnar import fetch_frame
+import perf
+import slowlog
+
+VERSION_TABLE = "data_version"
+
+VERSION_TABLE_SQL = (f"CREATE TABLE IF NOT EXISTS `{VERSION_TABLE}` (\n"
+                     "  `id` TINYINT UNSIGNED NOT NULL PRIMARY KEY,\n"
+                     "  `version` BIGINT UNSIGNED NOT NULL\n"
+                     ") ENGINE=InnoDB")
+
+MAX_BYTES = 256 * 1024 * 1024
+MAX_ENTRIES = 512
+
+
+def data_version(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT `version` FROM `{VERSION_TABLE}` WHERE `id` = 1")
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else 0
+
+
+def bump_data_version(cursor):
+    """Increment the data version; run it in the transaction that changed the data or right after its commit."""
+    cursor.execute(f"INSERT INTO `{VERSION_TABLE}` (`id`, `version`) VALUES (1, 1) "
+                   "ON DUPLICATE KEY UPDATE `version` = `version` + 1")
+
+
+def fetch(cache, query, params=None, version=None):
+    """Query result through ``cache`` (a QueryCache) on a pooled connection.
+
+    With the ``version`` the caller's run already read, a hit is served from
+    memory without touching the pool. On a miss the version and the query are
+    read in one transaction, so they see the same snapshot, and the result is
+    stored under the version actually read.
+    """
+    started = time.perf_counter()
+    df = None if version is None else cache.get(QueryCache.key(version, query, params))
+    hit = df is not None
+    query_seconds = None
+    if not hit:
+        conn = get_connection()
+        try:
+            key = QueryCache.key(data_version(conn), query, params)
+            df = cache.get(key)
+            hit = df is not None
+            if not hit:
+                query_started = time.perf_counter()
+                df = fetch_frame(conn, query, params)
+                query_seconds = time.perf_counter() - query_started
+                slowlog.profile(conn, query, params, query_seconds, df)
+                cache.put(key, df)
+        finally:
+            conn.close()
+    record_fetch(started, query, params, df, hit, query_seconds)
+    return df
+
+
+def record_fetch(started, query, params, df, hit, query_seconds=None):
+    # ms: the whole fetch (pool checkout and wait, version read, query); query_ms: MySQL + columnar read only
+    fields = {} if query_seconds is None else {"query_ms": round(query_seconds * 1000, 3)}
+    perf.record("sql", time.perf_counter() - started, rows=len(df), bytes=frame_bytes(df), hit=hit,
+                query=slowlog.normalize(query), params=list(params or ()), **fields)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    # one pool of fetch threads per process, as wide as the connection pool
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="fetch")
+        return _executor
+
+
+def fetch_many(cache, requests, version=None):
+    """Results of several (query, params) requests, in order, fetched concurrently.
+
+    Each request runs through fetch() on its own pooled connection, so a page
+    waits for its slowest query instead of the sum of them. Duplicates are
+    fetched once; the first failure is raised. Hits for ``version`` are
+    answered in the calling thread.
+    """
+    requests = list(requests)
+    keys = [QueryCache.key(None, query, params) for query, params in requests]
+    unique = dict(zip(keys, requests))
+    results = {}
+    if version is not None:
+        for key, (query, params) in unique.items():
+            started = time.perf_counter()
+            df = cache.get(QueryCache.key(version, query, params))
+            if df is not None:
+                results[key] = df
+                record_fetch(started, query, params, df, hit=True)
+    missing = {key: request for key, request in unique.items() if key not in results}
+    if len(missing) == 1:
+        results.update({key: fetch(cache, *request, version) for key, request in missing.items()})
+    elif missing:
+        # copy_context: the workers record their timings under the caller's view
+        futures = {key: executor().submit(contextvars.copy_context().run, fetch, cache, *request, version)
+                   for key, request in missing.items()}
+        results.update({key: future.result() for key, future in futures.items()})
+    return [results[key] for key in keys]
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class VersionedCache(ABC):
+    """Thread-safe LRU bounded by total bytes and entry count.
+
+    Keys start with the data version; the first entry of a newer version drops
+    every older one. Subclasses say how big a value is and what get() hands out.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, max_entries=MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, bytes)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.version = None
+
+    @abstractmethod
+    def sizeof(self, value):
+        """Bytes the cache charges for ``value``."""
+
+    def copy(self, value):
+        return value
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self.copy(entry[0])
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self.version is None or key[0] > self.version:
+                # first result of a newer load: older versions can never be hit again
+                self.version = key[0]
+                for stale in [k for k in self._entries if k[0] != self.version]:
+                    self.bytes -= self._entries.pop(stale)[1]
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+
+class QueryCache(VersionedCache):
+    """Query results (DataFrames) keyed on (data version, SQL, params)."""
+
+    @staticmethod
+    def key(version, query, params=None):
+        if isinstance(params, dict):
+            params = sorted(params.items())
+        return (version, query, tuple(params) if params is not None else None)
+
+    def sizeof(self, df):
+        return frame_bytes(df)
+
+    def copy(self, df):
+        # shallow copy: callers adding columns do not touch the cached frame
+        return df.copy(deep=False)
+
+
+class FigureCache(VersionedCache):
+    """Serialized Plotly figures (JSON text) keyed on (data version, view, chart, filters)."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=MAX_ENTRIES):
+        super().__init__(max_bytes, max_entries)
+
+    @staticmethod
+    def key(version, view, chart, filters):
+        return (version, view, chart, tuple(sorted(filters.items())))
+
+    def sizeof(self, text):
+        return len(text)
@@ -0,0 +1,177 @@
+# canonical.py
+# Canonical State/District names, stable integer ids and the geojson aliases.
+#
+# Raw names come in as pulse folder names ("andaman-&-nicobar-islands") and
+# lower-case district strings ("north and middle andaman district"). Cleaning
+# is done once per distinct name and applied to whole columns through
+# categorical codes, never row by row.
+
+import os
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+IDS_PATH = "clean_data/name_ids.json"
+
+# ST_NM of clean_data/india_states.geojson -> canonical state name
+GEOJSON_ALIASES = {
+    "Andaman & Nicobar Island": "Andaman and Nicobar Islands",
+    "Dadara & Nagar Havelli": "Dadra and Nagar Haveli and Daman and Diu",
+    "Daman & Diu": "Dadra and Nagar Haveli and Daman and Diu",
+    "Jammu & Kashmir": "Jammu and Kashmir",
+    "NCT of Delhi": "Delhi",
+    "Orissa": "Odisha",
+}
+
+REGIONS = {
+    'Northern Region': ['Jammu and Kashmir', 'Himachal Pradesh', 'Punjab', 'Chandigarh', 'Uttarakhand', 'Ladakh', 'Delhi', 'Haryana'],
+    'Central Region': ['Uttar Pradesh', 'Madhya Pradesh', 'Chhattisgarh'],
+    'Western Region': ['Rajasthan', 'Gujarat', 'Dadra and Nagar Haveli and Daman and Diu', 'Maharashtra'],
+    'Eastern Region': ['Bihar', 'Jharkhand', 'Odisha', 'West Bengal', 'Sikkim'],
+    'Southern Region': ['Andhra Pradesh', 'Telangana', 'Karnataka', 'Kerala', 'Tamil Nadu', 'Puducherry', 'Goa', 'Lakshadweep', 'Andaman and Nicobar Islands'],
+    'North-Eastern Region': ['Assam', 'Meghalaya', 'Manipur', 'Nagaland', 'Tripura', 'Arunachal Pradesh', 'Mizoram']
+}
+REGION_OF = {state: region for region, states in REGIONS.items() for state in states}
+
+
+@lru_cache(maxsize=None)
+def canonical_state(raw):
+    """'dadra-&-nagar-haveli-&-daman-&-diu' -> 'Dadra and Nagar Haveli and Daman and Diu'."""
+    parts = raw.split('-')
+    if len(parts) == 1:
+        return raw.title()
+    return " ".join("and" if part == "&" else part.title() for part in parts)
+
+
+@lru_cache(maxsize=None)
+def canonical_district(raw, state):
+    """Title-cased district name as used by dist_lat_long.csv.
+
+    Delhi districts other than Shahdara carry a " Delhi" suffix there
+    ("Central" -> "Central Delhi").
+    """
+    name = raw.removesuffix(' district').title().replace(' And', ' and').replace('andaman', 'Andaman')
+    if state == "Delhi" and name != "Shahdara" and "Delhi" not in name:
+        name += " Delhi"
+    return name
+
+
+def recode(values, func):
+    """Apply ``func`` to every distinct value of a column; returns a Categorical.
+
+    ``func`` may return None, which becomes a missing value.
+    """
+    cat = pd.Categorical(values)
+    mapped = [func(category) for category in cat.categories]
+    categories = np.array(sorted({name for name in mapped if name is not None}), dtype=object)
+    position = {name: code for code, name in enumerate(categories)}
+    # trailing -1 keeps missing codes (-1) missing
+    lookup = np.array([-1 if name is None else position[name] for name in mapped] + [-1], dtype=np.int32)
+    return pd.Categorical.from_codes(lookup[cat.codes], categories=categories)
+
+
+def recode_pairs(states, districts, func):
+    """Like recode, for a function of the (district, state) pair."""
+    states, districts = pd.Categorical(states), pd.Categorical(districts)
+    width = len(districts.categories) + 1
+    # shift codes by one so missing values (-1) get a slot of their own
+    pair_codes = (states.codes.astype(np.int64) + 1) * width + districts.codes + 1
+    unique_pairs, inverse = np.unique(pair_codes, return_inverse=True)
+
+    mapped = []
+    for pair in unique_pairs:
+        state_code, district_code = divmod(int(pair), width)
+        if state_code == 0 or district_code == 0:
+            mapped.append(None)
+        else:
+            mapped.append(func(districts.categories[district_code - 1], states.categories[state_code - 1]))
+
+    categories = np.array(sorted({name for name in mapped if name is not None}), dtype=object)
+    position = {name: code for code, name in enumerate(categories)}
+    lookup = np.array([-1 if name is None else position[name] for name in mapped], dtype=np.int32)
+    return pd.Categorical.from_codes(lookup[inverse.reshape(-1)], categories=categories)
+
+
+def canonicalize(df):
+    """Return a copy of ``df`` with canonical State/District (categorical) and Region."""
+    df = df.copy()
+    if 'State' in df.columns:
+        df['State'] = recode(df['State'], canonical_state)
+        df['Region'] = recode(df['State'], lambda state: REGION_OF.get(state))
+    if 'District' in df.columns and 'State' in df.columns:
+        df['District'] = recode_pairs(df['State'], df['District'], canonical_district)
+    return df
+
+
+# ---------------------------------------------------------------------------
+# stable integer ids
+# ---------------------------------------------------------------------------
+
+def load_ids(path=IDS_PATH):
+    if not os.path.exists(path):
+        return {"State": {}, "District": {}}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_ids(ids, path=IDS_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(ids, f, indent=1, sort_keys=True)
+
+
+def _register(registry, keys):
+    """Ids for ``keys``; unseen keys get the next free id (ids never change)."""
+    next_id = max(registry.values(), default=0) + 1
+    for key in keys:
+        if key not in registry:
+            registry[key] = next_id
+            next_id += 1
+    return np.array([registry[key] for key in keys], dtype=np.int32)
+
+
+def assign_ids(df, ids):
+    """Add State_ID / District_ID columns from the id registry ``ids`` (updated in place).
+
+    Districts are keyed by "State|District" since district names repeat across
+    states (Aurangabad, Bilaspur, ...).
+    """
+    df = df.copy()
+    state = pd.Categorical(df['State'])
+    state_ids = _register(ids["State"], list(state.categories))
+    df['State_ID'] = np.append(state_ids, 0)[state.codes]
+
+    if 'District' in df.columns:
+        keys = df['State'].astype(str) + "|" + df['District'].astype(str)
+        key = pd.Categorical(keys.where(df['District'].notna()))
+        district_ids = _register(ids["District"], list(key.categories))
+        df['District_ID'] = np.append(district_ids, 0)[key.codes]
+    return df
+
+
+# ---------------------------------------------------------------------------
+# geojson
+# ---------------------------------------------------------------------------
+
+def canonical_geojson(geojson):
+    """Rename ST_NM to canonical state names, merging features of the same state.
+
+    After this the choropleths can use the DataFrame State column directly as
+    ``locations`` with ``featureidkey="properties.ST_NM"``.
+    """
+    merged = {}
+    for feature in geojson["features"]:
+        name = GEOJSON_ALIASES.get(feature["properties"]["ST_NM"], feature["properties"]["ST_NM"])
+        geometry = feature["geometry"]
+        polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+        if name in merged:
+            merged[name]["geometry"]["coordinates"].extend(polygons)
+        else:
+            merged[name] = {
+                "type": "Feature",
+                "properties": {**feature["properties"], "ST_NM": name},
+                "geometry": {"type": "MultiPolygon", "coordinates": list(polygons)},
+            }
+    return {"type": "FeatureCollection", "features": list(merged.values())}
@@ -0,0 +1,496 @@
+# charts.py
+# The dashboard's Plotly figures, built once per data version and filter selection.
+#
+# Every chart of main.py is registered under (view, chart) with the filters it
+# takes, the query of its data and a builder. figures() returns a view's
+# figures from a FigureCache, fetching the data of the missing ones in one
+# concurrent batch and only running Plotly Express for them. warm_up()
+# pre-builds the slices most sessions open first (the default selections and
+# the latest quarter) so the first visitors after a load do not pay for them.
+
+import json
+from collections import namedtuple
+from functools import partial
+from itertools import product
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import perf
+import queries
+
+# fetch(sql, params) -> DataFrame, fetch_many([(sql, params), ...]) -> [DataFrame, ...]
+# (concurrently); geometry: a geometry.GeometryService
+Sources = namedtuple("Sources", ["fetch", "fetch_many", "geometry"])
+
+# query(**filters) -> (sql, params) of the chart's data, build(src, df, **filters)
+# -> Figure. ``periods`` is the table the year / quarter choices come from,
+# ``options`` lists the values of the other filters to warm.
+ChartSpec = namedtuple("ChartSpec", ["query", "build", "filters", "periods", "options"])
+
+CHARTS = {}
+
+
+def chart(view, name, query, filters=(), periods=None, options=None):
+    def register(build):
+        CHARTS[(view, name)] = ChartSpec(query, build, tuple(filters), periods, options or {})
+        return build
+    return register
+
+
+def figures(cache, src, version, view, selections):
+    """Figures of ``view`` for a list of (chart, filters), in order.
+
+    The queries of every chart missing from the cache are fetched together
+    (src.fetch_many), so a view waits for its slowest query, not their sum.
+    """
+    selections = [(name, {key: queries.value(value) for key, value in filters.items()})
+                  for name, filters in selections]
+    texts = [cache.get(cache.key(version, view, name, filters)) for name, filters in selections]
+    missing = [i for i, text in enumerate(texts) if text is None]
+    specs = [CHARTS[(view, name)] for name, _ in selections]
+    frames = src.fetch_many([specs[i].query(**selections[i][1]) for i in missing])
+    for i, df in zip(missing, frames):
+        name, filters = selections[i]
+        with perf.timer("figure", chart=name):
+            fig = specs[i].build(src, df, **filters)
+        with perf.timer("serialize", chart=name, step="to_json"):
+            texts[i] = fig.to_json()
+        cache.put(cache.key(version, view, name, filters), texts[i])
+    # Figures, not dicts: st.plotly_chart re-validates dicts (and rejects empty slices);
+    # the cached JSON came from valid figures, so skip validation here
+    with perf.timer("serialize", charts=len(texts), step="from_json", bytes=sum(map(len, texts))):
+        return [go.Figure(json.loads(text), _validate=False) for text in texts]
+
+
+def figure(cache, src, version, view, name, **filters):
+    """The figure of ``(view, name)`` for ``filters``; Plotly Express only runs on a cache miss."""
+    return figures(cache, src, version, view, [(name, filters)])[0]
+
+
+# ---------------------------------------------------------------------------
+# warm-up
+# ---------------------------------------------------------------------------
+
+def common_periods(src, table):
+    """The default selection (first year, first quarter) and the latest quarter."""
+    periods = src.fetch(*queries.periods(table))
+    if periods.empty:
+        return []
+    latest = periods.sort_values(["Year", "Quarter"]).iloc[-1]
+    first = (periods["Year"].min(), periods["Quarter"].min())
+    return sorted({tuple(map(queries.value, first)), (queries.value(latest["Year"]), queries.value(latest["Quarter"]))})
+
+
+def common_slices(src, spec):
+    """Filter selections worth pre-building for one chart."""
+    candidates = []
+    if "year" in spec.filters:
+        pairs = common_periods(src, spec.periods)
+        if "quarter" in spec.filters:
+            candidates.append([{"year": year, "quarter": quarter} for year, quarter in pairs])
+        else:
+            candidates.append([{"year": year} for year in sorted({year for year, _ in pairs})])
+    for name in spec.filters:
+        if name in ("year", "quarter"):
+            continue
+        if name in spec.options:
+            candidates.append([{name: value} for value in spec.options[name]])
+        elif name == "state":
+            names = src.fetch(*queries.states(spec.periods))["State"]
+            candidates.append([{"state": names.iloc[0]}] if len(names) else [])
+    return [dict(kv for part in combination for kv in part.items()) for combination in product(*candidates)]
+
+
+def warm_up(cache, src, version):
+    """Pre-build the common slices of every chart. Returns (built, failed)."""
+    perf.set_view("warm-up")
+    built = failed = 0
+    for (view, name), spec in CHARTS.items():
+        try:
+            slices = common_slices(src, spec)
+            figures(cache, src, version, view, [(name, filters) for filters in slices])
+            built += len(slices)
+        except Exception:
+            failed += 1  # best effort: the chart is built on first view instead
+    return built, failed
+
+
+# ---------------------------------------------------------------------------
+# Aggregated Analysis
+# ---------------------------------------------------------------------------
+
+@chart("agg_insurance", "amount_by_state", queries.insurance_by_state, ("year", "quarter"),
+       "aggregateinsurance_by_state_year_quarter")
+def insurance_amount_by_state(src, df, year, quarter):
+    return px.bar(
+        df.sort_values(by="Total_Amount", ascending=False),
+        x="State",
+        y="Total_Amount",
+        color="Total_Amount",
+        color_continuous_scale="Blues",
+        title=f"Total Insurance Amount by State ({year} Q{quarter})"
+    )
+
+
+@chart("agg_insurance", "policies_by_state", queries.insurance_by_state, ("year", "quarter"),
+       "aggregateinsurance_by_state_year_quarter")
+def insurance_policies_by_state(src, df, year, quarter):
+    return px.bar(
+        df.sort_values(by="Total_Policies", ascending=False),
+        x="State",
+        y="Total_Policies",
+        color="Total_Policies",
+        color_continuous_scale="Viridis",
+        title=f"Total Insurance Policies by State ({year} Q{quarter})"
+    )
+
+
+@chart("agg_insurance", "yearly", queries.insurance_by_year)
+def insurance_yearly(src, df):
+    return px.line(
+        df,
+        x="Year",
+        y="Total_Amount",
+        markers=True,
+        title="Yearly Growth of Insurance Amount"
+    )
+
+
+@chart("agg_insurance", "quarterly", queries.insurance_by_quarter, ("year",),
+       "aggregateinsurance_by_state_year_quarter")
+def insurance_quarterly(src, df, year):
+    return px.bar(
+        df,
+        x="Quarter",
+        y="Total_Amount",
+        text_auto=".2s",
+        color="Total_Amount",
+        color_continuous_scale="Magma",
+        title=f"Quarterly Insurance Amount Distribution in {year}"
+    )
+
+
+@chart("agg_transaction", "types", queries.transaction_types, ("state", "year"),
+       "aggregatedtransaction_by_state_year_quarter")
+def transaction_types(src, df, state, year):
+    return px.bar(
+        df,
+        x='Quarter', y='Transaction_Amount', color='Transaction_Type',
+        title=f"{state} - {year} Transaction Analysis",
+        template='plotly_dark'
+    )
+
+
+@chart("agg_transaction", "amount_by_state", queries.transaction_by_state, ("year", "quarter"),
+       "aggregatedtransaction_by_state_year_quarter")
+def transaction_amount_by_state(src, df, year, quarter):
+    return px.bar(
+        df.sort_values(by="Transaction_Amount", ascending=False),
+        x="State",
+        y="Transaction_Amount",
+        color="Transaction_Amount",
+        color_continuous_scale="Blues",
+        title=f"Total Transaction Amount by State ({year} Q{quarter})"
+    )
+
+
+@chart("agg_transaction", "count_by_state", queries.transaction_by_state, ("year", "quarter"),
+       "aggregatedtransaction_by_state_year_quarter")
+def transaction_count_by_state(src, df, year, quarter):
+    return px.bar(
+        df.sort_values(by="Transaction_Count", ascending=False),
+        x="State",
+        y="Transaction_Count",
+        color="Transaction_Count",
+        color_continuous_scale="Viridis",
+        title=f"Total Transactions by State ({year} Q{quarter})"
+    )
+
+
+@chart("agg_transaction", "yearly", queries.transaction_by_year)
+def transaction_yearly(src, df):
+    return px.line(
+        df,
+        x="Year",
+        y="Transaction_Amount",
+        markers=True,
+        title="Yearly Growth of Transaction Amount"
+    )
+
+
+@chart("agg_transaction", "quarterly", queries.transaction_by_quarter, ("year",),
+       "aggregatedtransaction_by_state_year_quarter")
+def transaction_quarterly(src, df, year):
+    return px.bar(
+        df,
+        x="Quarter",
+        y="Transaction_Amount",
+        text_auto=".2s",
+        color="Transaction_Amount",
+        color_continuous_scale="Magma",
+        title=f"Quarterly Transaction Amount Distribution in {year}"
+    )
+
+
+@chart("agg_user", "brands", queries.user_by_brand, ("year", "quarter"), "aggregateuser_by_state_year_quarter")
+def user_brands(src, df, year, quarter):
+    return px.pie(
+        df,
+        values="Total_Transactions",
+        names="Brand",
+        title=f"Brand-wise Transaction Share ({year} Q{quarter})",
+        hole=0.5,
+        color_discrete_sequence=px.colors.sequential.Viridis
+    )
+
+
+@chart("agg_user", "top_states", queries.user_top_states, ("year", "quarter"), "aggregateuser_by_state_year_quarter")
+def user_top_states(src, df, year, quarter):
+    return px.bar(
+        df,
+        x="State",
+        y="Total_Transactions",
+        color="Total_Transactions",
+        color_continuous_scale="Blues",
+        text_auto=".2s",
+        title=f"Top 10 States by Transactions ({year} Q{quarter})"
+    )
+
+
+@chart("agg_user", "yearly", queries.user_by_year)
+def user_yearly(src, df):
+    return px.line(
+        df,
+        x="Year",
+        y="Total_Transactions",
+        markers=True,
+        title="Yearly Growth of User Transactions"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Map Analysis
+# ---------------------------------------------------------------------------
+
+MAP_INSURANCE_METRICS = {"Total Policies": ("Total_Policies", "Total Policies"),
+                         "Total Amount": ("Total_Amount", "Total Amount (₹)")}
+
+
+@chart("map_insurance", "choropleth", lambda metric: queries.map_insurance_by_state(), ("metric",),
+       options={"metric": list(MAP_INSURANCE_METRICS)})
+def map_insurance(src, df, metric):
+    color_col, color_label = MAP_INSURANCE_METRICS[metric]
+    fig = px.choropleth(
+        df,
+        geojson=src.geometry.for_viewport(),
+        featureidkey="properties.ST_NM",
+        locations="State",
+        color=color_col,
+        color_continuous_scale="Viridis",
+        title=f"Insurance {color_label} Distribution (State-wise)"
+    )
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(
+        geo=dict(bgcolor="rgba(0,0,0,0)"),
+        coloraxis_colorbar=dict(title=color_label),
+        title_x=0.25
+    )
+    return fig
+
+
+@chart("map_transaction", "choropleth", queries.map_transaction_by_state)
+def map_transaction(src, df):
+    fig = px.choropleth(
+        df,
+        geojson=src.geometry.for_viewport(),
+        featureidkey="properties.ST_NM",  # must match the key in geojson
+        locations="State",
+        color="Total_Amount",
+        color_continuous_scale="Viridis",
+        title="Transaction Amount Distribution (State-wise)",
+    )
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(
+        geo=dict(bgcolor="rgba(0,0,0,0)"),
+        coloraxis_colorbar=dict(title="₹ Total Amount"),
+        title_x=0.25
+    )
+    return fig
+
+
+def map_user_states(src, df):
+    """Map User slice from the state x year x quarter rollup, one row for every state
+    of the map (NaN where a state has no data) so the choropleth always gets len(states) rows."""
+    states = pd.Index(src.geometry.names, name="State")
+    return df.set_index(df["State"].astype(object)).drop(columns="State").reindex(states).reset_index()
+
+
+@chart("map_user", "choropleth", queries.map_user_by_state, ("year", "quarter"), "map_user_by_state_year_quarter")
+def map_user(src, df, year, quarter):
+    fig = px.choropleth(
+        map_user_states(src, df),
+        geojson=src.geometry.for_viewport(),
+        featureidkey="properties.ST_NM",
+        locations="State",
+        color="Registered_users",
+        hover_name="State",
+        hover_data=["App_opens"],
+        color_continuous_scale="Viridis",
+        title=f"Registered Users across States ({year} Q{quarter})"
+    )
+    fig.update_geos(
+        fitbounds="locations",          # Fits map tightly around your state shapes
+        visible=False,                  # Hides world outline
+        projection_type="mercator",     # Accurate flat projection for India
+        center={"lat": 22, "lon": 78},  # Centers over India
+        lataxis_range=[6, 38],          # South to North bounds
+        lonaxis_range=[68, 98],         # West to East bounds
+    )
+    fig.update_layout(
+        title_text=f"Registered Users across States ({year} Q{quarter})",
+        geo=dict(bgcolor='rgba(0,0,0,0)'),  # Transparent background
+        margin={"r": 0, "t": 30, "l": 0, "b": 0},
+    )
+    return fig
+
+
+# points binned by MySQL for this zoom level (see queries.district_points)
+@chart("district_map", "points", queries.district_points, ("table", "year", "quarter", "zoom", "state"),
+       "map_user_by_state_year_quarter",
+       options={"table": list(queries.POINT_VIEWS), "zoom": [4], "state": [None]})
+def district_map(src, points, table, year, quarter, zoom, state=None):
+    measure = queries.POINT_VIEWS[table][1]
+    weights = points[measure].fillna(0) + 1e-9
+    center = ({"lat": 22, "lon": 80} if state is None else
+              {"lat": float((points["Latitude"] * weights).sum() / weights.sum()),
+               "lon": float((points["Longitude"] * weights).sum() / weights.sum())})
+    # WebGL scatter on a tile map instead of thousands of SVG markers
+    fig = px.scatter_mapbox(
+        points,
+        lat="Latitude",
+        lon="Longitude",
+        size=measure,
+        color=measure,
+        hover_name="District",
+        hover_data={"Districts": True, "Latitude": False, "Longitude": False},
+        color_continuous_scale="Viridis",
+        size_max=30,
+        zoom=zoom,
+        center=center,
+        mapbox_style="carto-positron",
+        title=f"{measure.replace('_', ' ')} by District ({year} Q{quarter})"
+    )
+    fig.update_layout(margin={"r": 0, "t": 30, "l": 0, "b": 0}, height=650)
+    return fig
+
+
+# ---------------------------------------------------------------------------
+# Top Analysis: table -> (subject of the titles, state bar colours, district bar colours)
+# ---------------------------------------------------------------------------
+
+TOP_CHARTS = {
+    "topinsurance": ("Insurance Transaction Amount", "Insurance Transaction Count", "Insurance Transaction Amount",
+                     "Viridis", "Blues"),
+    "toptransaction": ("Transaction Amount", "Transaction Count", "Transaction Amount", "Viridis", "Blues"),
+    "topuser": ("Registered Users", "Registered Users", "Registered Users", "Blues", "Viridis"),
+}
+
+
+def register_top(table):
+    state_subject, district_subject, trend_subject, state_scale, district_scale = TOP_CHARTS[table]
+    periods = f"{table}_by_state_year_quarter"
+    trend_title = ("Yearly Growth in Registered Users" if table == "topuser"
+                   else f"Yearly Growth of {trend_subject}")
+
+    @chart(f"top_{table}", "states", partial(queries.top_states, table), ("year", "quarter"), periods)
+    def states(src, df, year, quarter):
+        measure = queries.TOP_VIEWS[table][0][1]
+        return px.bar(
+            df,
+            x="State",
+            y=measure,
+            color=measure,
+            color_continuous_scale=state_scale,
+            text_auto=".2s",
+            title=f"Top 10 States by {state_subject} ({year} Q{quarter})"
+        )
+
+    @chart(f"top_{table}", "districts", partial(queries.top_districts, table), ("year", "quarter"), periods)
+    def districts(src, df, year, quarter):
+        measure = queries.TOP_VIEWS[table][1][1]
+        return px.bar(
+            df,
+            x="District",
+            y=measure,
+            color=measure,
+            color_continuous_scale=district_scale,
+            text_auto=".2s",
+            title=f"Top 10 Districts by {district_subject} ({year} Q{quarter})"
+        )
+
+    @chart(f"top_{table}", "yearly", partial(queries.top_by_year, table))
+    def yearly(src, df):
+        return px.line(
+            df,
+            x="Year",
+            y=queries.TOP_VIEWS[table][2][1],
+            markers=True,
+            title=trend_title
+        )
+
+
+for _table in TOP_CHARTS:
+    register_top(_table)
+
+
+# ---------------------------------------------------------------------------
+# TOP CHARTS
+# ---------------------------------------------------------------------------
+
+@chart("top_charts", "amount", queries.top_states_by_amount)
+def top_charts_amount(src, df):
+    return px.bar(
+        df,
+        x="State",
+        y="Total_Amount",
+        color="Total_Amount",
+        color_continuous_scale="Tealgrn",
+        title="Top 10 States by Total Transaction Amount"
+    )
+
+
+@chart("top_charts", "users", queries.top_states_by_users)
+def top_charts_users(src, df):
+    return px.bar(
+        df,
+        x="State",
+        y="Total_Users",
+        color="Total_Users",
+        color_continuous_scale="Blues",
+        title="Top 10 States by Registered Users"
+    )
+
+
+@chart("top_charts", "insurance", queries.top_states_by_insurance)
+def top_charts_insurance(src, df):
+    return px.bar(
+        df,
+        x="State",
+        y="Total_Insurance_Amount",
+        color="Total_Insurance_Amount",
+        color_continuous_scale="Purples",
+        title="Top 10 States by Insurance Transaction Amount"
+    )
+
+
+@chart("top_charts", "yearly", queries.yearly_amount)
+def top_charts_yearly(src, df):
+    return px.line(
+        df,
+        x="Year",
+        y="Total_Amount",
+        markers=True,
+        title="Yearly Growth in Total Transactions"
+    )
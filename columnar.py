@@ -0,0 +1,112 @@
+# columnar.py
+# Columnar result reader behind main.fetch_data.
+#
+# pd.read_sql over a mysql.connector connection turns every field into a
+# python object (int, Decimal, str), builds row tuples and then infers dtypes.
+# Here the cursor is raw, so fields stay bytes, and rows are read in fetchmany
+# batches straight into preallocated numpy columns typed from the result
+# metadata: numbers are parsed by numpy once per batch, and string columns
+# are dictionary-encoded while they arrive and end up as categoricals when
+# their values repeat.
+
+import numpy as np
+import pandas as pd
+from mysql.connector.constants import FieldType
+
+from builder import sorted_categorical
+
+BATCH_ROWS = 10000
+
+INTEGER_TYPES = {FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.LONGLONG, FieldType.INT24,
+                 FieldType.YEAR}
+FLOAT_TYPES = {FieldType.DECIMAL, FieldType.NEWDECIMAL, FieldType.FLOAT, FieldType.DOUBLE}
+
+
+def as_bytes(values):
+    # the C extension hands out bytes, the pure python connector bytearray (unhashable)
+    return [v if v is None or type(v) is bytes else bytes(v) for v in values]
+
+
+class NumberColumn:
+    def __init__(self, dtype, capacity):
+        self.dtype = dtype
+        self.values = np.empty(capacity, dtype=dtype)
+        self.nulls = None
+        self.size = 0
+
+    def _reserve(self, n):
+        if self.size + n > len(self.values):
+            self.values = np.resize(self.values, max(2 * len(self.values), self.size + n))
+
+    def append(self, values):
+        n = len(values)
+        self._reserve(n)
+        if None in values:
+            missing = np.fromiter((v is None for v in values), dtype=bool, count=n)
+            if self.nulls is None:
+                self.nulls = np.zeros(self.size, dtype=bool)
+            self.nulls = np.concatenate([self.nulls, missing])
+            values = [b"0" if v is None else v for v in values]
+        elif self.nulls is not None:
+            self.nulls = np.concatenate([self.nulls, np.zeros(n, dtype=bool)])
+        parsed = np.array(as_bytes(values), dtype="S").astype(self.dtype)
+        self.values[self.size:self.size + n] = parsed
+        self.size += n
+
+    def finish(self):
+        values = self.values[:self.size]
+        if self.nulls is not None and self.nulls.any():
+            values = values.astype(np.float64)  # same as read_sql: NULL integers -> float NaN
+            values[self.nulls] = np.nan
+        return values
+
+
+class StringColumn:
+    def __init__(self, capacity):
+        self.codes = np.empty(capacity, dtype=np.int32)
+        self.index = {None: -1}  # value -> code, in first-seen order
+        self.size = 0
+
+    def append(self, values):
+        n = len(values)
+        if self.size + n > len(self.codes):
+            self.codes = np.resize(self.codes, max(2 * len(self.codes), self.size + n))
+        index = self.index
+        self.codes[self.size:self.size + n] = np.fromiter(
+            (index.setdefault(v, len(index) - 1) for v in as_bytes(values)), dtype=np.int32, count=n)
+        self.size += n
+
+    def finish(self):
+        codes = self.codes[:self.size]
+        categories = [value.decode("utf-8") for value in list(self.index)[1:]]
+        column = sorted_categorical(codes, categories)
+        if 2 * len(categories) > self.size:
+            # mostly distinct values (e.g. pincodes): a categorical would not save anything
+            return np.asarray(column.astype(object))
+        return column
+
+
+def new_column(type_code, capacity):
+    if type_code in INTEGER_TYPES:
+        return NumberColumn(np.int64, capacity)
+    if type_code in FLOAT_TYPES:
+        return NumberColumn(np.float64, capacity)
+    return StringColumn(capacity)
+
+
+def fetch_frame(conn, query, params=None, batch_rows=BATCH_ROWS):
+    """Run ``query`` and return its result as a DataFrame, read column-wise."""
+    cursor = conn.cursor(raw=True)
+    try:
+        cursor.execute(query, params or ())
+        names = [column[0] for column in cursor.description]
+        columns = [new_column(column[1], batch_rows) for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            for column, values in zip(columns, zip(*rows)):
+                column.append(values)
+    finally:
+        cursor.close()
+    return pd.DataFrame({name: column.finish() for name, column in zip(names, columns)}, columns=names)
@@ -1,16 +1,187 @@
 # config.py
-DB_HOST = "localhost"
-DB_USER = "root"
-DB_PASSWORD = "omi172001"
-DB_NAME = "phonepe_pulse"
+import os
+import threading
+import time
+from collections import deque
+
+# environment variables override the defaults (e.g. to point tests at a scratch database)
+DB_HOST = os.environ.get("PHONEPE_DB_HOST", "localhost")
+DB_USER = os.environ.get("PHONEPE_DB_USER", "root")
+DB_PASSWORD = os.environ.get("PHONEPE_DB_PASSWORD", "omi172001")
+DB_NAME = os.environ.get("PHONEPE_DB_NAME", "phonepe_pulse")
+
+# connection pool: connections kept open per process, seconds to wait for a free
+# one, and idle seconds after which a connection is pinged before being handed out
+DB_POOL_SIZE = int(os.environ.get("PHONEPE_DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.environ.get("PHONEPE_DB_POOL_TIMEOUT", "30"))
+DB_POOL_PING_AFTER = float(os.environ.get("PHONEPE_DB_POOL_PING_AFTER", "5"))
 
 
 import mysql.connector as con
 
-def get_connection():
+def connect(**kwargs):
+    # a new, unpooled connection; extra keyword arguments go straight to mysql.connector
     return con.connect(
-        host="localhost",
-        user="root",
-        password="omi172001",
-        database="phonepe_pulse"
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        **kwargs
     )
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """A pooled mysql.connector connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise AttributeError(f"{name}: connection already returned to the pool")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+class ConnectionPool:
+    """Fixed-size pool: at most ``size`` connections checked out, callers beyond that wait."""
+
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, ping_after=DB_POOL_PING_AFTER, **kwargs):
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.kwargs = kwargs
+        self._idle = deque()  # (connection, returned at)
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.created = 0
+        self.reconnects = 0
+
+    def _new(self):
+        conn = connect(**self.kwargs)
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def _healthy(self, conn, returned_at):
+        if time.monotonic() - returned_at < self.ping_after:
+            return True
+        try:
+            return conn.is_connected()
+        except Exception:
+            return False
+
+    def acquire(self):
+        if not self._slots.acquire(blocking=False):
+            started = time.perf_counter()
+            got = self._slots.acquire(timeout=self.timeout)
+            with self._lock:
+                self.waits += 1
+                self.wait_time += time.perf_counter() - started
+            if not got:
+                raise PoolTimeout(f"no free connection after {self.timeout}s (pool size {self.size})")
+        try:
+            with self._lock:
+                conn, returned_at = self._idle.pop() if self._idle else (None, None)
+            if conn is None:
+                conn = self._new()
+            elif not self._healthy(conn, returned_at):
+                # stale (server restart, wait_timeout): drop it and open a fresh one
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = self._new()
+                with self._lock:
+                    self.reconnects += 1
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # never hand out a connection with someone else's open transaction
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self.in_use,
+                "idle": len(self._idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "created": self.created,
+                "reconnects": self.reconnects,
+            }
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(**kwargs):
+    # one pool per distinct set of connection options, shared by every thread of the process
+    key = tuple(sorted(kwargs.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(**kwargs)
+        return _pools[key]
+
+
+def get_connection(**kwargs):
+    # a connection from the process-wide pool; call close() to give it back
+    return get_pool(**kwargs).acquire()
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [dict(pool.stats(), options=pool.kwargs) for pool in pools]
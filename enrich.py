@@ -0,0 +1,63 @@
+# enrich.py
+# One-time geo enrichment: adds district Latitude/Longitude to the clean tables.
+#
+# dist_lat_long.csv is read once into a hashed (State, District) -> row index.
+# Each table is looked up once per distinct (State, District) pair and the
+# coordinates are assigned by position, so there is no merge: re-running never
+# produces _x/_y columns or extra rows, and keys without coordinates are
+# reported instead of being dropped.
+
+import numpy as np
+import pandas as pd
+
+LAT_LONG_PATH = "pulse/data/dist_lat_long.csv"
+
+
+class CoordinateIndex:
+    def __init__(self, lat_long_df):
+        self.latitude = lat_long_df["Latitude"].to_numpy(dtype=np.float64)
+        self.longitude = lat_long_df["Longitude"].to_numpy(dtype=np.float64)
+        self.positions = {}
+        self.duplicates = []
+        for position, key in enumerate(zip(lat_long_df["State"], lat_long_df["District"])):
+            if key in self.positions:
+                self.duplicates.append(key)  # first one wins, merge would have duplicated rows
+            else:
+                self.positions[key] = position
+
+    @classmethod
+    def from_csv(cls, path=LAT_LONG_PATH):
+        return cls(pd.read_csv(path))
+
+    def lookup(self, state, district):
+        position = self.positions.get((state, district))
+        if position is None:
+            return np.nan, np.nan
+        return self.latitude[position], self.longitude[position]
+
+
+def enrich(df, index):
+    """Return (df with Latitude/Longitude, unmatched keys).
+
+    ``unmatched`` is a DataFrame of State, District, Rows for every pair with
+    no coordinates. Tables without a District column are returned unchanged.
+    """
+    if "District" not in df.columns or "State" not in df.columns:
+        return df, pd.DataFrame(columns=["State", "District", "Rows"])
+
+    pairs = pd.MultiIndex.from_arrays([df["State"].astype(object), df["District"].astype(object)])
+    codes, uniques = pd.factorize(pairs)
+    coords = np.array([index.lookup(state, district) for state, district in uniques], dtype=np.float64).reshape(-1, 2)
+
+    df = df.drop(columns=["Latitude", "Longitude"], errors="ignore")
+    at = df.columns.get_loc("Region") if "Region" in df.columns else len(df.columns)
+    missing_row = np.array([[np.nan, np.nan]])
+    values = np.vstack([coords, missing_row])[codes]  # code -1 (missing key) -> NaN
+    df.insert(at, "Latitude", values[:, 0])
+    df.insert(at + 1, "Longitude", values[:, 1])
+
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    unmatched = [(state, district, int(counts[i])) for i, (state, district) in enumerate(uniques)
+                 if np.isnan(coords[i, 0])]
+    return df, pd.DataFrame(unmatched, columns=["State", "District", "Rows"])
+
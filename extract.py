@@ -0,0 +1,368 @@
+# extract.py
+# Spec-driven extraction of the PhonePe Pulse json tree into DataFrames.
+#
+# Every dataset under pulse/data/<kind>/<category>/.../state/<state>/<year>/<q>.json
+# has the same directory layout, only the place of the record lists inside the
+# json and the fields picked from each record differ. Those differences are
+# described once in SOURCES and a single parser handles all of them; files are
+# parsed in parallel on a process pool and the results merged per table.
+#
+# A source can feed several tables (top/transaction holds both the district and
+# the pincode lists), so each file is opened and decoded exactly once.
+#
+# Names are kept as they appear in the json (dictionary-encoded); cleaning them
+# is canonical.py's job and happens once per distinct name.
+#
+# The root can be the pulse/data folder or a pack file built by pack.py, in
+# which case payloads are sliced out of the memory-mapped pack.
+
+import os
+import json
+import argparse
+from dataclasses import dataclass, replace
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from builder import ChunkBuilder, concat_frames
+from manifest import MANIFEST_FILE, load_manifest, save_manifest, plan_files
+from pack import open_pack, read_entry
+
+PULSE_ROOT = "pulse/data"
+
+# path element meaning "the key of the current record" (for dict shaped records)
+KEY = "@key"
+
+BATCH_SIZE = 64
+
+# storage type of every extracted column (see builder.py); names and other
+# repeated strings are dictionary-encoded
+COLUMN_TYPES = {
+    "State": "category", "Year": "int16", "Quarter": "int8",
+    "District": "category", "Pincode": "category",
+    "Transaction_Type": "category", "Type": "category", "Brand": "category",
+    "Transaction_Count": "int64", "Transaction_count": "int64",
+    "Registered_users": "int64", "App_opens": "int64",
+    "Transaction_Amount": "float64", "Transaction_amount": "float64", "Percentage": "float64",
+}
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    name: str           # clean table name (same as the MySQL table)
+    record_path: tuple  # keys leading from the file root to the records
+    fields: tuple       # (column, path inside a record, optional converter)
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    name: str           # e.g. "top/transaction"
+    base_path: str      # folder holding the <state> folders, relative to PULSE_ROOT
+    tables: tuple       # TableSpecs filled from every file of the source
+
+
+TOP_TRANSACTION_FIELDS = (("Transaction_count", ("metric", "count"), None),
+                          ("Transaction_amount", ("metric", "amount"), None))
+
+SOURCES = (
+    SourceSpec("aggregated/transaction", "aggregated/transaction/country/india/state", (
+        TableSpec("aggregatedtransaction", ("data", "transactionData"),
+                  (("Transaction_Type", ("name",), None),
+                   ("Transaction_Count", ("paymentInstruments", 0, "count"), None),
+                   ("Transaction_Amount", ("paymentInstruments", 0, "amount"), None))),
+    )),
+    SourceSpec("aggregated/user", "aggregated/user/country/india/state", (
+        TableSpec("aggregateuser", ("data", "usersByDevice"),
+                  (("Brand", ("brand",), None),
+                   ("Transaction_count", ("count",), None),
+                   ("Percentage", ("percentage",), None))),
+    )),
+    SourceSpec("aggregated/insurance", "aggregated/insurance/country/india/state", (
+        TableSpec("aggregateinsurance", ("data", "transactionData"),
+                  (("Type", ("name",), None),
+                   ("Transaction_count", ("paymentInstruments", 0, "count"), None),
+                   ("Transaction_amount", ("paymentInstruments", 0, "amount"), None))),
+    )),
+    SourceSpec("map/transaction", "map/transaction/hover/country/india/state", (
+        TableSpec("maptransaction", ("data", "hoverDataList"),
+                  (("District", ("name",), None),
+                   ("Transaction_count", ("metric", 0, "count"), None),
+                   ("Transaction_amount", ("metric", 0, "amount"), None))),
+    )),
+    SourceSpec("map/user", "map/user/hover/country/india/state", (
+        TableSpec("map_user", ("data", "hoverData"),
+                  (("District", (KEY,), None),
+                   ("Registered_users", ("registeredUsers",), None),
+                   ("App_opens", ("appOpens",), None))),
+    )),
+    SourceSpec("map/insurance", "map/insurance/hover/country/india/state", (
+        TableSpec("mapinsurance", ("data", "hoverDataList"),
+                  (("District", ("name",), None),
+                   ("Transaction_count", ("metric", 0, "count"), None),
+                   ("Transaction_amount", ("metric", 0, "amount"), None))),
+    )),
+    SourceSpec("top/transaction", "top/transaction/country/india/state", (
+        TableSpec("toptransaction", ("data", "districts"),
+                  (("District", ("entityName",), None),) + TOP_TRANSACTION_FIELDS),
+        TableSpec("toptransactionpincodewise", ("data", "pincodes"),
+                  (("Pincode", ("entityName",), None),) + TOP_TRANSACTION_FIELDS),
+    )),
+    SourceSpec("top/user", "top/user/country/india/state", (
+        TableSpec("topuser", ("data", "districts"),
+                  (("District", ("name",), None),
+                   ("Registered_users", ("registeredUsers",), None))),
+        TableSpec("topuserpincodewise", ("data", "pincodes"),
+                  (("Pincode", ("name",), None),
+                   ("Registered_users", ("registeredUsers",), None))),
+    )),
+    SourceSpec("top/insurance", "top/insurance/country/india/state", (
+        TableSpec("topinsurance", ("data", "districts"),
+                  (("District", ("entityName",), None),) + TOP_TRANSACTION_FIELDS),
+    )),
+)
+
+TABLES = {table.name: (source, table) for source in SOURCES for table in source.tables}
+
+
+def sources_for(table_names):
+    """Return the SourceSpecs needed for the given tables, trimmed to those tables."""
+    wanted = set(table_names)
+    unknown = wanted - TABLES.keys()
+    if unknown:
+        raise KeyError(f"unknown tables: {', '.join(sorted(unknown))}")
+    sources = []
+    for source in SOURCES:
+        tables = tuple(table for table in source.tables if table.name in wanted)
+        if tables:
+            sources.append(replace(source, tables=tables))
+    return tuple(sources)
+
+
+def columns_of(table):
+    return ["State", "Year", "Quarter"] + [column for column, _, _ in table.fields]
+
+
+def list_files(source, root=PULSE_ROOT):
+    """Yield (state, year, quarter, location) for every quarter file of a source.
+
+    ``location`` is a path, or a pack.PackEntry when ``root`` is a pack file.
+    """
+    if os.path.isfile(root):
+        for entry in open_pack(root).entries(source.base_path):
+            yield entry.state, entry.year, entry.quarter, entry
+        return
+
+    base = os.path.join(root, source.base_path)
+    for state in sorted(os.listdir(base)):
+        state_path = os.path.join(base, state)
+        if not os.path.isdir(state_path):
+            continue
+        for year in sorted(os.listdir(state_path)):
+            year_path = os.path.join(state_path, year)
+            if not os.path.isdir(year_path):
+                continue
+            for file in sorted(os.listdir(year_path)):
+                if file.endswith(".json"):
+                    yield state, int(year), int(file.removesuffix(".json")), os.path.join(year_path, file)
+
+
+def resolve(obj, path):
+    """Follow a key/index path, returning None as soon as something is missing."""
+    for step in path:
+        if obj is None:
+            return None
+        if isinstance(step, int):
+            obj = obj[step] if isinstance(obj, list) and len(obj) > step else None
+        else:
+            obj = obj.get(step) if isinstance(obj, dict) else None
+    return obj
+
+
+def iter_records(table, data):
+    """Yield (key, record) pairs from the record list (or dict) of one file."""
+    records = resolve(data, table.record_path)
+    if not records:
+        return
+    if isinstance(records, dict):
+        yield from records.items()
+    else:
+        for record in records:
+            yield None, record
+
+
+def parse_records(table, data):
+    """Return (row count, column -> list of values) for the records of one decoded file."""
+    out = {column: [] for column, _, _ in table.fields}
+    count = 0
+    for key, record in iter_records(table, data):
+        count += 1
+        for column, path, convert in table.fields:
+            value = key if path == (KEY,) else resolve(record, path)
+            if convert is not None and value is not None:
+                value = convert(value)
+            out[column].append(value)
+    return count, out
+
+
+def new_builder(table):
+    return ChunkBuilder({column: COLUMN_TYPES[column] for column in columns_of(table)})
+
+
+def load_payload(location):
+    if isinstance(location, str):
+        with open(location, "r") as f:
+            return json.load(f)
+    return json.loads(read_entry(location))
+
+
+def parse_batch(source, files):
+    """Worker: decode a batch of quarter files once and fill every table of the source."""
+    builders = {table.name: new_builder(table) for table in source.tables}
+    for state, year, quarter, location in files:
+        data = load_payload(location)
+        constants = {"State": state, "Year": year, "Quarter": quarter}
+        for table in source.tables:
+            count, columns = parse_records(table, data)
+            builders[table.name].extend(constants, columns, count)
+    return {name: builder.to_frame() for name, builder in builders.items()}
+
+
+def batches(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def parse_files(files_by_source, workers=None):
+    """Parse the given quarter files of several sources on one shared process pool.
+
+    ``files_by_source`` maps a SourceSpec to its list of (state, year, quarter,
+    location) tuples. Returns a dict mapping table name -> DataFrame. ``workers=1``
+    parses in the calling process, which is handy for debugging.
+    """
+    parts = {table.name: [] for source in files_by_source for table in source.tables}
+    jobs = [(source, batch) for source, files in files_by_source.items() for batch in batches(list(files))]
+
+    if workers == 1 or not jobs:
+        for source, batch in jobs:
+            for name, frame in parse_batch(source, batch).items():
+                parts[name].append(frame)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(parse_batch, source, batch) for source, batch in jobs]
+            # collect in submission order so the output row order is deterministic
+            for future in futures:
+                for name, frame in future.result().items():
+                    parts[name].append(frame)
+
+    return {
+        table.name: (concat_frames(parts[table.name]) if parts[table.name]
+                     else new_builder(table).to_frame())
+        for source in files_by_source for table in source.tables
+    }
+
+
+def extract_all(sources=SOURCES, root=PULSE_ROOT, workers=None):
+    """Extract several sources from scratch. Returns table name -> DataFrame."""
+    return parse_files({source: list(list_files(source, root)) for source in sources}, workers)
+
+
+def partition_mask(df, partitions):
+    """Boolean mask of the rows belonging to a set of (State, Year, Quarter) partitions."""
+    keys = pd.MultiIndex.from_frame(df[["State", "Year", "Quarter"]])
+    return keys.isin(list(partitions))
+
+
+def read_table(path):
+    """Read a previously extracted table, keeping name columns as strings.
+
+    Floats are parsed with round_trip precision so rows of unchanged partitions
+    are written back byte-identical.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    return pd.read_csv(path, dtype={column: str for column in header
+                                    if COLUMN_TYPES.get(column) == "category"},
+                       float_precision="round_trip")
+
+
+def extract_incremental(sources=SOURCES, root=PULSE_ROOT, out="raw_data", workers=None, full=False):
+    """Bring the <table>_df.csv files in ``out`` up to date with the pulse tree.
+
+    Only files that are new or whose content changed since the last run (as
+    recorded in ``out``/manifest.json) are parsed. Rows of changed or removed
+    (State, Year, Quarter) partitions are replaced. Returns
+    (frames, changed) where ``changed`` maps table name -> set of partitions
+    that were rewritten. ``full=True`` ignores the manifest and re-parses
+    every file of the given sources.
+    """
+    manifest_path = os.path.join(out, MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+
+    def csv_path(table):
+        return os.path.join(out, f"{table.name}_df.csv")
+
+    # the manifest is kept per table, so tables of one source can be at
+    # different points (e.g. a table was added or its csv deleted)
+    source_files, todo, stale, entries, merge = {}, {}, {}, {}, {}
+    for source in sources:
+        files = list(list_files(source, root))
+        for table in source.tables:
+            # without the previous output the manifest is worthless for this table
+            old_entries = manifest.get(table.name, {}) if os.path.exists(csv_path(table)) and not full else {}
+            merge[table.name] = bool(old_entries)
+            table_todo, stale[table.name], entries[table.name] = plan_files(files, root, old_entries)
+            todo[table.name] = {(state, year, quarter) for state, year, quarter, _ in table_todo}
+
+        # a file is decoded once if any table of the source needs it
+        needed = set().union(*(todo[table.name] for table in source.tables))
+        source_files[source] = [f for f in files if f[:3] in needed]
+
+    parsed = parse_files(source_files, workers)
+
+    frames, changed = {}, {}
+    os.makedirs(out, exist_ok=True)
+    for source in sources:
+        for table in source.tables:
+            fresh = parsed[table.name]
+            partitions = stale[table.name] | todo[table.name]
+            if merge[table.name]:
+                # the source may have decoded files only a sibling table needed
+                if not fresh.empty:
+                    fresh = fresh[partition_mask(fresh, todo[table.name])]
+                df = read_table(csv_path(table))
+                if partitions and not df.empty:
+                    df = df[~partition_mask(df, partitions)]
+                df = pd.concat([df, fresh], ignore_index=True) if not fresh.empty else df
+                df = df.sort_values(["State", "Year", "Quarter"], kind="stable").reset_index(drop=True)
+            else:
+                df = fresh
+            if partitions or not os.path.exists(csv_path(table)):
+                df.to_csv(csv_path(table), index=False)
+            frames[table.name], changed[table.name] = df, partitions
+            manifest[table.name] = entries[table.name]
+
+    save_manifest(manifest, manifest_path)
+    return frames, changed
+
+
+def extract(table_name, root=PULSE_ROOT, workers=None):
+    """Extract a single table by name into a DataFrame."""
+    return extract_all(sources_for([table_name]), root, workers)[table_name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract the PhonePe Pulse json tree into csv files")
+    parser.add_argument("--root", default=PULSE_ROOT, help="path of the pulse/data folder or of a pack file")
+    parser.add_argument("--out", default="raw_data", help="folder to write <table>_df.csv files to")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and re-parse every file")
+    parser.add_argument("tables", nargs="*", help="tables to extract (default: all)")
+    args = parser.parse_args()
+
+    sources = sources_for(args.tables) if args.tables else SOURCES
+    frames, changed = extract_incremental(sources, args.root, args.out, args.workers, args.full)
+    for name, df in frames.items():
+        print(f"✅ Extracted {name}: {len(df)} rows ({len(changed[name])} partitions refreshed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# geometry.py
+# State boundaries for the choropleths, parsed once and simplified ahead of time.
+#
+# Each ring is cut at its junctions: the points where the set of rings sharing
+# the boundary changes. Every arc between two junctions is simplified once
+# (Douglas-Peucker) and reused by all rings that share it, so neighbouring
+# states keep a common border at every resolution: no gaps or overlaps appear
+# where a per-polygon simplification would move the two sides differently.
+# Features only keep properties.ST_NM, the featureidkey of the maps.
+
+import json
+
+import numpy as np
+
+from canonical import canonical_geojson
+
+GEOJSON_PATH = "clean_data/india_states.geojson"
+
+# resolution -> Douglas-Peucker tolerance in degrees (0.01 deg ~ 1.1 km)
+RESOLUTIONS = {"full": 0.0, "high": 0.005, "medium": 0.02, "low": 0.05}
+
+# simplified coordinates are rounded to this many decimals (~11 m), far below any tolerance
+PRECISION = 4
+
+# longitude span of the India maps (fitbounds) and the width they are usually drawn at
+INDIA_SPAN = 30.0
+MAP_WIDTH_PX = 1200
+
+
+def douglas_peucker(points, tolerance):
+    """Indices of ``points`` (n x 2 array) kept by Douglas-Peucker; both ends are always kept."""
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        inner = points[first + 1:last]
+        dx, dy = end - start
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(*(inner - start).T)
+        else:
+            distances = np.abs(dx * (inner[:, 1] - start[1]) - dy * (inner[:, 0] - start[0])) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep)
+
+
+class GeometryService:
+    """Canonical state boundaries at every resolution of RESOLUTIONS, computed once."""
+
+    def __init__(self, geojson, resolutions=RESOLUTIONS):
+        geojson = canonical_geojson(geojson)
+        self.names = [feature["properties"]["ST_NM"] for feature in geojson["features"]]
+        # feature -> polygons -> rings, each ring a list of points without the closing one
+        self.shapes = [
+            [[[tuple(point) for point in ring[:-1]] for ring in polygon] for polygon in feature["geometry"]["coordinates"]]
+            for feature in geojson["features"]
+        ]
+        self._owners = self._ring_owners()
+        self.tolerances = dict(resolutions)
+        self.resolutions = {name: self._build(tolerance) for name, tolerance in resolutions.items()}
+
+    @classmethod
+    def from_file(cls, path=GEOJSON_PATH):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def _rings(self):
+        for polygons in self.shapes:
+            for rings in polygons:
+                yield from rings
+
+    def _ring_owners(self):
+        owners = {}
+        for ring_id, ring in enumerate(self._rings()):
+            for point in ring:
+                owners.setdefault(point, set()).add(ring_id)
+        return {point: frozenset(ids) for point, ids in owners.items()}
+
+    def _junctions(self, ring):
+        """Positions where the set of rings sharing the boundary changes."""
+        owners = [self._owners[point] for point in ring]
+        n = len(ring)
+        fixed = [i for i in range(n) if owners[i] != owners[i - 1] or owners[i] != owners[(i + 1) % n]]
+        if len(fixed) < 2:
+            # a ring shared nowhere (or touching a neighbour at one point): anchor it
+            # at that point (or its first one) and the point farthest from it
+            anchor = fixed[0] if fixed else 0
+            points = np.array(ring)
+            fixed = sorted({anchor, int(np.argmax(np.hypot(*(points - points[anchor]).T)))})
+        return fixed
+
+    def _simplify_ring(self, ring, tolerance, arcs):
+        fixed = self._junctions(ring)
+        n = len(ring)
+        out = []
+        for a, b in zip(fixed, fixed[1:] + [fixed[0] + n]):
+            arc = tuple(ring[i % n] for i in range(a, b + 1))
+            # the same arc walked backwards by the neighbour must simplify to the same points
+            key = min(arc, arc[::-1])
+            if key not in arcs:
+                arcs[key] = [key[i] for i in douglas_peucker(np.array(key), tolerance)]
+            simplified = arcs[key] if key == arc else arcs[key][::-1]
+            out.extend(simplified[:-1])
+        return out
+
+    def _build(self, tolerance):
+        arcs = {}
+        features = []
+        for name, polygons in zip(self.names, self.shapes):
+            coordinates = []
+            for rings in polygons:
+                simplified = []
+                for position, ring in enumerate(rings):
+                    points = self._simplify_ring(ring, tolerance, arcs) if tolerance > 0 else ring
+                    if len(set(points)) < 3:
+                        if position == 0:
+                            break  # the whole polygon is below the tolerance (a small island)
+                        continue  # so is this hole
+                    if tolerance > 0:
+                        points = [(round(x, PRECISION), round(y, PRECISION)) for x, y in points]
+                    simplified.append([list(point) for point in points + points[:1]])
+                if simplified:
+                    coordinates.append(simplified)
+            if not coordinates:
+                # never lose a state: keep its first polygon as it is
+                coordinates = [[[list(point) for point in ring + ring[:1]] for ring in polygons[0]]]
+            features.append({
+                "type": "Feature",
+                "properties": {"ST_NM": name},
+                "geometry": {"type": "MultiPolygon", "coordinates": coordinates},
+            })
+        return {"type": "FeatureCollection", "features": features}
+
+    def get(self, resolution="medium"):
+        return self.resolutions[resolution]
+
+    def for_viewport(self, width_px=MAP_WIDTH_PX, span=INDIA_SPAN):
+        """The coarsest resolution whose tolerance stays under one pixel of the viewport."""
+        pixel = span / max(width_px, 1)
+        tolerance, name = max(((t, n) for n, t in self.tolerances.items() if t <= pixel),
+                              default=min((t, n) for n, t in self.tolerances.items()))
+        return self.resolutions[name]
+
+    def sizes(self):
+        """Points and serialized bytes of every resolution."""
+        sizes = {}
+        for name, geojson in self.resolutions.items():
+            points = sum(len(ring) for feature in geojson["features"]
+                         for polygon in feature["geometry"]["coordinates"] for ring in polygon)
+            sizes[name] = (points, len(json.dumps(geojson, separators=(",", ":"))))
+        return sizes
+
+
+if __name__ == "__main__":
+    import time
+    started = time.perf_counter()
+    service = GeometryService.from_file()
+    print(f"✅ Built {len(service.resolutions)} resolutions of {len(service.names)} states "
+          f"in {time.perf_counter() - started:.2f}s")
+    for name, (points, size) in service.sizes().items():
+        print(f"{name:>7}: {points:>7} points {size / 1024:>8.0f} KiB")
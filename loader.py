@@ -0,0 +1,216 @@
+# loader.py
+# Bulk loading of the clean tables into MySQL.
+#
+# Replaces push_data_into_mysql from cloning.ipynb, which sent one INSERT per
+# DataFrame row. Rows are converted to python values column-wise by pandas /
+# numpy and sent either with chunked executemany (mysql.connector turns that
+# into multi-row INSERTs) or with LOAD DATA LOCAL INFILE from a temporary csv.
+# Independent tables are loaded in parallel, one pooled connection per table.
+#
+# Refreshes only touch the (State, Year, Quarter) partitions that changed:
+# their rows are deleted and re-inserted (or upserted on the table's natural
+# key) inside one transaction per table, so the dashboard keeps seeing the old
+# rows until the new ones are committed instead of staring at empty tables.
+# The rollup tables built from a table are refreshed in that same transaction.
+# Each table is atomic on its own, not the load as a whole: once the tables
+# are committed, the data version the dashboard's result cache is keyed on is
+# bumped once, in a transaction of its own (the tables would otherwise queue
+# on the lock of its single row).
+
+import os
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from config import get_connection
+from schema import TABLES, NATURAL_KEYS
+from rollup import refresh_rollups
+from cache import bump_data_version
+
+CLEAN_DIR = "clean_data"
+
+CHUNK_ROWS = 5000
+
+
+def quote(name):
+    return f"`{name}`"
+
+
+def insert_sql(table, columns):
+    placeholders = ', '.join(['%s'] * len(columns))
+    return f"INSERT INTO {quote(table)} ({', '.join(map(quote, columns))}) VALUES ({placeholders})"
+
+
+def upsert_sql(table, columns):
+    keys = set(NATURAL_KEYS[table])
+    updates = ', '.join(f"{quote(c)} = VALUES({quote(c)})" for c in columns if c not in keys)
+    return f"{insert_sql(table, columns)} ON DUPLICATE KEY UPDATE {updates}"
+
+
+def to_rows(df):
+    """All rows of ``df`` as lists of python values (NaN -> None), built column-wise."""
+    values = df.astype(object).to_numpy()
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def load_executemany(conn, table, df, upsert=False, chunk_rows=CHUNK_ROWS):
+    query = (upsert_sql if upsert else insert_sql)(table, list(df.columns))
+    cursor = conn.cursor()
+    for start in range(0, len(df), chunk_rows):
+        cursor.executemany(query, to_rows(df.iloc[start:start + chunk_rows]))
+    cursor.close()
+
+
+def load_infile(conn, table, df, upsert=False):
+    """LOAD DATA LOCAL INFILE (needs local_infile enabled on the server).
+
+    With ``upsert`` rows colliding on a unique key replace the existing ones.
+    """
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        df.to_csv(path, index=False, header=False, na_rep="\\N", lineterminator="\n")
+        cursor = conn.cursor()
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s {'REPLACE ' if upsert else ''}INTO TABLE {quote(table)} "
+            "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(map(quote, df.columns))})",
+            (path,),
+        )
+        cursor.close()
+    finally:
+        os.remove(path)
+
+
+METHODS = {"executemany": load_executemany, "infile": load_infile}
+
+
+def partition_rows(df, partitions):
+    """Rows of ``df`` that belong to the given (State, Year, Quarter) partitions."""
+    keys = pd.MultiIndex.from_arrays([df['State'].astype(object), df['Year'].astype(int), df['Quarter'].astype(int)])
+    return df[keys.isin(list(partitions))]
+
+
+def delete_partitions(cursor, table, partitions):
+    """DELETE the rows of the given partitions, one statement per (Year, Quarter)."""
+    states_by_period = {}
+    for state, year, quarter in partitions:
+        states_by_period.setdefault((int(year), int(quarter)), set()).add(state)
+    for (year, quarter), states in sorted(states_by_period.items()):
+        placeholders = ', '.join(['%s'] * len(states))
+        cursor.execute(
+            f"DELETE FROM {quote(table)} WHERE Year = %s AND Quarter = %s AND State IN ({placeholders})",
+            (year, quarter, *sorted(states)),
+        )
+
+
+def load_table(table, df, method="executemany", partitions=None, upsert=False):
+    """Load one table on its own connection, in one transaction. Returns seconds taken.
+
+    The data version is not bumped; load_tables does that once per load.
+
+    With ``partitions=None`` the whole table is replaced. Otherwise only the
+    given (State, Year, Quarter) partitions are refreshed: deleted and
+    re-inserted, or with ``upsert`` written with ON DUPLICATE KEY UPDATE
+    (which keeps rows that vanished from a partition).
+    """
+    started = time.perf_counter()
+    conn = get_connection(allow_local_infile=(method == "infile"))
+    try:
+        cursor = conn.cursor()
+        if partitions is None:
+            # DELETE (not TRUNCATE) so the old rows come back if the load fails
+            cursor.execute(f"DELETE FROM {quote(table)}")
+        else:
+            df = partition_rows(df, partitions)
+            if not upsert:
+                delete_partitions(cursor, table, partitions)
+        cursor.close()
+        if len(df):
+            METHODS[method](conn, table, df, upsert and partitions is not None)
+        cursor = conn.cursor()
+        refresh_rollups(cursor, table, partitions)
+        cursor.close()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return time.perf_counter() - started
+
+
+def load_tables(frames, method="executemany", workers=4, partitions=None, upsert=False):
+    """Load a dict of table name -> DataFrame, ``workers`` tables at a time.
+
+    ``partitions`` maps table name -> set of changed (State, Year, Quarter);
+    tables with an empty set are skipped. None replaces every table fully.
+    The data version is bumped once if any table committed; the first
+    table error is raised after that.
+    """
+    if partitions is not None:
+        frames = {name: df for name, df in frames.items() if partitions.get(name)}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(load_table, name, df, method,
+                                     None if partitions is None else partitions[name], upsert)
+                   for name, df in frames.items()}
+        seconds, errors = {}, []
+        for name, future in futures.items():
+            try:
+                seconds[name] = future.result()
+            except Exception as e:
+                errors.append(e)
+    # bump even when some tables failed: the ones that committed changed the data
+    if seconds:
+        bump_version()
+    if errors:
+        raise errors[0]
+    return seconds
+
+
+def bump_version():
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        bump_data_version(cursor)
+        cursor.close()
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def read_clean_tables(tables=TABLES, clean_dir=CLEAN_DIR):
+    return {table: pd.read_csv(os.path.join(clean_dir, f"{table}_df.csv")) for table in tables}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load the clean csv files into MySQL")
+    parser.add_argument("--dir", default=CLEAN_DIR, help="folder holding <table>_df.csv files")
+    parser.add_argument("--method", choices=sorted(METHODS), default="executemany")
+    parser.add_argument("--workers", type=int, default=4, help="tables loaded in parallel")
+    parser.add_argument("--upsert", action="store_true",
+                        help="with --year/--quarter: INSERT ... ON DUPLICATE KEY UPDATE instead of delete + insert")
+    parser.add_argument("--year", type=int, help="only refresh this year")
+    parser.add_argument("--quarter", type=int, help="only refresh this quarter (with --year)")
+    parser.add_argument("tables", nargs="*", help="tables to load (default: all)")
+    args = parser.parse_args()
+
+    frames = read_clean_tables(args.tables or TABLES, args.dir)
+    partitions = None
+    if args.year is not None:
+        partitions = {
+            name: {(state, year, quarter)
+                   for state, year, quarter in df[['State', 'Year', 'Quarter']].drop_duplicates().itertuples(index=False)
+                   if year == args.year and (args.quarter is None or quarter == args.quarter)}
+            for name, df in frames.items()
+        }
+    for name, seconds in load_tables(frames, args.method, args.workers, partitions, args.upsert).items():
+        print(f"✅ {name}: {len(frames[name])} rows in {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
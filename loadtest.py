@@ -0,0 +1,395 @@
+# loadtest.py
+# Concurrent-session load test of the dashboard, headless.
+#
+# Each simulated analyst is a Streamlit AppTest session of main.py running in
+# its own thread, so the sessions share the process-wide connection pool,
+# query / figure caches and fetch threads exactly like the sessions of one
+# `streamlit run` server. A session opens a page and then clicks at random
+# through the widgets drawn on screen (pages of the sidebar menu, analysis
+# and method radios, year / quarter / state selectboxes), waiting a random
+# think time between clicks. Every click is a full script rerun; its latency
+# is recorded per interaction ("radio agg_method", "selectbox map_user_year").
+#
+# At the end it prints p50 / p95 / p99 per interaction, the connection-pool
+# counters (peak connections in use, connections opened, waits for a free one)
+# and the resident memory of the process, and can save them as JSON.
+#
+#   python loadtest.py --sessions 20 --clicks 15             against the MySQL of config.py
+#   python loadtest.py --sessions 20 --standin               against an embedded sqlite copy of clean_data
+#
+# AppTest cannot click custom components, so the sidebar option_menu is
+# replaced by one that returns the page the session chose (see choose_page).
+
+import os
+import sys
+import json
+import logging
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+# keep the load test's timings out of the dashboard's own logs
+os.environ.setdefault("PHONEPE_PERF_LOG", "logs/loadtest_perf.jsonl")
+os.environ.setdefault("PHONEPE_SLOW_LOG", "logs/loadtest_slow_queries.jsonl")
+
+import streamlit as st
+import streamlit_option_menu
+from streamlit.testing.v1 import AppTest
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from mysql.connector.constants import FieldType
+
+import config
+import perf
+import rollup
+import schema
+from cache import VERSION_TABLE
+
+APP = "main.py"
+CLEAN_DIR = "clean_data"
+
+# pages a session visits, with weights (PERF is left out on purpose)
+PAGES = {"DATA EXPLORATION": 6, "TOP CHARTS": 2, "HOME": 1}
+PAGE_KEY = "loadtest_page"
+
+PERCENTILES = (50, 95, 99)
+
+
+# ---- embedded stand-in for MySQL
+
+class StandInCursor:
+    """The part of a mysql.connector cursor the dashboard uses, over sqlite3.
+
+    ``raw`` rows hold bytes and the description carries MySQL field types
+    (from the first non-NULL value of each column), as columnar.fetch_frame expects.
+    """
+
+    def __init__(self, conn, raw=False, dictionary=False):
+        self._cursor = conn.cursor()
+        self.raw = raw
+        self.dictionary = dictionary
+        self.description = None
+        self._rows = []
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace("%s", "?"), tuple(params or ()))
+        self._rows = self._cursor.fetchall() if self._cursor.description else []
+        self.description = None
+        if self._cursor.description:
+            names = [column[0] for column in self._cursor.description]
+            self.description = [(name, self._field_type(i)) + (None,) * 5 for i, name in enumerate(names)]
+
+    def _field_type(self, i):
+        value = next((row[i] for row in self._rows if row[i] is not None), None)
+        if isinstance(value, int):
+            return FieldType.LONGLONG
+        if isinstance(value, float):
+            return FieldType.DOUBLE
+        return FieldType.VAR_STRING
+
+    def _convert(self, rows):
+        if self.raw:
+            return [tuple(None if v is None else (v if isinstance(v, bytes) else str(v).encode("utf-8")) for v in row)
+                    for row in rows]
+        if self.dictionary:
+            names = [column[0] for column in self.description]
+            return [dict(zip(names, row)) for row in rows]
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return self._convert(rows)
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return self._convert(rows)
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    """A read-only sqlite3 connection with the mysql.connector methods the pool and cache call."""
+
+    in_transaction = False
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.create_function("FLOOR", 1, lambda x: None if x is None else int(x // 1), deterministic=True)
+
+    def cursor(self, raw=False, dictionary=False, **kwargs):
+        return StandInCursor(self._conn, raw, dictionary)
+
+    def is_connected(self):
+        return True
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def build_standin(path, clean_dir=CLEAN_DIR):
+    """Write the fact tables of ``clean_dir``, their rollups and the data version to a sqlite file."""
+    conn = StandInConnection(path)
+    db = conn._conn
+    for table in schema.TABLES:
+        df = pd.read_csv(os.path.join(clean_dir, f"{table}_df.csv"))
+        df.to_sql(table, db, index=False, if_exists="replace")
+        keys = [column for column in ("State", "Year", "Quarter") if column in df.columns]
+        if keys:
+            db.execute(f"CREATE INDEX `{table}_partition` ON `{table}` ({', '.join(f'`{c}`' for c in keys)})")
+    cursor = conn.cursor()
+    for name, (_, group_by, measures) in schema.ROLLUPS.items():
+        db.execute(f"CREATE TABLE `{name}` ({', '.join(f'`{c}`' for c in group_by + measures)})")
+    for table in schema.TABLES:
+        rollup.refresh_rollups(cursor, table)
+    db.execute(f"CREATE TABLE `{VERSION_TABLE}` (`id` INTEGER PRIMARY KEY, `version` INTEGER NOT NULL)")
+    db.execute(f"INSERT INTO `{VERSION_TABLE}` VALUES (1, 1)")
+    conn.commit()
+    conn.close()
+
+
+def use_standin(path):
+    # the pool opens its connections through config.connect
+    config.connect = lambda **kwargs: StandInConnection(path)
+
+
+# ---- sessions
+
+def choose_page(menu_title, options, *args, **kwargs):
+    # stands in for streamlit_option_menu.option_menu: the page the session picked
+    page = st.session_state.get(PAGE_KEY)
+    return page if page in options else options[0]
+
+
+def share_runtime():
+    # AppTest installs a mock Runtime for one run and removes it when the run
+    # ends, under the feet of the other sessions' runs: give them a shared one
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or shared)
+    Runtime.exists = classmethod(lambda cls: True)
+    # session threads read st.session_state outside a script run on purpose
+    logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").addFilter(
+        lambda record: "missing ScriptRunContext" not in record.getMessage())
+
+
+def rss_mb():
+    """Resident memory of this process in MB (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # interaction -> seconds
+        self.errors = defaultdict(int)
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def add(self, interaction, seconds, exceptions):
+        with self._lock:
+            self.latencies[interaction].append(seconds)
+            if exceptions:
+                self.errors[interaction] += 1
+                self.messages.append(f"{interaction}: {exceptions[0]}")
+
+    def summary(self):
+        rows = []
+        for interaction, seconds in sorted(self.latencies.items()):
+            ms = np.array(seconds) * 1000
+            p50, p95, p99 = np.percentile(ms, PERCENTILES)
+            rows.append({"interaction": interaction, "count": len(ms), "errors": self.errors[interaction],
+                         "mean_ms": float(ms.mean()), "p50_ms": float(p50), "p95_ms": float(p95),
+                         "p99_ms": float(p99), "max_ms": float(ms.max())})
+        return rows
+
+
+class Monitor(threading.Thread):
+    """Samples the connection pools and the process memory while the sessions run."""
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_in_use = 0
+        self.start_rss = self.peak_rss = rss_mb()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        self.peak_in_use = max(self.peak_in_use, sum(pool["in_use"] for pool in config.pool_stats()))
+        self.peak_rss = max(self.peak_rss, rss_mb())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.sample()
+
+
+def clickable(at):
+    """(interaction, widget, value) for every choice on screen other than the current one."""
+    choices = []
+    for kind, widgets in (("radio", at.radio), ("selectbox", at.selectbox)):
+        for widget in widgets:
+            if widget.key is None:
+                continue
+            for option in widget.options:
+                if option != widget.format_func(widget.value):
+                    choices.append((f"{kind} {widget.key}", widget, option))
+    return choices
+
+
+def session(number, args, results):
+    rng = random.Random(args.seed * 1000 + number)
+    time.sleep(rng.uniform(0, args.ramp_up))
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    pages, weights = list(PAGES), list(PAGES.values())
+
+    def run(interaction, click=None):
+        started = time.perf_counter()
+        try:
+            if click is None:
+                at.run()
+            else:
+                click()
+            exceptions = [e.value for e in at.exception]
+        except Exception as e:  # a timeout or a crash of the runner itself
+            exceptions = [repr(e)]
+        results.add(interaction, time.perf_counter() - started, exceptions)
+
+    at.session_state[PAGE_KEY] = rng.choices(pages, weights)[0]
+    run(f"open {at.session_state[PAGE_KEY]}")
+    for _ in range(args.clicks):
+        time.sleep(rng.uniform(args.think_min, args.think_max))
+        page = at.session_state[PAGE_KEY]
+        choices = clickable(at)
+        if not choices or rng.random() < args.page_switch:
+            page = rng.choices([p for p in pages if p != page], [PAGES[p] for p in pages if p != page])[0]
+            at.session_state[PAGE_KEY] = page
+            run(f"page {page}")
+        else:
+            interaction, widget, option = rng.choice(choices)
+            run(interaction, lambda: widget.set_value(option).run())
+
+
+def load_test(args):
+    streamlit_option_menu.option_menu = choose_page
+    share_runtime()
+    perf.recorder().clear()
+    results = Results()
+    monitor = Monitor()
+    monitor.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i, args, results), name=f"session-{i}")
+               for i in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    monitor.stop()
+
+    pools = config.pool_stats()
+    sql = [row for row in perf.recorder().summary() if row["stage"] == "sql"]
+    return {
+        "sessions": args.sessions, "clicks": args.clicks, "seconds": elapsed,
+        "interactions": results.summary(), "errors": results.messages[:20],
+        "db": {"pool_size": config.DB_POOL_SIZE, "peak_in_use": monitor.peak_in_use,
+               "opened": sum(pool["created"] for pool in pools),
+               "checkouts": sum(pool["checkouts"] for pool in pools),
+               "waits": sum(pool["waits"] for pool in pools),
+               "wait_seconds": sum(pool["wait_time"] for pool in pools)},
+        "sql": sql,
+        "memory_mb": {"start": monitor.start_rss, "peak": monitor.peak_rss, "end": rss_mb()},
+    }
+
+
+def print_report(report):
+    print(f"{'interaction':<36} {'count':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for row in report["interactions"]:
+        print(f"{row['interaction']:<36} {row['count']:>6} {row['errors']:>4} {row['p50_ms']:>9.0f} "
+              f"{row['p95_ms']:>9.0f} {row['p99_ms']:>9.0f} {row['max_ms']:>9.0f}")
+    for message in report["errors"]:
+        print(f"⚠️ {message}")
+    db = report["db"]
+    print(f"🔌 connections: pool size {db['pool_size']}, peak in use {db['peak_in_use']}, opened {db['opened']}, "
+          f"{db['checkouts']} checkouts, {db['waits']} waits ({db['wait_seconds']:.2f}s waiting)")
+    if report["sql"]:
+        queries = sum(row["count"] for row in report["sql"])
+        worst = max(row["p95_ms"] for row in report["sql"])
+        print(f"🗄️ {queries} fetches, worst p95 per view {worst:.0f} ms")
+    memory = report["memory_mb"]
+    print(f"🧠 memory: {memory['start']:.0f} MB at start, peak {memory['peak']:.0f} MB, {memory['end']:.0f} MB at end")
+    clicks = sum(row["count"] for row in report["interactions"])
+    print(f"✅ {report['sessions']} sessions, {clicks} interactions in {report['seconds']:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions")
+    parser.add_argument("--clicks", type=int, default=10, help="interactions per session after opening it")
+    parser.add_argument("--think-min", type=float, default=1.0, help="shortest pause between clicks (s)")
+    parser.add_argument("--think-max", type=float, default=5.0, help="longest pause between clicks (s)")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="sessions start spread over this many seconds")
+    parser.add_argument("--page-switch", type=float, default=0.15, help="chance that a click changes the page")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds a single rerun may take")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--standin", action="store_true", help="serve the queries from a sqlite copy of clean_data")
+    parser.add_argument("--clean-dir", default=CLEAN_DIR, help="clean tables for --standin")
+    parser.add_argument("--out", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    folder = None
+    if args.standin:
+        folder = tempfile.mkdtemp(prefix="phonepe_loadtest_")
+        path = os.path.join(folder, "standin.sqlite")
+        build_standin(path, args.clean_dir)
+        use_standin(path)
+        print(f"✅ Embedded stand-in built from {args.clean_dir} at {path}")
+
+    try:
+        report = load_test(args)
+    finally:
+        if folder:
+            config.get_pool().close()
+            shutil.rmtree(folder, ignore_errors=True)
+    report["standin"] = args.standin
+    print_report(report)
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"✅ Report written to {args.out}")
+    sys.exit(1 if any(row["errors"] for row in report["interactions"]) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,129 @@
 
 import streamlit as st
-import json
-import plotly.express as px
+import threading
+import time
+from functools import partial
 import config
 from streamlit_option_menu import option_menu
 import mysql.connector as con
 import pandas as pd
 from config import get_connection
-
-def fetch_data(query):
+from geometry import GeometryService
+from cache import QueryCache, FigureCache, data_version, fetch, fetch_many
+import queries
+import charts
+import perf
+
+# results shared by every session, keyed on the data version the loader bumps
+@st.cache_resource
+def query_cache():
+    return QueryCache()
+
+# hits of this run's data version are answered from memory, without a pooled connection
+def fetch_data(query, params=None):
+    return fetch(query_cache(), query, params, DATA_VERSION)
+
+# several independent queries at once, each on its own pooled connection
+def fetch_data_many(*requests):
+    return fetch_many(query_cache(), requests, DATA_VERSION)
+
+# India GeoJSON with ST_NM already renamed to the State names used in the tables,
+# parsed and simplified once per process (see geometry.py)
+@st.cache_resource
+def geometry_service():
+    return GeometryService.from_file("clean_data/india_states.geojson")
+
+# built figures shared by every session, keyed on view, chart, filters and data version
+@st.cache_resource
+def figure_cache():
+    return FigureCache()
+
+class WarmUps:
+    """Data versions whose warm-up was started; shared by every session of the process."""
+
+    def __init__(self):
+        self.versions = set()
+        self.lock = threading.Lock()
+
+    def claim(self, version):
+        # True for exactly one caller per version, even when sessions start together
+        with self.lock:
+            if version in self.versions:
+                return False
+            self.versions.add(version)
+            return True
+
+@st.cache_resource
+def warm_ups():
+    return WarmUps()
+
+def chart_sources(version):
+    # the cache object itself, not query_cache(), so the warm-up thread can use it too
+    return charts.Sources(partial(fetch, query_cache(), version=version),
+                          partial(fetch_many, query_cache(), version=version), geometry_service())
+
+def current_data_version():
     conn = get_connection()
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
+    try:
+        return data_version(conn)
+    finally:
+        conn.close()
+
+def warm_up_after_load(version):
+    # first run after a load: pre-build the common slices in the background
+    if warm_ups().claim(version):
+        threading.Thread(target=charts.warm_up, args=(figure_cache(), chart_sources(version), version), daemon=True).start()
+
+# a view's figures for [(chart, filters), ...]; the queries of the uncached ones run concurrently
+def view_figures(view, *selections):
+    return charts.figures(figure_cache(), chart_sources(DATA_VERSION), DATA_VERSION, view, selections)
+
+def plot(fig):
+    with perf.timer("render"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_chart(view, chart, **filters):
+    plot(view_figures(view, (chart, filters))[0])
+
+def selectbox(label, options, key):
+    # a kept selection that is no longer an option (another dataset, new data) falls back to the first one
+    options = list(options)
+    if key in st.session_state and st.session_state[key] not in options:
+        del st.session_state[key]
+    return st.selectbox(label, options, key=key)
+
+# keyed widgets of the DATA EXPLORATION views, kept while their view or page is hidden
+VIEW_WIDGET_KEYS = [
+    "view", "agg_method", "agg_insurance_year", "agg_insurance_quarter", "agg_trans", "agg_trans_year",
+    "agg_trans_year_2", "agg_trans_quarter_2", "agg_user_year", "agg_user_quarter",
+    "map_method", "map_insurance_metric", "map_user_year", "map_user_quarter",
+    "district_map_table", "district_map_year", "district_map_quarter", "district_map_state", "district_map_zoom",
+    "top_method", "top_insurance_year", "top_insurance_quarter", "top_txn_year", "top_txn_quarter",
+    "top_user_year", "top_user_quarter",
+]
 
 st.set_page_config(page_title="PhonePe Pulse Dashboard", layout="wide")
 
 st.title("📊 PhonePe Pulse Data Dashboard")
 
+# timings of this run go under the page (or analysis, below) being drawn; see perf.py
+run_started = time.perf_counter()
+pages = ["HOME","DATA EXPLORATION","TOP CHARTS"]
+if perf.PERF_PAGE or st.query_params.get("perf") == "1":
+    pages.append("PERF")
+
 with st.sidebar:
-    select = option_menu("Main Menu",["HOME","DATA EXPLORATION","TOP CHARTS"])
+    select = option_menu("Main Menu",pages)
+# Streamlit drops the state of widgets that were not drawn in a run, so the
+# selections of the hidden views and pages are re-assigned to survive a switch
+# (selectbox() drops those that stopped being valid options).
+for key in VIEW_WIDGET_KEYS:
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
+perf.set_view(select)
+if select in ("DATA EXPLORATION", "TOP CHARTS"):
+    DATA_VERSION = current_data_version()
+    warm_up_after_load(DATA_VERSION)
 if select == "HOME":
     st.header("📂 Download Cleaned Datasets & Insights Report")
 
@@ -58,172 +162,88 @@ if select == "HOME":
         st.warning("Insights report not found! Please ensure `insights_report.pdf` is in your project folder.")
 
 elif select =="DATA EXPLORATION":
-    tab1,tab2,tab3=st.tabs(["Aggregated Analysis","Map Analysis","Top Analysis"])
-    with tab1:
-        method=st.radio("Select The Method ",["Insurance Analysis","Transaction Analysis","User Analysis"])
+    # only the selected analysis runs (st.tabs executed all three bodies on every rerun)
+    view = st.radio("Select Analysis", ["Aggregated Analysis","Map Analysis","Top Analysis"], horizontal=True, key="view")
+    if view == "Aggregated Analysis":
+        method=st.radio("Select The Method ",["Insurance Analysis","Transaction Analysis","User Analysis"],key="agg_method")
+        perf.set_view(f"{view} / {method}")
         if method == "Insurance Analysis":
             st.subheader("📈 Aggregated Insurance Analysis")
 
-# Fetch data from database
-            query = """
-SELECT State, Year, Quarter, SUM(Transaction_Count) AS Total_Policies, SUM(Transaction_Amount) AS Total_Amount
-FROM aggregateinsurance
-GROUP BY State, Year, Quarter;
-"""
-            df = fetch_data(query)
-
 # Dropdown filters
-            year = st.selectbox("Select Year", sorted(df["Year"].unique()))
-            quarter = st.selectbox("Select Quarter", sorted(df["Quarter"].unique()))
-
-# Filtered Data
-            filtered_df = df[(df["Year"] == year) & (df["Quarter"] == quarter)]
+            periods = fetch_data(*queries.periods("aggregateinsurance_by_state_year_quarter"))
+            year = selectbox("Select Year", sorted(periods["Year"].unique()), key="agg_insurance_year")
+            quarter = selectbox("Select Quarter", sorted(periods["Quarter"].unique()), key="agg_insurance_quarter")
+            fig1, fig2, fig3, fig4 = view_figures(
+                "agg_insurance",
+                ("amount_by_state", dict(year=year, quarter=quarter)),
+                ("policies_by_state", dict(year=year, quarter=quarter)),
+                ("yearly", {}),
+                ("quarterly", dict(year=year)),
+            )
 
 # ----------------------
 # 📊 1️⃣ State-wise Total Insurance Amount
 # ----------------------
             st.markdown("### 💰 Total Insurance Amount across States")
-            fig1 = px.bar(
-            filtered_df.sort_values(by="Total_Amount", ascending=False),
-            x="State",
-            y="Total_Amount",
-            color="Total_Amount",
-            color_continuous_scale="Blues",
-            title=f"Total Insurance Amount by State ({year} Q{quarter})"
-)
-            st.plotly_chart(fig1, use_container_width=True)
+            plot(fig1)
 
 # ----------------------
 # 📊 2️⃣ State-wise Total Insurance Policies
 # ----------------------
             st.markdown("### 🧾 Total Insurance Policies across States")
-            fig2 = px.bar(
-            filtered_df.sort_values(by="Total_Policies", ascending=False),
-            x="State",
-            y="Total_Policies",
-            color="Total_Policies",
-            color_continuous_scale="Viridis",
-            title=f"Total Insurance Policies by State ({year} Q{quarter})"
-)
-            st.plotly_chart(fig2, use_container_width=True)
+            plot(fig2)
 
 # ----------------------
 # 📊 3️⃣ Yearly Trend (Total Amount)
 # ----------------------
             st.markdown("### 📅 Yearly Insurance Amount Trend")
-            yearly_df = df.groupby("Year")[["Total_Amount"]].sum().reset_index()
-
-            fig3 = px.line(
-            yearly_df,
-            x="Year",
-            y="Total_Amount",
-            markers=True,
-            title="Yearly Growth of Insurance Amount"
-)
-            st.plotly_chart(fig3, use_container_width=True)
+            plot(fig3)
 
 # ----------------------
 # 📊 4️⃣ Quarterly Trend (for Selected Year)
 # ----------------------
             st.markdown(f"### 📆 Quarterly Insurance Amount Trend ({year})")
-            quarterly_df = df[df["Year"] == year].groupby("Quarter")[["Total_Amount"]].sum().reset_index()
-
-            fig4 = px.bar(
-            quarterly_df,
-            x="Quarter",
-            y="Total_Amount",
-            text_auto=".2s",
-            color="Total_Amount",
-            color_continuous_scale="Magma",
-            title=f"Quarterly Insurance Amount Distribution in {year}"
-)
-            st.plotly_chart(fig4, use_container_width=True)
-
-
-
-
-
+            plot(fig4)
 
-            
         elif method =="Transaction Analysis":
             st.subheader("📈 Aggregated Transaction Analysis")
-            query = "SELECT * FROM aggregatedtransaction;"
-            df = fetch_data(query)
-            state_select = st.selectbox("Select State", df['State'].unique(),key="agg_trans")
-            year_select = st.selectbox("Select Year", sorted(df['Year'].unique()),key="agg_trans_year")
-            filtered = df[(df['State'] == state_select) & (df['Year'] == year_select)]
-            fig = px.bar(filtered, x='Quarter', y='Transaction_Amount', color='Transaction_Type',
-                title=f"{state_select} - {year_select} Transaction Analysis",
-                template='plotly_dark')
-            st.plotly_chart(fig, use_container_width=True)
+            periods, state_names = fetch_data_many(queries.periods("aggregatedtransaction_by_state_year_quarter"),
+                                                   queries.states("aggregatedtransaction_by_state"))
+            state_select = selectbox("Select State", state_names['State'], key="agg_trans")
+            year_select = selectbox("Select Year", sorted(periods['Year'].unique()), key="agg_trans_year")
+            # filled below, once the filters of the other figures are known
+            types_chart = st.container()
 
             #adding two more figures
-            query = """
-SELECT State, Year, Quarter, Transaction_Type,
-       SUM(Transaction_Count) AS Total_Transactions,
-       SUM(Transaction_Amount) AS Transaction_Amount
-FROM aggregatedtransaction
-GROUP BY State, Year, Quarter, Transaction_Type;
-"""
-            year = st.selectbox("Select Year", sorted(df["Year"].unique()), key="agg_trans_year_2")
-            quarter = st.selectbox("Select Quarter", sorted(df["Quarter"].unique()), key="agg_trans_quarter_2")
-
-            filtered_df = df[(df["Year"] == year) & (df["Quarter"] == quarter)]
+            year = selectbox("Select Year", sorted(periods["Year"].unique()), key="agg_trans_year_2")
+            quarter = selectbox("Select Quarter", sorted(periods["Quarter"].unique()), key="agg_trans_quarter_2")
+            fig0, fig1, fig2, fig3, fig4 = view_figures(
+                "agg_transaction",
+                ("types", dict(state=state_select, year=year_select)),
+                ("amount_by_state", dict(year=year, quarter=quarter)),
+                ("count_by_state", dict(year=year, quarter=quarter)),
+                ("yearly", {}),
+                ("quarterly", dict(year=year)),
+            )
+            with types_chart:
+                plot(fig0)
 
 # --------------------------
 # 1️⃣ State-wise Transaction Amount
 # --------------------------
             st.markdown("### 💰 Transaction Amount across States")
-            fig1 = px.bar(
-            filtered_df.sort_values(by="Transaction_Amount", ascending=False),
-    x="State",
-    y="Transaction_Amount",
-    color="Transaction_Amount",
-    color_continuous_scale="Blues",
-    title=f"Total Transaction Amount by State ({year} Q{quarter})"
-)
-            st.plotly_chart(fig1, use_container_width=True)
+            plot(fig1)
             #total trans count
             st.markdown("### 🧾 Transaction Count across States")
-            fig2 = px.bar(
-            filtered_df.sort_values(by="Transaction_Count", ascending=False),
-    x="State",
-    y="Transaction_Count",
-    color="Transaction_Count",
-    color_continuous_scale="Viridis",
-    title=f"Total Transactions by State ({year} Q{quarter})"
-)
-            st.plotly_chart(fig2, use_container_width=True)
+            plot(fig2)
             st.markdown("### 📅 Yearly Transaction Amount Trend")
-            yearly_df = df.groupby("Year")[["Transaction_Amount"]].sum().reset_index()
-
-            fig3 = px.line(
-    yearly_df,
-    x="Year",
-    y="Transaction_Amount",
-    markers=True,
-    title="Yearly Growth of Transaction Amount"
-)
-            st.plotly_chart(fig3, use_container_width=True)
+            plot(fig3)
             # 4️⃣ Quarterly Trend - Selected Year
 # --------------------------
             st.markdown(f"### 📆 Quarterly Transaction Trend ({year})")
-            quarterly_df = df[df["Year"] == year].groupby("Quarter")[["Transaction_Amount"]].sum().reset_index()
-
-            fig4 = px.bar(
-    quarterly_df,
-    x="Quarter",
-    y="Transaction_Amount",
-    text_auto=".2s",
-    color="Transaction_Amount",
-    color_continuous_scale="Magma",
-    title=f"Quarterly Transaction Amount Distribution in {year}"
-)
-            st.plotly_chart(fig4, use_container_width=True)
-
+            plot(fig4)
 
-
-            
         elif method =="User Analysis":
 
             st.subheader("👤 Aggregated User Analysis")
@@ -231,640 +251,250 @@ GROUP BY State, Year, Quarter, Transaction_Type;
     # --------------------------
     # 📦 Fetch Data
     # --------------------------
-            query = """
-    SELECT State, Year, Quarter, Brand, SUM(Transaction_count) AS Total_Transactions, 
-           AVG(Percentage) AS Avg_Percentage
-    FROM aggregateuser
-    GROUP BY State, Year, Quarter, Brand;
-    """
-            df = fetch_data(query)
+            periods = fetch_data(*queries.periods("aggregateuser_by_state_year_quarter"))
 
     # --------------------------
     # 🔹 Filters
     # --------------------------
-            year = st.selectbox("Select Year", sorted(df["Year"].unique()), key="agg_user_year")
-            quarter = st.selectbox("Select Quarter", sorted(df["Quarter"].unique()), key="agg_user_quarter")
-            filtered_df = df[(df["Year"] == year) & (df["Quarter"] == quarter)]
+            year = selectbox("Select Year", sorted(periods["Year"].unique()), key="agg_user_year")
+            quarter = selectbox("Select Quarter", sorted(periods["Quarter"].unique()), key="agg_user_quarter")
+            fig1, fig2, fig3 = view_figures(
+                "agg_user",
+                ("brands", dict(year=year, quarter=quarter)),
+                ("top_states", dict(year=year, quarter=quarter)),
+                ("yearly", {}),
+            )
 
     # --------------------------
     # 1️⃣ Brand-wise User Distribution
     # --------------------------
             st.markdown("### 📱 Brand-wise Distribution of Transactions")
-            brand_df = (
-            filtered_df.groupby("Brand")[["Total_Transactions"]]
-        .sum()
-        .reset_index()
-        .sort_values(by="Total_Transactions", ascending=False)
-    )
-
-            fig1 = px.pie(
-        brand_df,
-        values="Total_Transactions",
-        names="Brand",
-        title=f"Brand-wise Transaction Share ({year} Q{quarter})",
-        hole=0.5,
-        color_discrete_sequence=px.colors.sequential.Viridis
-    )
-            st.plotly_chart(fig1, use_container_width=True)
+            plot(fig1)
 
     # --------------------------
     # 2️⃣ Top 10 States by Transaction Count
     # --------------------------
             st.markdown("### 🏆 Top 10 States by Transaction Count")
-            state_df = (
-            filtered_df.groupby("State")[["Total_Transactions"]]
-        .sum()
-        .reset_index()
-        .sort_values(by="Total_Transactions", ascending=False)
-        .head(10)
-    )
-
-            fig2 = px.bar(
-        state_df,
-        x="State",
-        y="Total_Transactions",
-        color="Total_Transactions",
-        color_continuous_scale="Blues",
-        text_auto=".2s",
-        title=f"Top 10 States by Transactions ({year} Q{quarter})"
-    )
-            st.plotly_chart(fig2, use_container_width=True)
+            plot(fig2)
 
     # --------------------------
     # 3️⃣ Yearly Growth of User Transactions
     # --------------------------
             st.markdown("### 📈 Yearly Growth of Transactions")
-            yearly_df = df.groupby("Year")[["Total_Transactions"]].sum().reset_index()
-
-            fig3 = px.line(
-            yearly_df,
-            x="Year",
-            y="Total_Transactions",
-            markers=True,
-            title="Yearly Growth of User Transactions"
-    )
-            st.plotly_chart(fig3, use_container_width=True)
-           
+            plot(fig3)
 
-
-
-
-            
-    with tab2:
-        method_2= st.radio("Select The Method",["Map Insurance","Map Transaction","Map User"])
+    elif view == "Map Analysis":
+        method_2= st.radio("Select The Method",["Map Insurance","Map Transaction","Map User","District Map"],key="map_method")
+        perf.set_view(f"{view} / {method_2}")
         if method_2 =="Map Insurance":
             st.subheader("🗺️ Insurance Distribution Across States")
 
-# Fetch aggregated insurance data
-            query = "SELECT State, SUM(Transaction_Count) AS Total_Policies, SUM(Transaction_Amount) AS Total_Amount FROM mapinsurance GROUP BY State;"
-            df = fetch_data(query)
-
-# Load India GeoJSON file (from your local directory)
-            with open("clean_data/india_states.geojson", "r") as f:
-                india_states = json.load(f)
-
-# Fix state name mismatches if any
-            df['State'] = df['State'].replace({
-    "Andaman & Nicobar Islands": "Andaman & Nicobar Island",
-    "NCT of Delhi": "Delhi",
-    "Jammu & Kashmir": "Jammu and Kashmir",
-    "Orissa": "Odisha",
-})
-
 # Dropdown selector for user to choose what to visualize
-            metric = st.radio("Select Metric", ["Total Policies", "Total Amount"], horizontal=True)
-
-            if metric == "Total Policies":
-                color_col = "Total_Policies"
-                color_label = "Total Policies"
-            else:
-                color_col = "Total_Amount"
-                color_label = "Total Amount (₹)"
-
-# Create choropleth map
-            fig = px.choropleth(
-                df,
-                geojson=india_states,
-                featureidkey="properties.ST_NM",
-                locations="State",
-                color=color_col,
-                color_continuous_scale="Viridis",
-                title=f"Insurance {color_label} Distribution (State-wise)"
-                )
-
-# Focus map on India
-            fig.update_geos(fitbounds="locations", visible=False)
-
-# Beautify layout
-            fig.update_layout(
-                geo=dict(bgcolor="rgba(0,0,0,0)"),
-                coloraxis_colorbar=dict(title=color_label),
-                title_x=0.25
-)
-
-# Show map
-            st.plotly_chart(fig, use_container_width=True)
-
-
-
-
-
+            metric = st.radio("Select Metric", list(charts.MAP_INSURANCE_METRICS), horizontal=True, key="map_insurance_metric")
 
+# Choropleth of the state totals (state names already match the geojson)
+            show_chart("map_insurance", "choropleth", metric=metric)
 
-
-            
         elif method_2 =="Map Transaction":
             st.subheader("🗺️ Transaction Distribution Across States")
 
-# Fetch data from your SQL table
-            query = "SELECT State, SUM(Transaction_Amount) AS Total_Amount FROM maptransaction GROUP BY State;"
-            df = fetch_data(query)
-
-# Load the India GeoJSON file from local directory
-            with open("clean_data/india_states.geojson", "r") as f:
-                india_states = json.load(f)
-
-# 🧹 Optional: Standardize some common mismatched state names if necessary
-            df['State'] = df['State'].replace({
-    "Andaman & Nicobar Islands": "Andaman & Nicobar Island",
-    "NCT of Delhi": "Delhi",
-    "Jammu & Kashmir": "Jammu and Kashmir",
-    "Orissa": "Odisha",
-})
-
-# 🎨 Create the choropleth map
-            fig = px.choropleth(
-                df,
-                geojson=india_states,
-                featureidkey="properties.ST_NM",  # must match the key in geojson
-                locations="State",
-                color="Total_Amount",
-                color_continuous_scale="Viridis",
-                title="Transaction Amount Distribution (State-wise)",
-)
-
-# 🗺️ Adjust layout to focus only on India
-            fig.update_geos(fitbounds="locations", visible=False)
-
-# 🪄 Optional: Beautify layout
-            fig.update_layout(
-    geo=dict(bgcolor="rgba(0,0,0,0)"),
-    coloraxis_colorbar=dict(title="₹ Total Amount"),
-    title_x=0.25
-)
-
-# Show map
-            st.plotly_chart(fig, use_container_width=True)
-
-            
-
-            
-
-          
+# 🎨 Choropleth of the state totals
+            show_chart("map_transaction", "choropleth")
+
         elif method_2=="Map User":
-            df = pd.read_csv("clean_data/map_user_df.csv")
+            periods = fetch_data(*queries.periods("map_user_by_state_year_quarter"))
 
             st.write("### 🗺️ User Map Visualization")
 
-    # Load GeoJSON of India states
-            india_states = json.load(open("clean_data/india_states.geojson", "r"))
-
-    # Check your CSV columns (example: State, Year, Registered_Users)
-            st.dataframe(df.head())  # to verify column names once
-
     # Dropdowns to filter
-            year = st.selectbox("Select Year", sorted(df["Year"].unique()),key="map_user_year")
-            quarter = st.selectbox("Select Quarter", sorted(df["Quarter"].unique()),key="map_user_quarter")
-
-    # Filter data
-            df_year = df[(df["Year"] == year) & (df["Quarter"] == quarter)]
+            year = selectbox("Select Year", sorted(periods["Year"].unique()), key="map_user_year")
+            quarter = selectbox("Select Quarter", sorted(periods["Quarter"].unique()), key="map_user_quarter")
 
     # Choropleth map
-            fig = px.choropleth(
-                df,
-                geojson=india_states,
-                featureidkey="properties.ST_NM",
-                locations="State",
-                color="Registered_users",
-                hover_name="State",
-                color_continuous_scale="Viridis",
-                title=f"Registered Users across States ({year} Q{quarter})"
-                )
-
-            fig.update_geos(
-                fitbounds="locations",          # Fits map tightly around your state shapes
-                visible=False,                  # Hides world outline
-                projection_type="mercator",     # Accurate flat projection for India
-                center={"lat": 22, "lon": 78},  # Centers over India
-                lataxis_range=[6, 38],          # South to North bounds
-                lonaxis_range=[68, 98],         # West to East bounds
-                )
-            fig.update_layout(
-               title_text=f"Registered Users across States ({year} Q{quarter})",
-               geo=dict(bgcolor='rgba(0,0,0,0)'),  # Transparent background
-               margin={"r":0,"t":30,"l":0,"b":0},
-            )
-            st.plotly_chart(fig, use_container_width=True)
-            
+            show_chart("map_user", "choropleth", year=year, quarter=quarter)
+
+        elif method_2=="District Map":
+            st.write("### 📍 District Map")
+
+    # Dataset, quarter and drill-down filters
+            point_table = st.radio("Select Data", list(queries.POINT_VIEWS), horizontal=True, key="district_map_table")
+            periods, state_names = fetch_data_many(*queries.point_options(point_table))
+            year = selectbox("Select Year", sorted(periods["Year"].unique()), key="district_map_year")
+            quarter = selectbox("Select Quarter", sorted(periods["Quarter"].unique()), key="district_map_quarter")
+            state = selectbox("Select State", ["All India"] + list(state_names["State"]), key="district_map_state")
+            zoom = st.slider("Zoom", 4, 10, key="district_map_zoom")
+            state = None if state == "All India" else state
+
+    # Points binned by MySQL for this zoom level, drawn as a WebGL scatter
+            points = fetch_data(*queries.district_points(point_table, year, quarter, zoom, state))
+            if points.empty:
+                st.warning("No districts with coordinates for this selection.")
+            else:
+                show_chart("district_map", "points", table=point_table, year=year, quarter=quarter, zoom=zoom, state=state)
+                st.caption(f"{len(points)} markers for {int(points['Districts'].sum())} districts "
+                           "(districts closer than a marker are merged; zoom in to split them)")
 
-            
-            
-    with tab3:
-        method_3= st.radio("Select The Method",["Top Insurance","Top Transaction","Top User"])
+    elif view == "Top Analysis":
+        method_3= st.radio("Select The Method",["Top Insurance","Top Transaction","Top User"],key="top_method")
+        perf.set_view(f"{view} / {method_3}")
         if method_3 =="Top Insurance":
                 st.subheader("💼 Top Insurance Analysis")
 
     # ---------------------------------
     # 📦 Fetch Data
     # ---------------------------------
-                query = """
-    SELECT State, Year, Quarter, District, 
-           SUM(Transaction_count) AS Total_Transactions, 
-           SUM(Transaction_amount) AS Total_Amount,
-           Region
-    FROM topinsurance
-    GROUP BY State, Year, Quarter, District, Region;
-    """
-                df = fetch_data(query)
+                periods = fetch_data(*queries.periods("topinsurance_by_state_year_quarter"))
 
     # ---------------------------------
     # 🔹 Filters
     # ---------------------------------
-                year = st.selectbox("Select Year", sorted(df["Year"].unique()), key="top_insurance_year")
-                quarter = st.selectbox("Select Quarter", sorted(df["Quarter"].unique()), key="top_insurance_quarter")
-
-                filtered_df = df[(df["Year"] == year) & (df["Quarter"] == quarter)]
+                year = selectbox("Select Year", sorted(periods["Year"].unique()), key="top_insurance_year")
+                quarter = selectbox("Select Quarter", sorted(periods["Quarter"].unique()), key="top_insurance_quarter")
+                fig1, fig2, fig3 = view_figures(
+                    "top_topinsurance",
+                    ("states", dict(year=year, quarter=quarter)),
+                    ("districts", dict(year=year, quarter=quarter)),
+                    ("yearly", {}),
+                )
 
     # ---------------------------------
     # 1️⃣ Top 10 States by Insurance Transaction Amount
     # ---------------------------------
                 st.markdown("### 🏆 Top 10 States by Insurance Transaction Amount")
-
-                top_states = (
-        filtered_df.groupby("State")[["Total_Amount"]]
-        .sum()
-        .reset_index()
-        .sort_values(by="Total_Amount", ascending=False)
-        .head(10)
-    )
-
-                fig1 = px.bar(
-        top_states,
-        x="State",
-        y="Total_Amount",
-        color="Total_Amount",
-        color_continuous_scale="Viridis",
-        text_auto=".2s",
-        title=f"Top 10 States by Insurance Transaction Amount ({year} Q{quarter})"
-    )
-                st.plotly_chart(fig1, use_container_width=True)
+                plot(fig1)
 
     # ---------------------------------
     # 2️⃣ Top 10 Districts by Insurance Transaction Count
     # ---------------------------------
                 st.markdown("### 🏙️ Top 10 Districts by Insurance Transaction Count")
-
-                top_districts = (
-        filtered_df.groupby("District")[["Total_Transactions"]]
-        .sum()
-        .reset_index()
-        .sort_values(by="Total_Transactions", ascending=False)
-        .head(10)
-    )
-
-                fig2 = px.bar(
-        top_districts,
-        x="District",
-        y="Total_Transactions",
-        color="Total_Transactions",
-        color_continuous_scale="Blues",
-        text_auto=".2s",
-        title=f"Top 10 Districts by Insurance Transaction Count ({year} Q{quarter})"
-    )
-                st.plotly_chart(fig2, use_container_width=True)
+                plot(fig2)
 
     # ---------------------------------
     # 3️⃣ Yearly Growth in Insurance Transactions
     # ---------------------------------
                 st.markdown("### 📈 Yearly Growth of Insurance Transactions")
+                plot(fig3)
 
-                yearly_trend = (
-        df.groupby("Year")[["Total_Amount", "Total_Transactions"]]
-        .sum()
-        .reset_index()
-    )
-
-                fig3 = px.line(
-        yearly_trend,
-        x="Year",
-        y="Total_Amount",
-        markers=True,
-        title="Yearly Growth of Insurance Transaction Amount"
-    )
-                st.plotly_chart(fig3, use_container_width=True)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-            
         elif method_3 =="Top Transaction":
-                
-                                
                 st.subheader("💸 Top Transaction Analysis")
 
     # ---------------------------------
     # 📦 Fetch Data
     # ---------------------------------
-                query = """
-    SELECT State, Year, Quarter, District,
-           SUM(Transaction_count) AS Total_Transactions,
-           SUM(Transaction_amount) AS Total_Amount,
-           Region
-    FROM toptransaction
-    GROUP BY State, Year, Quarter, District, Region;
-    """
-                df = fetch_data(query)
+                periods = fetch_data(*queries.periods("toptransaction_by_state_year_quarter"))
 
     # ---------------------------------
     # 🔹 Filters
     # ---------------------------------
-                year = st.selectbox("Select Year", sorted(df["Year"].unique()), key="top_txn_year")
-                quarter = st.selectbox("Select Quarter", sorted(df["Quarter"].unique()), key="top_txn_quarter")
-
-                filtered_df = df[(df["Year"] == year) & (df["Quarter"] == quarter)]
+                year = selectbox("Select Year", sorted(periods["Year"].unique()), key="top_txn_year")
+                quarter = selectbox("Select Quarter", sorted(periods["Quarter"].unique()), key="top_txn_quarter")
+                fig1, fig2, fig3 = view_figures(
+                    "top_toptransaction",
+                    ("states", dict(year=year, quarter=quarter)),
+                    ("districts", dict(year=year, quarter=quarter)),
+                    ("yearly", {}),
+                )
 
     # ---------------------------------
     # 1️⃣ Top 10 States by Transaction Amount
     # ---------------------------------
                 st.markdown("### 🏆 Top 10 States by Transaction Amount")
-
-                top_states = (
-        filtered_df.groupby("State")[["Total_Amount"]]
-        .sum()
-        .reset_index()
-        .sort_values(by="Total_Amount", ascending=False)
-        .head(10)
-    )
-
-                fig1 = px.bar(
-        top_states,
-        x="State",
-        y="Total_Amount",
-        color="Total_Amount",
-        color_continuous_scale="Viridis",
-        text_auto=".2s",
-        title=f"Top 10 States by Transaction Amount ({year} Q{quarter})"
-    )
-                st.plotly_chart(fig1, use_container_width=True)
+                plot(fig1)
 
     # ---------------------------------
     # 2️⃣ Top 10 Districts by Transaction Count
     # ---------------------------------
                 st.markdown("### 🏙️ Top 10 Districts by Transaction Count")
-
-                top_districts = (
-        filtered_df.groupby("District")[["Total_Transactions"]]
-        .sum()
-        .reset_index()
-        .sort_values(by="Total_Transactions", ascending=False)
-        .head(10)
-    )
-
-                fig2 = px.bar(
-        top_districts,
-        x="District",
-        y="Total_Transactions",
-        color="Total_Transactions",
-        color_continuous_scale="Blues",
-        text_auto=".2s",
-        title=f"Top 10 Districts by Transaction Count ({year} Q{quarter})"
-    )
-                st.plotly_chart(fig2, use_container_width=True)
+                plot(fig2)
 
     # ---------------------------------
     # 3️⃣ Yearly Growth in Transaction Amount
     # ---------------------------------
                 st.markdown("### 📈 Yearly Growth of Total Transactions")
+                plot(fig3)
 
-                yearly_trend = (
-        df.groupby("Year")[["Total_Amount", "Total_Transactions"]]
-        .sum()
-        .reset_index()
-    )
-
-                fig3 = px.line(
-        yearly_trend,
-        x="Year",
-        y="Total_Amount",
-        markers=True,
-        title="Yearly Growth of Transaction Amount"
-    )
-                st.plotly_chart(fig3, use_container_width=True)
-
-
-
-
-
-
-
-
-
-            
         elif method_3=="Top User":
             st.subheader("👥 Top User Analysis")
 
     # ---------------------------------
     # 📦 Fetch Data
     # ---------------------------------
-            query = """
-    SELECT State, Year, Quarter, District,
-           SUM(Registered_users) AS Total_Users,
-           Region
-    FROM topuser
-    GROUP BY State, Year, Quarter, District, Region;
-    """
-            df = fetch_data(query)
+            periods = fetch_data(*queries.periods("topuser_by_state_year_quarter"))
 
     # ---------------------------------
     # 🔹 Filters
     # ---------------------------------
-            year = st.selectbox("Select Year", sorted(df["Year"].unique()), key="top_user_year")
-            quarter = st.selectbox("Select Quarter", sorted(df["Quarter"].unique()), key="top_user_quarter")
-
-            filtered_df = df[(df["Year"] == year) & (df["Quarter"] == quarter)]
+            year = selectbox("Select Year", sorted(periods["Year"].unique()), key="top_user_year")
+            quarter = selectbox("Select Quarter", sorted(periods["Quarter"].unique()), key="top_user_quarter")
+            fig1, fig2, fig3 = view_figures(
+                "top_topuser",
+                ("states", dict(year=year, quarter=quarter)),
+                ("districts", dict(year=year, quarter=quarter)),
+                ("yearly", {}),
+            )
 
     # ---------------------------------
     # 1️⃣ Top 10 States by Registered Users
     # ---------------------------------
             st.markdown("### 🏆 Top 10 States by Registered Users")
-
-            top_states = (
-        filtered_df.groupby("State")[["Total_Users"]]
-        .sum()
-        .reset_index()
-        .sort_values(by="Total_Users", ascending=False)
-        .head(10)
-    )
-
-            fig1 = px.bar(
-        top_states,
-        x="State",
-        y="Total_Users",
-        color="Total_Users",
-        color_continuous_scale="Blues",
-        text_auto=".2s",
-        title=f"Top 10 States by Registered Users ({year} Q{quarter})"
-    )
-            st.plotly_chart(fig1, use_container_width=True)
+            plot(fig1)
 
     # ---------------------------------
     # 2️⃣ Top 10 Districts by Registered Users
     # ---------------------------------
             st.markdown("### 🏙️ Top 10 Districts by Registered Users")
-
-            top_districts = (
-        filtered_df.groupby("District")[["Total_Users"]]
-        .sum()
-        .reset_index()
-        .sort_values(by="Total_Users", ascending=False)
-        .head(10)
-    )
-
-            fig2 = px.bar(
-        top_districts,
-        x="District",
-        y="Total_Users",
-        color="Total_Users",
-        color_continuous_scale="Viridis",
-        text_auto=".2s",
-        title=f"Top 10 Districts by Registered Users ({year} Q{quarter})"
-    )
-            st.plotly_chart(fig2, use_container_width=True)
+            plot(fig2)
 
     # ---------------------------------
     # 3️⃣ Yearly Growth in User Registration
     # ---------------------------------
             st.markdown("### 📈 Yearly Growth in User Registration")
-
-            yearly_trend = (
-        df.groupby("Year")[["Total_Users"]]
-        .sum()
-        .reset_index()
-    )
-
-            fig3 = px.line(
-        yearly_trend,
-        x="Year",
-        y="Total_Users",
-        markers=True,
-        title="Yearly Growth in Registered Users"
-    )
-            st.plotly_chart(fig3, use_container_width=True)
-
-            
-            
+            plot(fig3)
 
 elif select == "TOP CHARTS":
     st.title("🏆 Top Charts Dashboard")
+    fig1, fig2, fig3, fig4 = view_figures("top_charts", ("amount", {}), ("users", {}), ("insurance", {}), ("yearly", {}))
 
     # 1️⃣ Top 10 States by Total Transaction Amount
     st.subheader("💰 Top 10 States by Total Transaction Amount")
-    query1 = """
-    SELECT State, SUM(Transaction_amount) AS Total_Amount
-    FROM aggregatedtransaction
-    GROUP BY State
-    ORDER BY Total_Amount DESC
-    LIMIT 10;
-    """
-    df1 = fetch_data(query1)
-
-    fig1 = px.bar(
-        df1,
-        x="State",
-        y="Total_Amount",
-        color="Total_Amount",
-        color_continuous_scale="Tealgrn",
-        title="Top 10 States by Total Transaction Amount"
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    plot(fig1)
 
     # 2️⃣ Top 10 States by Registered Users
     st.subheader("👥 Top 10 States by Registered Users")
-    query2 = """
-    SELECT State, SUM(Registered_users) AS Total_Users
-    FROM topuser
-    GROUP BY State
-    ORDER BY Total_Users DESC
-    LIMIT 10;
-    """
-    df2 = fetch_data(query2)
-
-    fig2 = px.bar(
-        df2,
-        x="State",
-        y="Total_Users",
-        color="Total_Users",
-        color_continuous_scale="Blues",
-        title="Top 10 States by Registered Users"
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    plot(fig2)
 
     # 3️⃣ Top 10 States by Insurance Transaction Amount
     st.subheader("🛡️ Top 10 States by Insurance Transaction Amount")
-    query3 = """
-    SELECT State, SUM(Transaction_amount) AS Total_Insurance_Amount
-    FROM aggregateinsurance
-    GROUP BY State
-    ORDER BY Total_Insurance_Amount DESC
-    LIMIT 10;
-    """
-    df3 = fetch_data(query3)
-
-    fig3 = px.bar(
-        df3,
-        x="State",
-        y="Total_Insurance_Amount",
-        color="Total_Insurance_Amount",
-        color_continuous_scale="Purples",
-        title="Top 10 States by Insurance Transaction Amount"
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    plot(fig3)
 
     # 4️⃣ Yearly Transaction Growth Trend
     st.subheader("📈 Yearly Transaction Growth Trend")
-    query4 = """
-    SELECT Year, SUM(Transaction_amount) AS Total_Amount
-    FROM aggregatedtransaction
-    GROUP BY Year
-    ORDER BY Year;
-    """
-    df4 = fetch_data(query4)
+    plot(fig4)
 
-    fig4 = px.line(
-        df4,
-        x="Year",
-        y="Total_Amount",
-        markers=True,
-        title="Yearly Growth in Total Transactions"
-    )
-    st.plotly_chart(fig4, use_container_width=True)
+elif select == "PERF":
+    st.header("⏱️ Performance")
+    st.caption("Rolling timings of this server process, per view and stage "
+               "(sql, figure, serialize, render, total). Every record is also in " + (perf.PERF_LOG or "no log file") + ".")
+
+    summary = pd.DataFrame(perf.recorder().summary())
+    if summary.empty:
+        st.info("No timings yet: open DATA EXPLORATION or TOP CHARTS first.")
+    else:
+        st.dataframe(summary.round(2), use_container_width=True, hide_index=True)
 
+    st.subheader("🗄️ Latest queries")
+    st.dataframe(pd.DataFrame(perf.recorder().recent("sql")), use_container_width=True, hide_index=True)
 
-    
+    st.subheader("🔌 Connection pool & caches")
+    pools = pd.DataFrame(config.pool_stats())
+    if not pools.empty:
+        pools["options"] = pools["options"].astype(str)
+    st.dataframe(pools, use_container_width=True, hide_index=True)
+    st.dataframe(pd.DataFrame({"query cache": query_cache().stats(), "figure cache": figure_cache().stats()}).T,
+                 use_container_width=True)
 
+    if st.button("Reset timings"):
+        perf.recorder().clear()
+        st.rerun()
 
+perf.record("total", time.perf_counter() - run_started)
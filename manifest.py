@@ -0,0 +1,82 @@
+# manifest.py
+# Bookkeeping of the pulse files that have already been extracted.
+#
+# The manifest is a json file mapping table name -> file path (relative to the
+# pulse root) -> {size, mtime, sha1, partition}. A file whose size and mtime are
+# unchanged is trusted without reading it; otherwise it is hashed and only
+# re-parsed when the content really changed.
+#
+# Files may also live inside a pack (see pack.py); their manifest key is the
+# same relative path, so switching between a tree and its pack costs no parsing.
+
+import os
+import json
+import hashlib
+
+MANIFEST_FILE = "manifest.json"
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def signature(location, root):
+    """Return (key, size, mtime, hash function) of a quarter file.
+
+    ``location`` is a path on disk or a pack.PackEntry. Packed payloads have no
+    timestamp of their own, so their sha1 stands in for the mtime.
+    """
+    if isinstance(location, str):
+        stat = os.stat(location)
+        return os.path.relpath(location, root), stat.st_size, stat.st_mtime_ns, lambda: file_hash(location)
+    return location.key, location.length, location.sha1, lambda: location.sha1
+
+
+def plan_files(files, root, entries):
+    """Compare the current files of one table with its manifest entries.
+
+    ``files`` are (state, year, quarter, location) tuples as produced by
+    extract.list_files. Returns (todo, stale, new_entries): the files that must
+    be parsed, the (state, year, quarter) partitions whose old rows must be
+    dropped, and the manifest entries describing the current tree.
+    """
+    todo, stale, new_entries = [], set(), {}
+    for state, year, quarter, location in files:
+        key, size, mtime, digest = signature(location, root)
+        old = entries.get(key)
+        if old and old["size"] == size and old["mtime"] == mtime:
+            new_entries[key] = old
+            continue
+
+        entry = {"size": size, "mtime": mtime, "sha1": digest(), "partition": [state, year, quarter]}
+        new_entries[key] = entry
+        if old and old["sha1"] == entry["sha1"]:
+            continue  # touched but identical
+        todo.append((state, year, quarter, location))
+        if old:
+            stale.add(tuple(old["partition"]))
+
+    # files that disappeared from the tree take their rows with them
+    for key, old in entries.items():
+        if key not in new_entries:
+            stale.add(tuple(old["partition"]))
+
+    return todo, stale, new_entries
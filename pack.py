@@ -0,0 +1,118 @@
+# pack.py
+# Packs the raw pulse/data json tree into one indexed segment file.
+#
+# Layout of a pack file:
+#   header   MAGIC (8 bytes) + index offset (u64) + index length (u64)
+#   payloads the raw bytes of every <q>.json file, back to back
+#   index    json list of [dataset, state, year, quarter, offset, length, sha1]
+#
+# "dataset" is the folder holding the <state> folders relative to pulse/data
+# (e.g. "top/transaction/country/india/state"), the same value as
+# SourceSpec.base_path in extract.py. Readers memory-map the file, so pulling
+# a payload is a slice instead of an open/stat/read per quarter file.
+
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+from collections import namedtuple
+
+MAGIC = b"PULSEPK1"
+HEADER = struct.Struct("<8sQQ")
+
+PackEntry = namedtuple("PackEntry", "pack_path key state year quarter offset length sha1")
+
+
+def iter_quarter_files(root):
+    """Yield (dataset, state, year, quarter, path) for every quarter json under root."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        rel = os.path.relpath(dirpath, root).split(os.sep)
+        # .../state/<state>/<year>
+        if len(rel) < 3 or rel[-3] != "state" or not rel[-1].isdigit():
+            continue
+        dataset = "/".join(rel[:-2])
+        for file in sorted(filenames):
+            if file.endswith(".json") and file.removesuffix(".json").isdigit():
+                yield dataset, rel[-2], int(rel[-1]), int(file.removesuffix(".json")), os.path.join(dirpath, file)
+
+
+def write_pack(root, pack_path):
+    """Pack every quarter file under ``root`` into ``pack_path``. Returns the entry count."""
+    index = []
+    tmp_path = pack_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, 0, 0))
+        for dataset, state, year, quarter, path in iter_quarter_files(root):
+            with open(path, "rb") as f:
+                payload = f.read()
+            index.append([dataset, state, year, quarter, out.tell(), len(payload),
+                          hashlib.sha1(payload).hexdigest()])
+            out.write(payload)
+
+        index_bytes = json.dumps(index, separators=(",", ":")).encode()
+        index_offset = out.tell()
+        out.write(index_bytes)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, index_offset, len(index_bytes)))
+    os.replace(tmp_path, pack_path)
+    return len(index)
+
+
+class PackReader:
+    """Memory-mapped read access to a pack file."""
+
+    def __init__(self, pack_path):
+        self.pack_path = pack_path
+        with open(pack_path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{pack_path} is not a pulse pack file")
+        index = json.loads(self.buffer[index_offset:index_offset + index_length])
+
+        self.datasets = {}
+        for dataset, state, year, quarter, offset, length, sha1 in index:
+            key = f"{dataset}/{state}/{year}/{quarter}.json"
+            self.datasets.setdefault(dataset, []).append(
+                PackEntry(pack_path, key, state, year, quarter, offset, length, sha1))
+
+    def entries(self, dataset):
+        """Entries of one dataset in (state, year, quarter) order."""
+        return sorted(self.datasets.get(dataset, []), key=lambda e: (e.state, e.year, e.quarter))
+
+    def read(self, entry):
+        return self.buffer[entry.offset:entry.offset + entry.length]
+
+    def close(self):
+        self.buffer.close()
+
+
+# one reader per pack and process; workers of the extraction pool reuse it
+_readers = {}
+
+
+def open_pack(pack_path):
+    reader = _readers.get(pack_path)
+    if reader is None:
+        reader = _readers[pack_path] = PackReader(pack_path)
+    return reader
+
+
+def read_entry(entry):
+    return open_pack(entry.pack_path).read(entry)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("usage: python pack.py <pulse/data folder> <output .pack file>")
+        sys.exit(1)
+    root, pack_path = sys.argv[1], sys.argv[2]
+    count = write_pack(root, pack_path)
+    print(f"✅ Packed {count} files into {pack_path} ({os.path.getsize(pack_path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# perf.py
+# Hot-path timings of the dashboard: where a render spends its time.
+#
+# Every measurement is (view, stage, seconds) plus optional fields (rows,
+# bytes, cache hit). The stages of a DATA EXPLORATION / TOP CHARTS run are
+#   sql        one query: pool checkout, MySQL, columnar read (rows, bytes, hit)
+#   figure     a chart builder: pandas reshaping + Plotly Express
+#   serialize  a new figure -> cached JSON text (to_json), cached text -> Figures (from_json)
+#   render     st.plotly_chart: validation and protobuf serialization
+#   total      the whole script run
+# Each one is appended as a JSON line to PERF_LOG and kept in a rolling window
+# per (view, stage) for the p50 / p95 / p99 of the hidden "PERF" page.
+#
+# The view is a context variable set by main.py once it knows which analysis
+# runs; cache.fetch_many copies the context into its worker threads.
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+
+# JSON-lines timing log ("" turns it off), rotated at PERF_LOG_BYTES keeping
+# PERF_LOG_BACKUPS old files, and the samples kept per (view, stage)
+PERF_LOG = os.environ.get("PHONEPE_PERF_LOG", "logs/perf.jsonl")
+PERF_LOG_BYTES = int(os.environ.get("PHONEPE_PERF_LOG_BYTES", str(10 * 1024 * 1024)))
+PERF_LOG_BACKUPS = int(os.environ.get("PHONEPE_PERF_LOG_BACKUPS", "3"))
+WINDOW = int(os.environ.get("PHONEPE_PERF_WINDOW", "1000"))
+RECENT = 200
+
+# the PERF page is listed in the sidebar when this is "1" or the URL has ?perf=1
+PERF_PAGE = os.environ.get("PHONEPE_PERF_PAGE", "0") == "1"
+
+PERCENTILES = (50, 95, 99)
+
+VIEW = contextvars.ContextVar("perf_view", default="-")
+
+
+def set_view(view):
+    VIEW.set(view)
+
+
+def current_view():
+    return VIEW.get()
+
+
+class Recorder:
+    """Thread-safe rolling windows of stage timings, shared by every session of the process."""
+
+    def __init__(self, window=WINDOW, log_path=PERF_LOG):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))  # (view, stage) -> seconds
+        self._recent = deque(maxlen=RECENT)  # latest records, newest last
+        self._lock = threading.Lock()
+        self.logger = self._logger(log_path)
+
+    @staticmethod
+    def _logger(path):
+        logger = logging.getLogger("phonepe.perf")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        if path and not logger.handlers:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=PERF_LOG_BYTES, backupCount=PERF_LOG_BACKUPS,
+                                          encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def record(self, stage, seconds, view=None, **fields):
+        record = {"ts": round(time.time(), 3), "view": view or current_view(), "stage": stage,
+                  "ms": round(seconds * 1000, 3), **fields}
+        with self._lock:
+            self._samples[(record["view"], stage)].append(seconds)
+            self._recent.append(record)
+        if self.logger.handlers:
+            self.logger.info(json.dumps(record, default=str))
+
+    @contextmanager
+    def timer(self, stage, **fields):
+        """Time the block as ``stage``; the block may add fields (rows, bytes, ...) to the yielded dict."""
+        started = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(stage, time.perf_counter() - started, **fields)
+
+    def summary(self):
+        """One row per (view, stage): count, mean and p50 / p95 / p99 in milliseconds."""
+        with self._lock:
+            samples = {key: np.array(values) * 1000 for key, values in self._samples.items()}
+        rows = []
+        for (view, stage), ms in sorted(samples.items()):
+            p50, p95, p99 = np.percentile(ms, PERCENTILES)
+            rows.append({"view": view, "stage": stage, "count": len(ms), "mean_ms": float(ms.mean()),
+                         "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)})
+        return rows
+
+    def recent(self, stage=None):
+        with self._lock:
+            records = list(self._recent)
+        return [r for r in reversed(records) if stage is None or r["stage"] == stage]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._recent.clear()
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def recorder():
+    # one recorder per process, like the connection pool
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = Recorder()
+        return _recorder
+
+
+def record(stage, seconds, **fields):
+    recorder().record(stage, seconds, **fields)
+
+
+def timer(stage, **fields):
+    return recorder().timer(stage, **fields)
@@ -0,0 +1,96 @@
+# pipeline.py
+# The ETL run that replaces the extraction/cleaning cells of cloning.ipynb:
+#   extract (incremental)  ->  canonical names + ids  ->  district coordinates
+#   ->  clean_data/<table>_df.csv
+
+import os
+import argparse
+
+import pandas as pd
+
+from extract import PULSE_ROOT, SOURCES, sources_for, extract_incremental
+from canonical import canonical_state, canonicalize, assign_ids, load_ids, save_ids
+from enrich import LAT_LONG_PATH, CoordinateIndex, enrich
+from loader import load_tables
+
+CLEAN_DIR = "clean_data"
+RAW_DIR = "raw_data"
+UNMATCHED_FILE = "unmatched_districts.csv"
+
+
+def clean_table(df, ids, coordinates):
+    """Canonical names, ids and coordinates. Returns (df, unmatched districts)."""
+    return enrich(assign_ids(canonicalize(df), ids), coordinates)
+
+
+def run(sources=SOURCES, root=PULSE_ROOT, raw_dir=RAW_DIR, clean_dir=CLEAN_DIR, workers=None, full=False,
+        lat_long_path=LAT_LONG_PATH):
+    """Run the pipeline. Returns (clean frames, changed partitions per table).
+
+    Changed partitions are (State, Year, Quarter) tuples with canonical state
+    names, i.e. the keys the clean tables and MySQL use. Tables that did not
+    change are returned as None. (State, District) pairs without coordinates
+    are kept and listed in <raw_dir>/unmatched_districts.csv.
+    """
+    frames, changed = extract_incremental(sources, root, raw_dir, workers, full)
+
+    ids_path = os.path.join(clean_dir, "name_ids.json")
+    ids = load_ids(ids_path)
+    os.makedirs(clean_dir, exist_ok=True)
+    coordinates = None  # built on first use, shared by every table
+
+    clean, clean_changed, unmatched = {}, {}, []
+    for name, df in frames.items():
+        partitions = {(canonical_state(state), year, quarter) for state, year, quarter in changed[name]}
+        out_path = os.path.join(clean_dir, f"{name}_df.csv")
+        if not partitions and os.path.exists(out_path):
+            # nothing new for this table: keep the previous clean output
+            clean[name], clean_changed[name] = None, partitions
+            continue
+        if coordinates is None:
+            coordinates = CoordinateIndex.from_csv(lat_long_path)
+        clean[name], missing = clean_table(df, ids, coordinates)
+        clean[name].to_csv(out_path, index=False)
+        clean_changed[name] = partitions
+        if not missing.empty:
+            unmatched.append(missing.assign(Table=name))
+
+    save_ids(ids, ids_path)
+    if unmatched:
+        report = pd.concat(unmatched, ignore_index=True)[["Table", "State", "District", "Rows"]]
+        report.to_csv(os.path.join(raw_dir, UNMATCHED_FILE), index=False)
+        print(f"⚠️ {len(report)} (State, District) pairs without coordinates, see {raw_dir}/{UNMATCHED_FILE}")
+    if coordinates is not None and coordinates.duplicates:
+        print(f"⚠️ {len(coordinates.duplicates)} duplicate (State, District) keys in {lat_long_path}, first one used")
+    return clean, clean_changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PhonePe Pulse ETL pipeline")
+    parser.add_argument("--root", default=PULSE_ROOT, help="path of the pulse/data folder or of a pack file")
+    parser.add_argument("--raw", default=RAW_DIR, help="folder for the extracted tables and the manifest")
+    parser.add_argument("--out", default=CLEAN_DIR, help="folder for the cleaned tables")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--latlong", default=LAT_LONG_PATH, help="district coordinates csv")
+    parser.add_argument("--full", action="store_true", help="re-parse every file")
+    parser.add_argument("--load", action="store_true", help="refresh the changed partitions in MySQL")
+    parser.add_argument("--upsert", action="store_true", help="with --load: upsert instead of delete + insert")
+    parser.add_argument("tables", nargs="*", help="tables to process (default: all)")
+    args = parser.parse_args()
+
+    sources = sources_for(args.tables) if args.tables else SOURCES
+    clean, changed = run(sources, args.root, args.raw, args.out, args.workers, args.full, args.latlong)
+    for name, df in clean.items():
+        if df is None:
+            print(f"⏭️ {name}: up to date")
+        else:
+            print(f"✅ Saved {name}_df.csv ({len(df)} rows, {len(changed[name])} partitions refreshed)")
+
+    if args.load:
+        frames = {name: df for name, df in clean.items() if df is not None}
+        for name, seconds in load_tables(frames, partitions=changed, upsert=args.upsert).items():
+            print(f"✅ Loaded {len(changed[name])} partitions of {name} into MySQL in {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# queries.py
+# Parameterized queries behind the dashboard views.
+#
+# Each function turns a view's selectbox choices into one SELECT with bound
+# parameters and returns (sql, params), ready for fetch_data(*...). Filters on
+# Year / Quarter / State go into the WHERE clause and trends are summed by
+# MySQL (mostly from the rollup tables), so a view fetches the slice and the
+# few trend rows its charts draw instead of the whole history.
+
+
+def quote(name):
+    return f"`{name}`"
+
+
+def value(v):
+    # numpy scalars from selectboxes -> python values the driver can bind
+    return v.item() if hasattr(v, "item") else v
+
+
+def where(filters):
+    """WHERE clause + params from {column: value or list of values}; None values are skipped."""
+    clauses, params = [], []
+    for column, v in (filters or {}).items():
+        if v is None:
+            continue
+        if isinstance(v, (list, tuple, set)):
+            v = sorted(value(x) for x in v)
+            clauses.append(f"{quote(column)} IN ({', '.join(['%s'] * len(v))})")
+            params.extend(v)
+        else:
+            clauses.append(f"{quote(column)} = %s")
+            params.append(value(v))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+
+def select(table, columns, filters=None, group_by=None, order_by=None, limit=None):
+    """Compile a SELECT; ``columns`` and ``order_by`` are SQL expressions, filter keys column names."""
+    clause, params = where(filters)
+    sql = f"SELECT {', '.join(columns)} FROM {quote(table)}{clause}"
+    if group_by:
+        sql += " GROUP BY " + ", ".join(map(quote, group_by))
+    if order_by:
+        sql += " ORDER BY " + ", ".join(order_by)
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    return sql, params
+
+
+def total(table, by, measure, alias, filters=None):
+    """SUM(measure) AS alias per ``by``, ordered by ``by``."""
+    return select(table, [quote(by), f"SUM({quote(measure)}) AS {quote(alias)}"], filters,
+                  group_by=[by], order_by=[quote(by)])
+
+
+def top(table, label, measure, alias, filters=None, n=10):
+    return select(table, [quote(label), f"{quote(measure)} AS {quote(alias)}"], filters,
+                  order_by=[f"{quote(alias)} DESC"], limit=n)
+
+
+# ---- selectbox options
+
+def periods(table):
+    """Distinct (Year, Quarter) of a table; the rollups answer this from their unique key."""
+    return select(table, ["DISTINCT `Year`", "`Quarter`"], order_by=["`Year`", "`Quarter`"])
+
+
+def states(table):
+    return select(table, ["DISTINCT `State`"], order_by=["`State`"])
+
+
+# ---- Aggregated Analysis
+
+def insurance_by_state(year, quarter):
+    return select("aggregateinsurance_by_state_year_quarter",
+                  ["`State`", "`Transaction_count` AS `Total_Policies`", "`Transaction_amount` AS `Total_Amount`"],
+                  {"Year": year, "Quarter": quarter})
+
+
+def insurance_by_year():
+    return total("aggregateinsurance_by_state_year_quarter", "Year", "Transaction_amount", "Total_Amount")
+
+
+def insurance_by_quarter(year):
+    return total("aggregateinsurance_by_state_year_quarter", "Quarter", "Transaction_amount", "Total_Amount",
+                 {"Year": year})
+
+
+def transaction_types(state, year):
+    return select("aggregatedtransaction", ["`Quarter`", "`Transaction_Type`", "`Transaction_Amount`"],
+                  {"State": state, "Year": year}, order_by=["`Quarter`"])
+
+
+def transaction_by_state(year, quarter):
+    return select("aggregatedtransaction_by_state_year_quarter",
+                  ["`State`", "`Transaction_Count`", "`Transaction_Amount`"], {"Year": year, "Quarter": quarter})
+
+
+def transaction_by_year():
+    return select("aggregatedtransaction_by_year", ["`Year`", "`Transaction_Amount`"], order_by=["`Year`"])
+
+
+def transaction_by_quarter(year):
+    return total("aggregatedtransaction_by_state_year_quarter", "Quarter", "Transaction_Amount",
+                 "Transaction_Amount", {"Year": year})
+
+
+def user_by_brand(year, quarter):
+    return select("aggregateuser_by_brand_year_quarter",
+                  ["`Brand`", "`Transaction_count` AS `Total_Transactions`"], {"Year": year, "Quarter": quarter},
+                  order_by=["`Total_Transactions` DESC"])
+
+
+def user_top_states(year, quarter):
+    return top("aggregateuser_by_state_year_quarter", "State", "Transaction_count", "Total_Transactions",
+               {"Year": year, "Quarter": quarter})
+
+
+def user_by_year():
+    return total("aggregateuser_by_state_year_quarter", "Year", "Transaction_count", "Total_Transactions")
+
+
+# ---- Map Analysis
+
+def map_insurance_by_state():
+    return select("mapinsurance_by_state",
+                  ["`State`", "`Transaction_count` AS `Total_Policies`", "`Transaction_amount` AS `Total_Amount`"])
+
+
+def map_transaction_by_state():
+    return select("maptransaction_by_state", ["`State`", "`Transaction_amount` AS `Total_Amount`"])
+
+
+def map_user_by_state(year, quarter):
+    return select("map_user_by_state_year_quarter", ["`State`", "`Registered_users`", "`App_opens`"],
+                  {"Year": year, "Quarter": quarter})
+
+
+# District points: table -> (measure, alias). Points are binned by MySQL on a
+# lat/long grid sized for the zoom level, so the browser gets at most one
+# marker per few pixels however many districts (or quarters) the table holds.
+
+POINT_VIEWS = {
+    "maptransaction": ("Transaction_amount", "Total_Amount"),
+    "mapinsurance": ("Transaction_amount", "Total_Amount"),
+    "map_user": ("Registered_users", "Total_Users"),
+}
+
+BIN_PX = 24  # marker spacing on screen
+
+
+def bin_size(zoom, bin_px=BIN_PX):
+    """Grid cell in degrees covering ``bin_px`` pixels at a web-map zoom level (512 px tiles)."""
+    return bin_px * 360.0 / (512 * 2 ** zoom)
+
+
+def point_options(table):
+    """(periods, states) queries of a point table, answered by its by_state_year_quarter rollup."""
+    rollup = f"{table}_by_state_year_quarter"
+    return periods(rollup), states(rollup)
+
+
+def district_points(table, year, quarter, zoom, state=None):
+    measure, alias = POINT_VIEWS[table]
+    clause, params = where({"Year": year, "Quarter": quarter, "State": state})
+    cell = bin_size(zoom)
+    sql = (f"SELECT AVG(`Latitude`) AS `Latitude`, AVG(`Longitude`) AS `Longitude`, "
+           f"SUM({quote(measure)}) AS {quote(alias)}, COUNT(*) AS `Districts`, MIN(`District`) AS `District` "
+           f"FROM {quote(table)}{clause} AND `Latitude` IS NOT NULL "
+           "GROUP BY FLOOR(`Latitude` / %s), FLOOR(`Longitude` / %s)")
+    return sql, params + (cell, cell)
+
+
+# ---- Top Analysis: table -> (measure shown per state, measure shown per district, trend measure)
+
+TOP_VIEWS = {
+    "topinsurance": (("Transaction_amount", "Total_Amount"), ("Transaction_count", "Total_Transactions"),
+                     ("Transaction_amount", "Total_Amount")),
+    "toptransaction": (("Transaction_amount", "Total_Amount"), ("Transaction_count", "Total_Transactions"),
+                       ("Transaction_amount", "Total_Amount")),
+    "topuser": (("Registered_users", "Total_Users"), ("Registered_users", "Total_Users"),
+                ("Registered_users", "Total_Users")),
+}
+
+
+def top_states(table, year, quarter):
+    measure, alias = TOP_VIEWS[table][0]
+    return top(f"{table}_by_state_year_quarter", "State", measure, alias, {"Year": year, "Quarter": quarter})
+
+
+def top_districts(table, year, quarter):
+    measure, alias = TOP_VIEWS[table][1]
+    return top(f"{table}_by_district_year_quarter", "District", measure, alias, {"Year": year, "Quarter": quarter})
+
+
+def top_by_year(table):
+    measure, alias = TOP_VIEWS[table][2]
+    return select(f"{table}_by_year", ["`Year`", f"{quote(measure)} AS {quote(alias)}"], order_by=["`Year`"])
+
+
+# ---- TOP CHARTS (all quarters)
+
+def top_states_by_amount():
+    return top("aggregatedtransaction_by_state", "State", "Transaction_Amount", "Total_Amount")
+
+
+def top_states_by_users():
+    return top("topuser_by_state", "State", "Registered_users", "Total_Users")
+
+
+def top_states_by_insurance():
+    return top("aggregateinsurance_by_state", "State", "Transaction_amount", "Total_Insurance_Amount")
+
+
+def yearly_amount():
+    return select("aggregatedtransaction_by_year", ["`Year`", "`Transaction_Amount` AS `Total_Amount`"],
+                  order_by=["`Year`"])
+
+
+def dashboard_queries(year=2022, quarter=1, state="Karnataka"):
+    """Every query above, compiled with sample choices (for schema.py explain)."""
+    queries = [
+        periods("aggregateinsurance_by_state_year_quarter"), states("aggregatedtransaction_by_state"),
+        insurance_by_state(year, quarter), insurance_by_year(), insurance_by_quarter(year),
+        transaction_types(state, year), transaction_by_state(year, quarter), transaction_by_year(),
+        transaction_by_quarter(year),
+        user_by_brand(year, quarter), user_top_states(year, quarter), user_by_year(),
+        map_insurance_by_state(), map_transaction_by_state(),
+        map_user_by_state(year, quarter), states("map_user_by_state_year_quarter"),
+        top_states_by_amount(), top_states_by_users(), top_states_by_insurance(), yearly_amount(),
+    ]
+    for table in POINT_VIEWS:
+        queries += [*point_options(table), district_points(table, year, quarter, 4),
+                    district_points(table, year, quarter, 8, state)]
+    for table in TOP_VIEWS:
+        queries += [top_states(table, year, quarter), top_districts(table, year, quarter), top_by_year(table)]
+    return queries
@@ -0,0 +1,79 @@
+# rollup.py
+# Maintains the summary tables of schema.ROLLUPS.
+#
+# After a fact table is loaded, every rollup built from it is refreshed in the
+# same transaction. When the load only touched some (State, Year, Quarter)
+# partitions, only the rollup groups those partitions feed are recomputed:
+# a rollup by Year is refreshed for the changed years, one by State for the
+# changed states, and a rollup without any of these columns is rebuilt.
+
+import sys
+
+from schema import ROLLUPS
+from cache import bump_data_version
+
+PARTITION_COLUMNS = ['State', 'Year', 'Quarter']
+
+
+def rollups_of(table):
+    return [rollup for rollup, (source, _, _) in ROLLUPS.items() if source == table]
+
+
+def affected_filter(group_by, partitions):
+    """WHERE clause + params selecting the groups fed by ``partitions`` (None = everything)."""
+    if partitions is None:
+        return "", ()
+    columns = [column for column in PARTITION_COLUMNS if column in group_by]
+    if not columns:
+        return "", ()
+    positions = [PARTITION_COLUMNS.index(column) for column in columns]
+    keys = sorted({tuple(partition[i] for i in positions) for partition in partitions}, key=str)
+    if len(columns) == 1:
+        clause = f"`{columns[0]}` IN ({', '.join(['%s'] * len(keys))})"
+        params = tuple(key[0] for key in keys)
+    else:
+        row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        clause = f"({', '.join(f'`{c}`' for c in columns)}) IN ({', '.join([row] * len(keys))})"
+        params = tuple(value for key in keys for value in key)
+    return " WHERE " + clause, params
+
+
+def refresh_rollup(cursor, rollup, partitions=None):
+    table, group_by, measures = ROLLUPS[rollup]
+    if partitions is not None and not partitions:
+        return
+    partitions = None if partitions is None else [(state, int(year), int(quarter)) for state, year, quarter in partitions]
+    where, params = affected_filter(group_by, partitions)
+
+    groups = ", ".join(f"`{column}`" for column in group_by)
+    sums = ", ".join(f"SUM(`{column}`)" for column in measures)
+    columns = ", ".join(f"`{column}`" for column in group_by + measures)
+    cursor.execute(f"DELETE FROM `{rollup}`{where}", params)
+    cursor.execute(f"INSERT INTO `{rollup}` ({columns}) "
+                   f"SELECT {groups}, {sums} FROM `{table}`{where} GROUP BY {groups}", params)
+
+
+def refresh_rollups(cursor, table, partitions=None):
+    """Refresh every rollup of ``table``; the caller owns the transaction."""
+    for rollup in rollups_of(table):
+        refresh_rollup(cursor, rollup, partitions)
+
+
+def main():
+    from config import get_connection
+    tables = sys.argv[1:] or sorted({source for source, _, _ in ROLLUPS.values()})
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for table in tables:
+            refresh_rollups(cursor, table)
+            print(f"✅ Rebuilt rollups of {table}: {', '.join(rollups_of(table))}")
+        bump_data_version(cursor)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# schema.py
+# MySQL schema of the eleven clean tables, generated from the pipeline's column map.
+#
+#   python schema.py ddl       print CREATE TABLE statements
+#   python schema.py create    create the tables that do not exist yet
+#   python schema.py explain   EXPLAIN the dashboard queries and flag full scans
+#
+# Types are kept tight (SMALLINT year, TINYINT quarter, BIGINT counts,
+# DECIMAL amounts) and every table gets a unique key on its natural key plus
+# the composite indexes matching how main.py filters and groups it.
+#
+# ROLLUPS describes the summary tables the loader maintains next to the fact
+# tables (see rollup.py); the dashboard reads those instead of running
+# SUM ... GROUP BY over the raw rows on every rerun. The data_version table
+# holds the stamp the dashboard's result cache is keyed on (see cache.py).
+
+import ast
+import sys
+
+from extract import TABLES as EXTRACT_TABLES, columns_of
+from cache import VERSION_TABLE_SQL
+
+TABLES = [
+    'aggregatedtransaction', 'aggregateinsurance', 'aggregateuser',
+    'mapinsurance', 'maptransaction', 'map_user',
+    'topinsurance', 'toptransaction', 'toptransactionpincodewise',
+    'topuser', 'topuserpincodewise'
+]
+
+SQL_TYPES = {
+    "State": "VARCHAR(64) NOT NULL",
+    "Year": "SMALLINT UNSIGNED NOT NULL",
+    "Quarter": "TINYINT UNSIGNED NOT NULL",
+    "District": "VARCHAR(96)",
+    "Pincode": "VARCHAR(12)",
+    "Transaction_Type": "VARCHAR(64)",
+    "Type": "VARCHAR(32)",
+    "Brand": "VARCHAR(32)",
+    "Transaction_Count": "BIGINT UNSIGNED",
+    "Transaction_count": "BIGINT UNSIGNED",
+    "Registered_users": "BIGINT UNSIGNED",
+    "App_opens": "BIGINT UNSIGNED",
+    "Transaction_Amount": "DECIMAL(20,2)",
+    "Transaction_amount": "DECIMAL(20,2)",
+    "Percentage": "DOUBLE",
+    "Latitude": "DOUBLE",
+    "Longitude": "DOUBLE",
+    "Region": "VARCHAR(32)",
+    "State_ID": "SMALLINT UNSIGNED",
+    "District_ID": "INT UNSIGNED",
+}
+
+# columns identifying a row within its table
+NATURAL_KEYS = {
+    'aggregatedtransaction': ['State', 'Year', 'Quarter', 'Transaction_Type'],
+    'aggregateinsurance': ['State', 'Year', 'Quarter', 'Type'],
+    'aggregateuser': ['State', 'Year', 'Quarter', 'Brand'],
+    'mapinsurance': ['State', 'Year', 'Quarter', 'District'],
+    'maptransaction': ['State', 'Year', 'Quarter', 'District'],
+    'map_user': ['State', 'Year', 'Quarter', 'District'],
+    'topinsurance': ['State', 'Year', 'Quarter', 'District'],
+    'toptransaction': ['State', 'Year', 'Quarter', 'District'],
+    'toptransactionpincodewise': ['State', 'Year', 'Quarter', 'Pincode'],
+    'topuser': ['State', 'Year', 'Quarter', 'District'],
+    'topuserpincodewise': ['State', 'Year', 'Quarter', 'Pincode'],
+}
+
+# secondary indexes, by the query shapes of main.py. The natural key already
+# serves "GROUP BY State[, Year, Quarter, <dimension>]"; these cover the
+# year/quarter slices and the per-year / per-dimension rollups.
+INDEXES = {
+    'aggregatedtransaction': [
+        ['Year', 'Quarter', 'State'],                   # year/quarter slice, yearly trend
+        ['State', 'Transaction_Amount'],                # top 10 states by amount
+    ],
+    'aggregateinsurance': [
+        ['Year', 'Quarter', 'State'],
+        ['State', 'Transaction_amount'],
+    ],
+    'aggregateuser': [
+        ['Year', 'Quarter', 'Brand'],                   # brand share of a quarter
+    ],
+    'mapinsurance': [
+        ['Year', 'Quarter', 'State'],
+    ],
+    'maptransaction': [
+        ['Year', 'Quarter', 'State'],
+    ],
+    'map_user': [
+        ['Year', 'Quarter', 'State'],
+    ],
+    'topinsurance': [
+        ['Year', 'Quarter', 'District'],                # top districts of a quarter
+    ],
+    'toptransaction': [
+        ['Year', 'Quarter', 'District'],
+    ],
+    'toptransactionpincodewise': [
+        ['Year', 'Quarter'],
+    ],
+    'topuser': [
+        ['Year', 'Quarter', 'District'],
+        ['State', 'Registered_users'],                  # top 10 states by users
+    ],
+    'topuserpincodewise': [
+        ['Year', 'Quarter'],
+    ],
+}
+
+
+# rollup table -> (fact table, group by columns, summed columns). Year and
+# Quarter come first so the unique key also serves the year/quarter slices.
+ROLLUPS = {
+    'aggregatedtransaction_by_state': ('aggregatedtransaction', ['State'], ['Transaction_Count', 'Transaction_Amount']),
+    'aggregatedtransaction_by_year': ('aggregatedtransaction', ['Year'], ['Transaction_Count', 'Transaction_Amount']),
+    'aggregatedtransaction_by_state_year_quarter': (
+        'aggregatedtransaction', ['Year', 'Quarter', 'State'], ['Transaction_Count', 'Transaction_Amount']),
+    'aggregateinsurance_by_state': ('aggregateinsurance', ['State'], ['Transaction_count', 'Transaction_amount']),
+    'aggregateinsurance_by_state_year_quarter': (
+        'aggregateinsurance', ['Year', 'Quarter', 'State'], ['Transaction_count', 'Transaction_amount']),
+    'aggregateuser_by_state_year_quarter': ('aggregateuser', ['Year', 'Quarter', 'State'], ['Transaction_count']),
+    'aggregateuser_by_brand_year_quarter': ('aggregateuser', ['Year', 'Quarter', 'Brand'], ['Transaction_count']),
+    'mapinsurance_by_state': ('mapinsurance', ['State'], ['Transaction_count', 'Transaction_amount']),
+    'mapinsurance_by_state_year_quarter': (
+        'mapinsurance', ['Year', 'Quarter', 'State'], ['Transaction_count', 'Transaction_amount']),
+    'maptransaction_by_state': ('maptransaction', ['State'], ['Transaction_count', 'Transaction_amount']),
+    'maptransaction_by_state_year_quarter': (
+        'maptransaction', ['Year', 'Quarter', 'State'], ['Transaction_count', 'Transaction_amount']),
+    'map_user_by_state_year_quarter': ('map_user', ['Year', 'Quarter', 'State'], ['Registered_users', 'App_opens']),
+    'topinsurance_by_state_year_quarter': (
+        'topinsurance', ['Year', 'Quarter', 'State'], ['Transaction_count', 'Transaction_amount']),
+    'topinsurance_by_district_year_quarter': (
+        'topinsurance', ['Year', 'Quarter', 'District'], ['Transaction_count', 'Transaction_amount']),
+    'topinsurance_by_year': ('topinsurance', ['Year'], ['Transaction_count', 'Transaction_amount']),
+    'toptransaction_by_state_year_quarter': (
+        'toptransaction', ['Year', 'Quarter', 'State'], ['Transaction_count', 'Transaction_amount']),
+    'toptransaction_by_district_year_quarter': (
+        'toptransaction', ['Year', 'Quarter', 'District'], ['Transaction_count', 'Transaction_amount']),
+    'toptransaction_by_year': ('toptransaction', ['Year'], ['Transaction_count', 'Transaction_amount']),
+    'topuser_by_state': ('topuser', ['State'], ['Registered_users']),
+    'topuser_by_state_year_quarter': ('topuser', ['Year', 'Quarter', 'State'], ['Registered_users']),
+    'topuser_by_district_year_quarter': ('topuser', ['Year', 'Quarter', 'District'], ['Registered_users']),
+    'topuser_by_year': ('topuser', ['Year'], ['Registered_users']),
+}
+
+# sums can outgrow the fact column types
+ROLLUP_MEASURE_TYPES = {"BIGINT UNSIGNED": "DECIMAL(30,0)", "DECIMAL(20,2)": "DECIMAL(30,2)"}
+
+
+def table_columns(table):
+    """Columns of a clean table, in the order pipeline.py writes them."""
+    columns = columns_of(EXTRACT_TABLES[table][1])
+    if 'District' in columns:
+        columns += ['Latitude', 'Longitude']
+    columns += ['Region', 'State_ID']
+    if 'District' in columns:
+        columns += ['District_ID']
+    return columns
+
+
+def index_name(prefix, columns):
+    return f"{prefix}_" + "_".join(column.lower() for column in columns)
+
+
+def create_table_sql(table):
+    lines = [f"  `{column}` {SQL_TYPES[column]}" for column in table_columns(table)]
+    lines.append(f"  UNIQUE KEY `{index_name('uk', NATURAL_KEYS[table])}` "
+                 f"({', '.join(f'`{c}`' for c in NATURAL_KEYS[table])})")
+    for columns in INDEXES[table]:
+        lines.append(f"  KEY `{index_name('ix', columns)}` ({', '.join(f'`{c}`' for c in columns)})")
+    return (f"CREATE TABLE IF NOT EXISTS `{table}` (\n" + ",\n".join(lines) +
+            "\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4")
+
+
+def create_rollup_sql(rollup):
+    _, group_by, measures = ROLLUPS[rollup]
+    lines = [f"  `{column}` {SQL_TYPES[column]}" for column in group_by]
+    lines += [f"  `{column}` {ROLLUP_MEASURE_TYPES.get(SQL_TYPES[column], SQL_TYPES[column])}" for column in measures]
+    lines.append(f"  UNIQUE KEY `{index_name('uk', group_by)}` ({', '.join(f'`{c}`' for c in group_by)})")
+    return (f"CREATE TABLE IF NOT EXISTS `{rollup}` (\n" + ",\n".join(lines) +
+            "\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4")
+
+
+def ddl(tables=TABLES):
+    return ([create_table_sql(table) for table in tables] +
+            [create_rollup_sql(rollup) for rollup, (table, _, _) in ROLLUPS.items() if table in tables] +
+            [VERSION_TABLE_SQL])
+
+
+def create_tables(conn, tables=TABLES):
+    cursor = conn.cursor()
+    for statement in ddl(tables):
+        cursor.execute(statement)
+    conn.commit()
+    cursor.close()
+
+
+def dashboard_queries(path="main.py"):
+    """(sql, params) of every dashboard query: the SELECT literals of main.py plus
+    the parameterized queries of queries.py compiled with sample filter values."""
+    import queries as view_queries
+    with open(path, "r") as f:
+        tree = ast.parse(f.read())
+    queries = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            text = node.value.strip()
+            words = text.split()
+            if words[:1] == ["SELECT"] and "FROM" in words and (text, ()) not in queries:
+                queries.append((text, ()))
+    return queries + view_queries.dashboard_queries()
+
+
+def explain(conn, query, params=None):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("EXPLAIN " + query.rstrip().rstrip(";"), params or ())
+    plan = cursor.fetchall()
+    cursor.close()
+    return plan
+
+
+def full_scans(plan):
+    """Plan rows reading a whole table (type ALL) or a whole index (type index)."""
+    return [row for row in plan if row.get("type") in ("ALL", "index")]
+
+
+def check_queries(conn, queries):
+    """Return [(query, offending plan rows)] for (sql, params) pairs that scan a full table or index."""
+    flagged = []
+    for query, params in queries:
+        scans = full_scans(explain(conn, query, params))
+        if scans:
+            flagged.append((query, scans))
+    return flagged
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "ddl"
+    if command == "ddl":
+        print(";\n\n".join(ddl()) + ";")
+        return
+
+    from config import get_connection
+    conn = get_connection()
+    try:
+        if command == "create":
+            create_tables(conn)
+            print(f"✅ Created {len(TABLES)} tables and {len(ROLLUPS)} rollup tables")
+        elif command == "explain":
+            queries = dashboard_queries()
+            flagged = check_queries(conn, queries)
+            for query, scans in flagged:
+                print("⚠️ full scan:", " ".join(query.split()))
+                for row in scans:
+                    print(f"    table={row.get('table')} type={row.get('type')} key={row.get('key')} rows={row.get('rows')}")
+            print(f"{len(flagged)} of {len(queries)} dashboard queries scan a full table or index")
+        else:
+            print("usage: python schema.py [ddl|create|explain]")
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
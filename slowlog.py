@@ -0,0 +1,141 @@
+# slowlog.py
+# Slow-query log of the dashboard, and a ranking of its queries by cost.
+#
+# cache.fetch records every query it runs in the perf log (SQL, parameters,
+# duration, rows, bytes, cache hit). Queries are ranked on query_ms, the time
+# of the query itself, not on the whole fetch, which also counts pool waits. A query that MySQL takes longer than
+# SLOW_QUERY_MS to answer is also written to SLOW_LOG with its EXPLAIN plan,
+# taken on the same connection right after it ran. The log rotates at
+# SLOW_LOG_BYTES, keeping SLOW_LOG_BACKUPS old files.
+#
+#   python slowlog.py                     rank the queries of the perf log by total time
+#   python slowlog.py --by p95 --since 60 by p95, over the last hour only
+#   python slowlog.py --slow              the slow queries and their plans
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+
+from perf import PERF_LOG, current_view
+
+SLOW_QUERY_MS = float(os.environ.get("PHONEPE_SLOW_QUERY_MS", "200"))
+SLOW_LOG = os.environ.get("PHONEPE_SLOW_LOG", "logs/slow_queries.jsonl")
+SLOW_LOG_BYTES = int(os.environ.get("PHONEPE_SLOW_LOG_BYTES", str(5 * 1024 * 1024)))
+SLOW_LOG_BACKUPS = int(os.environ.get("PHONEPE_SLOW_LOG_BACKUPS", "5"))
+
+
+def slow_logger(path=SLOW_LOG):
+    logger = logging.getLogger("phonepe.slow_queries")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    if path and not logger.handlers:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=SLOW_LOG_BYTES, backupCount=SLOW_LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+def normalize(query):
+    return " ".join(query.split())
+
+
+def profile(conn, query, params, seconds, df, threshold_ms=SLOW_QUERY_MS):
+    """Log ``query`` with its EXPLAIN plan if it took ``threshold_ms`` or more; returns the record or None."""
+    ms = seconds * 1000
+    if ms < threshold_ms:
+        return None
+    from schema import explain, full_scans  # schema imports cache, which imports this module
+    record = {"ts": round(time.time(), 3), "view": current_view(), "query": normalize(query),
+              "params": list(params or ()), "ms": round(ms, 3), "rows": len(df),
+              "bytes": int(df.memory_usage(index=True, deep=True).sum())}
+    try:
+        plan = explain(conn, query, params)
+        record["plan"] = plan
+        record["full_scans"] = [row.get("table") for row in full_scans(plan)]
+    except Exception as e:
+        record["plan_error"] = str(e)  # the result is fine; only the plan is missing
+    logger = slow_logger()
+    if logger.handlers:
+        logger.info(json.dumps(record, default=str))
+    return record
+
+
+def read_log(path, backups=True):
+    """Records of a JSON-lines log, oldest first, including its rotated files (path.1, path.2, ...)."""
+    paths = [path]
+    while backups and os.path.exists(f"{path}.{len(paths)}"):
+        paths.append(f"{path}.{len(paths)}")
+    for file in reversed(paths):
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def query_ms(record):
+    # hits cost no query time; records written before query_ms existed only have the fetch time
+    return record.get("query_ms", 0.0 if record.get("hit") else record["ms"])
+
+
+def rank(records, by="total", include_hits=False):
+    """One row per distinct SQL text: calls, total / mean / p95 query ms, mean rows and bytes."""
+    groups = defaultdict(list)
+    for record in records:
+        if record.get("stage") == "sql" and (include_hits or not record.get("hit")):
+            groups[record["query"]].append(record)
+    rows = []
+    for query, calls in groups.items():
+        ms = np.array([query_ms(call) for call in calls])
+        rows.append({"query": query, "calls": len(calls), "total_ms": float(ms.sum()), "mean_ms": float(ms.mean()),
+                     "p95_ms": float(np.percentile(ms, 95)),
+                     "rows": float(np.mean([call.get("rows", 0) for call in calls])),
+                     "bytes": float(np.mean([call.get("bytes", 0) for call in calls]))})
+    return sorted(rows, key=lambda row: row[f"{by}_ms"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank the dashboard's queries by cost")
+    parser.add_argument("--log", default=PERF_LOG, help="perf log to read (JSON lines)")
+    parser.add_argument("--by", choices=["total", "p95", "mean"], default="total", help="ranking cost")
+    parser.add_argument("--top", type=int, default=20, help="number of queries to show")
+    parser.add_argument("--since", type=float, default=None, help="only the last N minutes")
+    parser.add_argument("--hits", action="store_true", help="include query-cache hits")
+    parser.add_argument("--slow", action="store_true", help="print the slow-query log instead")
+    args = parser.parse_args()
+
+    path = SLOW_LOG if args.slow else args.log
+    if not path or not os.path.exists(path):
+        print(f"⚠️ No log at {path!r}: open the dashboard first (or set PHONEPE_PERF_LOG / PHONEPE_SLOW_LOG)")
+        return
+    records = list(read_log(path))
+    if args.since is not None:
+        records = [r for r in records if r.get("ts", 0) >= time.time() - args.since * 60]
+
+    if args.slow:
+        for record in records[-args.top:]:
+            print(f"⚠️ {record['ms']:>9.1f} ms {record['rows']:>7} rows  [{record.get('view')}]  {record['query']}")
+            print(f"    params={record['params']} full scans={record.get('full_scans', record.get('plan_error'))}")
+            for row in record.get("plan", []):
+                print(f"    table={row.get('table')} type={row.get('type')} key={row.get('key')} rows={row.get('rows')}")
+        print(f"{len(records)} slow queries (threshold {SLOW_QUERY_MS:g} ms)")
+        return
+
+    ranked = rank(records, args.by, args.hits)
+    print(f"{'total ms':>10} {'p95 ms':>9} {'mean ms':>9} {'calls':>6} {'rows':>8} {'KiB':>8}  query")
+    for row in ranked[:args.top]:
+        print(f"{row['total_ms']:>10.1f} {row['p95_ms']:>9.1f} {row['mean_ms']:>9.1f} {row['calls']:>6} "
+              f"{row['rows']:>8.0f} {row['bytes'] / 1024:>8.1f}  {row['query']}")
+    print(f"✅ {len(ranked)} distinct queries, {sum(row['calls'] for row in ranked)} calls, "
+          f"{sum(row['total_ms'] for row in ranked) / 1000:.2f} s in queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# synthetic.py
+# Synthetic pulse/data trees for scale tests.
+#
+# Writes the same <kind>/<category>/.../state/<state>/<year>/<q>.json layout
+# and record shapes as the PhonePe Pulse repository (the ones extract.SOURCES
+# reads), plus a matching dist_lat_long.csv, for any number of states,
+# districts per state, pincodes per district, years and quarters. The first
+# states and districts reuse the real names and coordinates of clean_data, so
+# canonicalization and enrichment see the same kind of names as on the real
+# snapshot; the rest are numbered ("synthetic-state-40", "synthetic 12").
+# Values are seeded lognormal draws that grow over time, so two runs with the
+# same arguments write byte-identical trees.
+#
+#   python synthetic.py bench_data/x10 --districts 200 --years 10
+
+import os
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from canonical import canonical_state
+
+CLEAN_DIR = "clean_data"
+FIRST_YEAR = 2018
+
+TRANSACTION_TYPES = ["Recharge & bill payments", "Peer-to-peer payments", "Merchant payments",
+                     "Financial Services", "Others"]
+BRANDS = ["Xiaomi", "Samsung", "Vivo", "Oppo", "OnePlus", "Realme", "Apple", "Motorola", "Lenovo", "Huawei",
+          "Others"]
+
+DATASETS = {
+    "aggregated/transaction": "aggregated/transaction/country/india/state",
+    "aggregated/user": "aggregated/user/country/india/state",
+    "aggregated/insurance": "aggregated/insurance/country/india/state",
+    "map/transaction": "map/transaction/hover/country/india/state",
+    "map/user": "map/user/hover/country/india/state",
+    "map/insurance": "map/insurance/hover/country/india/state",
+    "top/transaction": "top/transaction/country/india/state",
+    "top/user": "top/user/country/india/state",
+    "top/insurance": "top/insurance/country/india/state",
+}
+
+
+def state_folder(state):
+    """'Andaman and Nicobar Islands' -> 'andaman-&-nicobar-islands' (inverse of canonical_state)."""
+    return state.lower().replace(" and ", " & ").replace(" ", "-")
+
+
+def raw_district(district, state):
+    """Canonical district name -> the lower-case name of the json files (inverse of canonical_district)."""
+    if state == "Delhi" and district != "Shahdara":
+        district = district.removesuffix(" Delhi")
+    return district.lower()
+
+
+def real_districts(clean_dir=CLEAN_DIR):
+    """State -> [(district, latitude, longitude)] from the clean map_user table."""
+    path = os.path.join(clean_dir, "map_user_df.csv")
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, usecols=["State", "District", "Latitude", "Longitude"]).drop_duplicates(["State", "District"])
+    return {state: list(group[["District", "Latitude", "Longitude"]].itertuples(index=False, name=None))
+            for state, group in df.sort_values(["State", "District"]).groupby("State")}
+
+
+class Geography:
+    """States, their districts (with coordinates) and the pincodes of every district."""
+
+    def __init__(self, states, districts, pincodes, rng, clean_dir=CLEAN_DIR):
+        real = real_districts(clean_dir)
+        names = sorted(real)[:states] + [f"Synthetic State {i}" for i in range(len(real) + 1, states + 1)]
+        self.states = names[:states]
+        self.districts = {}
+        next_pincode = 110001
+        self.pincodes = {}
+        for state in self.states:
+            known = real.get(state, [])[:districts]
+            lat, lon = (np.mean([d[1] for d in known]), np.mean([d[2] for d in known])) if known else \
+                (rng.uniform(8, 34), rng.uniform(69, 96))
+            suffix = " Delhi" if state == "Delhi" else ""  # see canonical_district
+            extra = [(f"Synthetic {i}{suffix}", lat + rng.normal(0, 1), lon + rng.normal(0, 1))
+                     for i in range(len(known) + 1, districts + 1)]
+            self.districts[state] = known + extra
+            for district, _, _ in self.districts[state]:
+                self.pincodes[(state, district)] = [str(next_pincode + i) for i in range(pincodes)]
+                next_pincode += pincodes
+
+    def lat_long(self):
+        return pd.DataFrame([(state, district, lat, lon) for state in self.states
+                             for district, lat, lon in self.districts[state]],
+                            columns=["State", "District", "Latitude", "Longitude"])
+
+
+def amounts(rng, n, scale, growth):
+    """``n`` lognormal counts around ``scale`` and their amounts (avg ticket ~ 1-3k)."""
+    counts = np.maximum(1, rng.lognormal(np.log(scale * growth), 0.8, n)).astype(np.int64)
+    return counts, counts * rng.uniform(900, 3000, n)
+
+
+def metric(count, amount):
+    return {"type": "TOTAL", "count": int(count), "amount": float(round(amount, 4))}
+
+
+def envelope(data):
+    return {"success": True, "code": "SUCCESS", "data": data, "responseTimestamp": 1700000000000}
+
+
+def quarter_files(geo, state, growth, rng, top):
+    """{dataset: payload} for one state and quarter."""
+    districts = [raw_district(name, state) for name, _, _ in geo.districts[state]]
+    pincodes = [p for name, _, _ in geo.districts[state] for p in geo.pincodes[(state, name)]]
+    n = len(districts)
+
+    type_counts, type_amounts = amounts(rng, len(TRANSACTION_TYPES), 2e6, growth)
+    district_counts, district_amounts = amounts(rng, n, 2e5, growth)
+    insurance_counts, insurance_amounts = amounts(rng, n, 2e2, growth)
+    pincode_counts, pincode_amounts = amounts(rng, len(pincodes), 2e4, growth)
+    users = np.maximum(1, rng.lognormal(np.log(5e4 * growth), 0.8, n)).astype(np.int64)
+    pincode_users = np.maximum(1, rng.lognormal(np.log(5e3 * growth), 0.8, len(pincodes))).astype(np.int64)
+    brand_share = rng.dirichlet(np.ones(len(BRANDS)))
+
+    def ranked(values, k):
+        return np.argsort(-values, kind="stable")[:k]
+
+    return {
+        "aggregated/transaction": envelope({"transactionData": [
+            {"name": name, "paymentInstruments": [metric(c, a)]}
+            for name, c, a in zip(TRANSACTION_TYPES, type_counts, type_amounts)]}),
+        "aggregated/user": envelope({
+            "aggregated": {"registeredUsers": int(users.sum()), "appOpens": int(users.sum() * 20)},
+            "usersByDevice": [{"brand": brand, "count": int(users.sum() * share), "percentage": float(share)}
+                              for brand, share in zip(BRANDS, brand_share)]}),
+        "aggregated/insurance": envelope({"transactionData": [
+            {"name": "Insurance", "paymentInstruments": [metric(insurance_counts.sum(), insurance_amounts.sum() * 2)]}]}),
+        "map/transaction": envelope({"hoverDataList": [
+            {"name": f"{d} district", "metric": [metric(c, a)]}
+            for d, c, a in zip(districts, district_counts, district_amounts)]}),
+        "map/user": envelope({"hoverData": {
+            f"{d} district": {"registeredUsers": int(u), "appOpens": int(u * rng.uniform(5, 40))}
+            for d, u in zip(districts, users)}}),
+        "map/insurance": envelope({"hoverDataList": [
+            {"name": f"{d} district", "metric": [metric(c, a * 2)]}
+            for d, c, a in zip(districts, insurance_counts, insurance_amounts)]}),
+        "top/transaction": envelope({
+            "states": None,
+            "districts": [{"entityName": districts[i], "metric": metric(district_counts[i], district_amounts[i])}
+                          for i in ranked(district_amounts, top)],
+            "pincodes": [{"entityName": pincodes[i], "metric": metric(pincode_counts[i], pincode_amounts[i])}
+                         for i in ranked(pincode_amounts, top)]}),
+        "top/user": envelope({
+            "states": None,
+            "districts": [{"name": districts[i], "registeredUsers": int(users[i])} for i in ranked(users, top)],
+            "pincodes": [{"name": pincodes[i], "registeredUsers": int(pincode_users[i])}
+                         for i in ranked(pincode_users, top)]}),
+        "top/insurance": envelope({
+            "states": None,
+            "districts": [{"entityName": districts[i], "metric": metric(insurance_counts[i], insurance_amounts[i] * 2)}
+                          for i in ranked(insurance_amounts, top)],
+            "pincodes": [{"entityName": pincodes[i], "metric": metric(pincode_counts[i] // 100,
+                                                                      pincode_amounts[i] / 50)}
+                         for i in ranked(pincode_amounts, top)]}),
+    }
+
+
+def generate(root, states=36, districts=20, pincodes=10, years=5, quarters=4, top=10, seed=0,
+             clean_dir=CLEAN_DIR):
+    """Write a synthetic tree under ``root`` (the pulse/data folder). Returns the number of json files."""
+    rng = np.random.default_rng(seed)
+    geo = Geography(states, districts, pincodes, rng, clean_dir)
+    os.makedirs(root, exist_ok=True)
+    geo.lat_long().to_csv(os.path.join(root, "dist_lat_long.csv"), index=False)
+    written = 0
+    for state in geo.states:
+        folder = state_folder(state)
+        assert canonical_state(folder) == state, (folder, state)
+        for year in range(FIRST_YEAR, FIRST_YEAR + years):
+            for quarter in range(1, quarters + 1):
+                growth = 1.12 ** ((year - FIRST_YEAR) * 4 + quarter)
+                for dataset, payload in quarter_files(geo, state, growth, rng, top).items():
+                    path = os.path.join(root, DATASETS[dataset], folder, str(year))
+                    os.makedirs(path, exist_ok=True)
+                    with open(os.path.join(path, f"{quarter}.json"), "w") as f:
+                        json.dump(payload, f, separators=(",", ":"))
+                    written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic PhonePe Pulse json tree")
+    parser.add_argument("root", help="output folder (plays the role of pulse/data)")
+    parser.add_argument("--states", type=int, default=36, help="number of states")
+    parser.add_argument("--districts", type=int, default=20, help="districts per state")
+    parser.add_argument("--pincodes", type=int, default=10, help="pincodes per district")
+    parser.add_argument("--years", type=int, default=5, help=f"years, from {FIRST_YEAR}")
+    parser.add_argument("--quarters", type=int, default=4, help="quarters per year")
+    parser.add_argument("--top", type=int, default=10, help="entries of the top/ district and pincode lists")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    count = generate(args.root, args.states, args.districts, args.pincodes, args.years, args.quarters,
+                     args.top, args.seed)
+    print(f"✅ Wrote {count} json files under {args.root}")
+
+
+if __name__ == "__main__":
+    main()
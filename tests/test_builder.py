@@ -0,0 +1,106 @@
+# tests/test_builder.py
+# builder.py with tiny chunks, so chunk boundaries are crossed after a few rows.
+#
+#   python -m pytest -q tests/test_builder.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from builder import ChunkBuilder, sorted_categorical, concat_frames
+
+DTYPES = {"State": "category", "Year": "int16", "District": "category", "Count": "int64", "Amount": "float64"}
+
+
+def fill(builder, state, year, districts, counts, amounts):
+    builder.extend({"State": state, "Year": year},
+                   {"District": districts, "Count": counts, "Amount": amounts}, len(districts))
+
+
+def expected_frame(rows):
+    return pd.DataFrame(rows, columns=list(DTYPES))
+
+
+def test_grows_across_chunk_rows():
+    builder = ChunkBuilder(DTYPES, chunk_rows=8, first_rows=2)
+    rows = []
+    for i in range(7):  # 3 + 4 + 5 + ... rows: some batches span two or three chunks
+        districts = [f"d{(i + j) % 5}" for j in range(3 + i)]
+        counts = list(range(i * 10, i * 10 + len(districts)))
+        amounts = [c / 4 for c in counts]
+        fill(builder, f"s{i % 2}", 2018 + i, districts, counts, amounts)
+        rows += [(f"s{i % 2}", 2018 + i, d, c, a) for d, c, a in zip(districts, counts, amounts)]
+
+    assert builder.rows == len(rows)
+    assert all(len(chunk["Count"]) == 8 for chunk in builder.chunks)  # full chunks only so far
+    assert len(next(iter(builder.current.values()))) <= 8
+    df = builder.to_frame()
+    assert builder.chunks == []
+    assert df["Year"].dtype == np.int16
+    assert df["Count"].dtype == np.int64
+    pd.testing.assert_frame_equal(df.astype({"State": str, "District": str, "Year": int}),
+                                  expected_frame(rows).astype({"Year": int}))
+
+
+def test_chunk_starts_small_and_doubles():
+    builder = ChunkBuilder(DTYPES, chunk_rows=64, first_rows=4)
+    fill(builder, "s", 2020, ["a"] * 3, [1] * 3, [1.0] * 3)
+    assert len(builder.current["Count"]) == 4
+    fill(builder, "s", 2020, ["a"] * 3, [1] * 3, [1.0] * 3)
+    assert len(builder.current["Count"]) == 8
+    fill(builder, "s", 2020, ["a"] * 20, [1] * 20, [1.0] * 20)
+    assert len(builder.current["Count"]) == 26  # grows to what is needed when doubling is not enough
+    assert len(builder.to_frame()) == 26
+
+
+def test_upcast_after_a_none_in_a_later_chunk():
+    builder = ChunkBuilder(DTYPES, chunk_rows=4, first_rows=4)
+    fill(builder, "s", 2020, list("abcde"), [1, 2, 3, 4, 5], [0.5] * 5)
+    assert builder.chunks and builder.chunks[0]["Count"].dtype == np.int64
+    fill(builder, "s", 2021, list("fg"), [None, 7], [None, 0.25])
+
+    assert builder.dtypes["Count"] == "float64"
+    assert all(chunk["Count"].dtype == np.float64 for chunk in builder.chunks)
+    df = builder.to_frame()
+    assert df["Count"].dtype == np.float64
+    assert df["Count"].tolist()[:5] == [1, 2, 3, 4, 5]
+    assert np.isnan(df["Count"].iloc[5]) and df["Count"].iloc[6] == 7
+    assert np.isnan(df["Amount"].iloc[5])
+
+
+def test_sorted_categorical_keeps_missing():
+    categorical = sorted_categorical(np.array([0, -1, 2, 1, -1], dtype=np.int32), ["pune", "agra", "delhi"])
+    assert list(categorical.categories) == ["agra", "delhi", "pune"]
+    assert list(categorical.codes) == [2, -1, 1, 0, -1]
+    assert categorical[0] == "pune" and pd.isna(categorical[1]) and categorical[2] == "delhi"
+
+    builder = ChunkBuilder(DTYPES, chunk_rows=4)
+    fill(builder, "s", 2020, ["b", None, "a"], [1, 2, 3], [1.0, 2.0, 3.0])
+    df = builder.to_frame()
+    assert list(df["District"].cat.categories) == ["a", "b"]
+    assert df["District"].isna().tolist() == [False, True, False]
+    assert df["District"].tolist()[::2] == ["b", "a"]
+
+
+def test_concat_frames_merges_dictionaries_across_workers():
+    first = ChunkBuilder(DTYPES, chunk_rows=4)
+    fill(first, "kerala", 2020, ["idukki", "wayanad"], [1, 2], [1.0, 2.0])
+    second = ChunkBuilder(DTYPES, chunk_rows=4)
+    fill(second, "goa", 2021, ["north goa", "idukki", None], [3, None, 5], [3.0, 4.0, 5.0])
+
+    df = concat_frames([first.to_frame(), second.to_frame(), pd.DataFrame()])
+    assert list(df["State"].cat.categories) == ["goa", "kerala"]
+    assert list(df["District"].cat.categories) == ["idukki", "north goa", "wayanad"]
+    assert df["State"].tolist() == ["kerala"] * 2 + ["goa"] * 3
+    assert df["District"].tolist()[:4] == ["idukki", "wayanad", "north goa", "idukki"]
+    assert pd.isna(df["District"].iloc[4])
+    assert df["Count"].dtype == np.float64  # one worker had to upcast
+    assert df["Count"].tolist()[:3] == [1, 2, 3] and np.isnan(df["Count"].iloc[3])
+
+    only = first.to_frame()
+    assert concat_frames([only]) is only
+    assert concat_frames([]).empty
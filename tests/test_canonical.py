@@ -0,0 +1,94 @@
+# tests/test_canonical.py
+# canonical.py: name cleaning through categorical codes and the name_ids.json
+# registry, whose ids must not move between runs.
+#
+#   python -m pytest -q tests/test_canonical.py
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from canonical import (canonical_state, canonical_district, canonicalize, recode_pairs, assign_ids,
+                       load_ids, save_ids)
+
+
+def raw(rows):
+    return pd.DataFrame(rows, columns=["State", "Year", "District"])
+
+
+FIRST = raw([
+    ("maharashtra", 2022, "aurangabad district"),
+    ("bihar", 2022, "aurangabad district"),
+    ("delhi", 2022, "central district"),
+    ("andaman-&-nicobar-islands", 2022, "north and middle andaman district"),
+    ("maharashtra", 2023, "aurangabad district"),
+])
+
+
+def ids_of(df):
+    pairs = df[["State", "District", "State_ID", "District_ID"]].astype({"State": str, "District": str})
+    return {(row.State, row.District): (row.State_ID, row.District_ID) for row in pairs.itertuples()}
+
+
+def test_canonical_names():
+    assert canonical_state("andaman-&-nicobar-islands") == "Andaman and Nicobar Islands"
+    assert canonical_state("goa") == "Goa"
+    assert canonical_district("central district", "Delhi") == "Central Delhi"
+    assert canonical_district("shahdara district", "Delhi") == "Shahdara"
+    assert canonical_district("north and middle andaman district", "Andaman and Nicobar Islands") == \
+        "North and Middle Andaman"
+
+
+def test_recode_pairs_keeps_states_apart_and_missing_missing():
+    states = pd.Series(["Delhi", "Bihar", None, "Delhi"])
+    districts = pd.Series(["central", "central", "central", None])
+    recoded = recode_pairs(states, districts, canonical_district)
+    assert list(recoded.categories) == ["Central", "Central Delhi"]
+    assert recoded[0] == "Central Delhi" and recoded[1] == "Central"
+    assert pd.isna(recoded[2]) and pd.isna(recoded[3])
+
+
+def test_ids_are_stable_across_runs(tmp_path):
+    path = str(tmp_path / "clean" / "name_ids.json")
+    ids = load_ids(path)
+    first = ids_of(assign_ids(canonicalize(FIRST), ids))
+    save_ids(ids, path)
+    # same district name in two states: two districts
+    assert first[("Maharashtra", "Aurangabad")][1] != first[("Bihar", "Aurangabad")][1]
+
+    # a later run over the same names, in another order, gets the same ids
+    ids = load_ids(path)
+    assert ids_of(assign_ids(canonicalize(FIRST.iloc[::-1]), ids)) == first
+    assert ids == load_ids(path)
+
+
+def test_new_name_gets_a_new_id_without_renumbering(tmp_path):
+    path = str(tmp_path / "name_ids.json")
+    ids = load_ids(path)
+    before = ids_of(assign_ids(canonicalize(FIRST), ids))
+    save_ids(ids, path)
+
+    # "Alipurduar" and "Assam" sort before every existing name: they still get the next free ids
+    later = pd.concat([raw([("assam", 2024, "baksa district"), ("west-bengal", 2024, "alipurduar district")]),
+                       FIRST], ignore_index=True)
+    ids = load_ids(path)
+    after = ids_of(assign_ids(canonicalize(later), ids))
+    for pair, pair_ids in before.items():
+        assert after[pair] == pair_ids
+    old_states = {state for state, _ in before.values()}
+    old_districts = {district for _, district in before.values()}
+    assert after[("Assam", "Baksa")][0] == max(old_states) + 1
+    assert after[("West Bengal", "Alipurduar")][0] == max(old_states) + 2
+    assert {after[("Assam", "Baksa")][1], after[("West Bengal", "Alipurduar")][1]} == \
+        {max(old_districts) + 1, max(old_districts) + 2}
+    assert sorted(ids["State"].values()) == list(range(1, len(ids["State"]) + 1))
+
+
+def test_missing_district_gets_id_zero():
+    df = assign_ids(canonicalize(raw([("goa", 2022, "north goa district"), ("goa", 2022, None)])),
+                    {"State": {}, "District": {}})
+    assert df["District_ID"].tolist() == [1, 0]
+    assert df["State_ID"].tolist() == [1, 1]
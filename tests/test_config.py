@@ -0,0 +1,142 @@
+# tests/test_config.py
+# config.py's connection pool, on fake connections (no MySQL needed).
+#
+#   python -m pytest -q tests/test_config.py
+
+import gc
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+
+class FakeConnection:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.in_transaction = False
+        self.connected = True
+        self.closed = False
+        self.rollbacks = 0
+        self.pings = 0
+
+    def is_connected(self):
+        self.pings += 1
+        return self.connected
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Fake config.connect; yields the list of connections it opened."""
+    conns = []
+
+    def connect(**kwargs):
+        conns.append(FakeConnection(**kwargs))
+        return conns[-1]
+    monkeypatch.setattr(config, "connect", connect)
+    monkeypatch.setattr(config, "_pools", {})
+    return conns
+
+
+def test_checkout_blocks_at_pool_size_and_times_out(opened):
+    pool = config.ConnectionPool(size=2, timeout=0.2)
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(config.PoolTimeout):
+        pool.acquire()
+    assert len(opened) == 2
+
+    # a waiter gets the connection as soon as one is released
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    pool.timeout = 5
+    waiter.start()
+    first.close()
+    waiter.join(5)
+    assert len(got) == 1 and got[0]._conn is opened[0]
+    assert len(opened) == 2
+    second.close()
+    got[0].close()
+
+
+def test_release_rolls_back_an_open_transaction(opened):
+    pool = config.ConnectionPool(size=1)
+    with pool.acquire() as conn:
+        opened[0].in_transaction = True
+    assert opened[0].rollbacks == 1
+    assert not opened[0].in_transaction
+    with pool.acquire():
+        pass
+    assert opened[0].rollbacks == 1  # nothing to roll back the second time
+
+
+def test_closed_connection_refuses_use(opened):
+    pool = config.ConnectionPool(size=1)
+    conn = pool.acquire()
+    conn.close()
+    conn.close()  # idempotent
+    with pytest.raises(AttributeError):
+        conn.cursor
+    assert pool.stats()["in_use"] == 0
+
+
+def test_stale_idle_connection_is_pinged_and_replaced(opened):
+    pool = config.ConnectionPool(size=1, ping_after=0)
+    pool.acquire().close()
+    opened[0].connected = False
+    with pool.acquire() as conn:
+        assert conn._conn is opened[1]
+    assert opened[0].pings == 1 and opened[0].closed
+    with pool.acquire() as conn:
+        assert conn._conn is opened[1]  # healthy: kept
+    assert pool.stats()["reconnects"] == 1
+
+    # recently returned connections are handed out without a ping
+    pool.ping_after = 60
+    pool.acquire().close()
+    assert opened[1].pings == 1
+
+
+def test_pool_stats_counters(opened):
+    pool = config.get_pool(buffered=True)
+    assert config.get_pool(buffered=True) is pool
+    first = config.get_connection(buffered=True)
+    second = config.get_connection(buffered=True)
+    assert opened[0].kwargs == {"buffered": True}
+    first.close()
+    stats = config.pool_stats()
+    assert len(stats) == 1
+    assert stats[0] == dict(size=config.DB_POOL_SIZE, in_use=1, idle=1, checkouts=2, waits=0, wait_time=0.0,
+                            created=2, reconnects=0, options={"buffered": True})
+    second.close()
+
+    pool = config.ConnectionPool(size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(config.PoolTimeout):
+        pool.acquire()
+    held.close()
+    stats = pool.stats()
+    assert (stats["checkouts"], stats["waits"], stats["in_use"], stats["idle"]) == (1, 1, 0, 1)
+    assert stats["wait_time"] >= 0.05
+
+
+def test_unclosed_connection_is_returned_when_collected(opened):
+    pool = config.ConnectionPool(size=1, timeout=0.1)
+    conn = pool.acquire()
+    opened[0].in_transaction = True
+    del conn
+    gc.collect()
+    assert pool.stats()["in_use"] == 0 and pool.stats()["idle"] == 1
+    assert opened[0].rollbacks == 1
+    pool.acquire().close()  # the slot is free again
+    assert len(opened) == 1
@@ -0,0 +1,106 @@
+# tests/test_dashboard.py
+# main.py under Streamlit's AppTest, served by the sqlite stand-in of loadtest.py.
+#
+#   python -m pytest -q tests
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["PHONEPE_PERF_LOG"] = ""
+os.environ["PHONEPE_SLOW_LOG"] = ""
+
+import streamlit_option_menu
+from streamlit.testing.v1 import AppTest
+
+import loadtest
+
+
+@pytest.fixture(scope="module", autouse=True)
+def standin(tmp_path_factory):
+    os.chdir(ROOT)
+    path = str(tmp_path_factory.mktemp("standin") / "standin.sqlite")
+    loadtest.build_standin(path)
+    loadtest.use_standin(path)
+    streamlit_option_menu.option_menu = loadtest.choose_page
+
+
+def open_page(page="DATA EXPLORATION", **state):
+    at = AppTest.from_file(os.path.join(ROOT, loadtest.APP), default_timeout=120)
+    at.session_state[loadtest.PAGE_KEY] = page
+    for key, value in state.items():
+        at.session_state[key] = value
+    return at.run()
+
+
+def go(at, page):
+    at.session_state[loadtest.PAGE_KEY] = page
+    return at.run()
+
+
+def assert_ok(at):
+    assert not at.exception, [e.value for e in at.exception]
+
+
+def test_selections_survive_view_and_method_switches():
+    at = open_page()
+    at.selectbox(key="agg_insurance_year").set_value("2022").run()
+    at.radio(key="agg_method").set_value("User Analysis").run()
+    at.selectbox(key="agg_user_quarter").set_value("3").run()
+    at.radio(key="view").set_value("Map Analysis").run()
+    at.radio(key="map_method").set_value("Map User").run()
+    assert_ok(at)
+
+    at.radio(key="view").set_value("Aggregated Analysis").run()
+    assert_ok(at)
+    assert at.radio(key="agg_method").value == "User Analysis"
+    assert at.selectbox(key="agg_user_quarter").value == 3
+    at.radio(key="agg_method").set_value("Insurance Analysis").run()
+    assert_ok(at)
+    assert at.selectbox(key="agg_insurance_year").value == 2022
+
+
+def test_selections_survive_a_trip_to_another_page():
+    at = open_page()
+    at.radio(key="view").set_value("Top Analysis").run()
+    at.radio(key="top_method").set_value("Top User").run()
+    at.selectbox(key="top_user_year").set_value("2021").run()
+    go(at, "HOME")
+    go(at, "TOP CHARTS")
+    go(at, "DATA EXPLORATION")
+    assert_ok(at)
+    assert at.radio(key="view").value == "Top Analysis"
+    assert at.radio(key="top_method").value == "Top User"
+    assert at.selectbox(key="top_user_year").value == 2021
+
+
+def test_selection_that_is_no_longer_an_option_falls_back():
+    at = open_page(agg_insurance_year=1999)
+    assert_ok(at)
+    assert str(at.session_state["agg_insurance_year"]) == at.selectbox(key="agg_insurance_year").options[0]
+
+
+def test_district_map_follows_the_dataset():
+    at = open_page()
+    at.radio(key="view").set_value("Map Analysis").run()
+    at.radio(key="map_method").set_value("District Map").run()
+    at.radio(key="district_map_table").set_value("maptransaction").run()
+    at.selectbox(key="district_map_year").set_value(at.selectbox(key="district_map_year").options[0]).run()
+    at.radio(key="district_map_table").set_value("mapinsurance").run()
+    assert_ok(at)
+    # 2018 is not a year of mapinsurance: back to its first year
+    assert str(at.session_state["district_map_year"]) == at.selectbox(key="district_map_year").options[0]
+    assert at.get("plotly_chart") or at.warning
+
+
+def test_rerun_is_served_from_the_caches():
+    import config
+    at = open_page()
+    checkouts = sum(pool["checkouts"] for pool in config.pool_stats())
+    at.run()
+    assert_ok(at)
+    # only the data version of the run is read from the database
+    assert sum(pool["checkouts"] for pool in config.pool_stats()) - checkouts == 1
@@ -0,0 +1,86 @@
+# tests/test_enrich.py
+# enrich.py: coordinates assigned by position, never merged.
+#
+#   python -m pytest -q tests/test_enrich.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrich import CoordinateIndex, enrich
+
+LAT_LONG = pd.DataFrame([
+    ("Kerala", "Idukki", 9.85, 76.97),
+    ("Kerala", "Wayanad", 11.6, 76.08),
+    ("Bihar", "Aurangabad", 24.75, 84.37),
+    ("Maharashtra", "Aurangabad", 19.88, 75.34),
+    ("Kerala", "Idukki", 0.0, 0.0),  # duplicate key
+], columns=["State", "District", "Latitude", "Longitude"])
+
+TABLE = pd.DataFrame([
+    ("Kerala", 2022, "Idukki", 10, "Southern Region"),
+    ("Kerala", 2022, "Wayanad", 20, "Southern Region"),
+    ("Kerala", 2023, "Idukki", 30, "Southern Region"),
+    ("Maharashtra", 2022, "Aurangabad", 40, "Western Region"),
+    ("Kerala", 2022, "Kasaragod", 50, "Southern Region"),
+    ("Kerala", 2023, "Kasaragod", 60, "Southern Region"),
+    ("Goa", 2022, None, 70, "Southern Region"),
+], columns=["State", "Year", "District", "Registered_users", "Region"])
+
+
+def test_coordinates_by_position():
+    df, _ = enrich(TABLE, CoordinateIndex(LAT_LONG))
+    assert list(df.columns) == ["State", "Year", "District", "Registered_users", "Latitude", "Longitude", "Region"]
+    assert len(df) == len(TABLE)
+    assert df["Latitude"].tolist()[:4] == [9.85, 11.6, 9.85, 19.88]
+    assert df["Longitude"].tolist()[:4] == [76.97, 76.08, 76.97, 75.34]
+    assert df["Latitude"].iloc[4:].isna().all()
+    pd.testing.assert_frame_equal(df.drop(columns=["Latitude", "Longitude"]), TABLE)
+
+
+def test_reenriching_replaces_coordinates():
+    first, _ = enrich(TABLE, CoordinateIndex(LAT_LONG))
+    moved = LAT_LONG.assign(Latitude=LAT_LONG["Latitude"] + 1)
+    again, _ = enrich(first, CoordinateIndex(moved))
+    assert list(again.columns) == list(first.columns)
+    assert not [column for column in again.columns if column.endswith(("_x", "_y"))]
+    assert len(again) == len(TABLE)
+    assert again["Latitude"].tolist()[:4] == [10.85, 12.6, 10.85, 20.88]
+    pd.testing.assert_series_equal(again["Longitude"], first["Longitude"])
+
+
+def test_duplicate_key_keeps_the_first_entry():
+    index = CoordinateIndex(LAT_LONG)
+    assert index.duplicates == [("Kerala", "Idukki")]
+    assert index.lookup("Kerala", "Idukki") == (9.85, 76.97)
+    df, _ = enrich(TABLE, index)
+    assert len(df) == len(TABLE)  # a merge would have doubled the Idukki rows
+
+
+def test_unmatched_pairs_are_reported_not_dropped():
+    df, unmatched = enrich(TABLE, CoordinateIndex(LAT_LONG))
+    assert unmatched[["State", "District", "Rows"]].values.tolist()[0] == ["Kerala", "Kasaragod", 2]
+    # a row without a district has no coordinates either
+    assert unmatched["State"].tolist() == ["Kerala", "Goa"]
+    assert pd.isna(unmatched["District"].iloc[1]) and unmatched["Rows"].iloc[1] == 1
+    assert (df["District"] == "Kasaragod").sum() == 2
+    assert df["Registered_users"].tolist() == TABLE["Registered_users"].tolist()
+
+
+def test_table_without_district_is_unchanged():
+    states = TABLE.drop(columns=["District"])
+    df, unmatched = enrich(states, CoordinateIndex(LAT_LONG))
+    assert df is states
+    assert unmatched.empty and list(unmatched.columns) == ["State", "District", "Rows"]
+
+
+def test_from_csv(tmp_path):
+    path = tmp_path / "dist_lat_long.csv"
+    LAT_LONG.to_csv(path, index=False)
+    index = CoordinateIndex.from_csv(str(path))
+    assert len(index.positions) == 4
+    assert np.isnan(index.lookup("Goa", "North Goa")[0])
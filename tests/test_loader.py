@@ -0,0 +1,154 @@
+# tests/test_loader.py
+# loader.py: row conversion and SQL always; full / partition / infile loads
+# against a scratch MySQL database when PHONEPE_DB_NAME points at one.
+#
+#   PHONEPE_DB_NAME=phonepe_test PHONEPE_DB_PASSWORD=... python -m pytest -q tests/test_loader.py
+#
+# The MySQL tests drop and recreate map_user and its rollup in that database.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import loader
+
+TABLE = "map_user"
+
+needs_mysql = pytest.mark.skipif("PHONEPE_DB_NAME" not in os.environ,
+                                 reason="set PHONEPE_DB_* to a scratch MySQL database")
+
+
+def frame(rows):
+    """map_user rows: (State, Year, Quarter, District, Registered_users, Latitude)."""
+    df = pd.DataFrame(rows, columns=["State", "Year", "Quarter", "District", "Registered_users", "Latitude"])
+    return df.assign(App_opens=df["Registered_users"] * 10, Longitude=df["Latitude"] + 60, Region="Southern Region")
+
+
+ROWS = [
+    ("Kerala", 2022, 1, "Idukki", 100, 9.8),
+    ("Kerala", 2022, 1, "Wayanad", 200, np.nan),
+    ("Kerala", 2022, 2, "Idukki", 110, 9.8),
+    ("Goa", 2022, 1, "North Goa", 300, 15.5),
+]
+
+
+def test_to_rows_turns_nan_into_none():
+    rows = loader.to_rows(frame(ROWS))
+    assert len(rows) == len(ROWS)
+    wayanad = rows[1]
+    assert wayanad[5] is None and wayanad[7] is None
+    assert type(rows[0][1]) is int and type(rows[0][5]) is float
+
+
+def test_insert_and_upsert_sql():
+    columns = ["State", "Year", "Quarter", "District", "Registered_users"]
+    assert loader.insert_sql(TABLE, columns) == (
+        "INSERT INTO `map_user` (`State`, `Year`, `Quarter`, `District`, `Registered_users`) "
+        "VALUES (%s, %s, %s, %s, %s)")
+    upsert = loader.upsert_sql(TABLE, columns)
+    assert upsert.endswith("ON DUPLICATE KEY UPDATE `Registered_users` = VALUES(`Registered_users`)")
+
+
+def test_partition_rows():
+    df = loader.partition_rows(frame(ROWS), {("Kerala", 2022, 1)})
+    assert list(df["District"]) == ["Idukki", "Wayanad"]
+
+
+def test_load_tables_bumps_the_data_version_once(monkeypatch):
+    loaded, bumps = [], []
+
+    def load_table(table, df, method, partitions, upsert):
+        if table == "broken":
+            raise ValueError(table)
+        loaded.append(table)
+        return 0.0
+    monkeypatch.setattr(loader, "load_table", load_table)
+    monkeypatch.setattr(loader, "bump_version", lambda: bumps.append(sorted(loaded)))
+
+    assert set(loader.load_tables({"a": None, "b": None})) == {"a", "b"}
+    assert bumps == [["a", "b"]]
+
+    # the tables that committed still invalidate the caches
+    with pytest.raises(ValueError):
+        loader.load_tables({"c": None, "broken": None})
+    assert bumps[-1] == ["a", "b", "c"]
+
+    loader.load_tables({"d": None}, partitions={"d": set()})
+    assert len(bumps) == 2  # nothing loaded, nothing bumped
+
+
+@pytest.fixture
+def mysql():
+    import config
+    from schema import create_table_sql, create_rollup_sql, ROLLUPS
+    from cache import VERSION_TABLE_SQL
+    try:
+        conn = config.get_connection()
+    except Exception as e:
+        pytest.skip(f"no MySQL at {config.DB_HOST}: {e}")
+    cursor = conn.cursor()
+    rollups = [name for name, (table, _, _) in ROLLUPS.items() if table == TABLE]
+    for name in [TABLE] + rollups:
+        cursor.execute(f"DROP TABLE IF EXISTS `{name}`")
+    for statement in [create_table_sql(TABLE)] + [create_rollup_sql(name) for name in rollups] + [VERSION_TABLE_SQL]:
+        cursor.execute(statement)
+    conn.commit()
+    cursor.close()
+
+    def query(sql, params=()):
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.commit()  # next query sees the loads committed on other connections
+        return rows
+
+    yield query
+    conn.close()
+
+
+@needs_mysql
+@pytest.mark.parametrize("method", sorted(loader.METHODS))
+def test_full_load(mysql, method):
+    loader.load_tables({TABLE: frame(ROWS)}, method=method)
+    assert mysql(f"SELECT COUNT(*) FROM `{TABLE}`")[0][0] == len(ROWS)
+    assert mysql(f"SELECT `Latitude`, `Longitude` FROM `{TABLE}` WHERE `District` = 'Wayanad'") == [(None, None)]
+    assert mysql("SELECT `Registered_users` FROM `map_user_by_state_year_quarter` "
+                 "WHERE `State` = 'Kerala' AND `Year` = 2022 AND `Quarter` = 1")[0][0] == 300
+
+    version = mysql("SELECT `version` FROM `data_version` WHERE `id` = 1")[0][0]
+
+    # a second full load replaces the rows instead of adding to them
+    loader.load_tables({TABLE: frame(ROWS[:2])}, method=method)
+    assert mysql(f"SELECT COUNT(*) FROM `{TABLE}`")[0][0] == 2
+    assert mysql("SELECT `version` FROM `data_version` WHERE `id` = 1")[0][0] == version + 1
+
+
+@needs_mysql
+@pytest.mark.parametrize("method", sorted(loader.METHODS))
+def test_partition_load(mysql, method):
+    loader.load_tables({TABLE: frame(ROWS)}, method=method)
+    changed = frame([("Kerala", 2022, 1, "Idukki", 150, 9.8)] + ROWS[2:])
+    loader.load_tables({TABLE: changed}, method=method, partitions={TABLE: {("Kerala", 2022, 1)}})
+
+    rows = mysql(f"SELECT `State`, `Quarter`, `District`, `Registered_users` FROM `{TABLE}` "
+                 "ORDER BY `State`, `Quarter`, `District`")
+    # Kerala 2022 Q1 replaced (Wayanad gone), the other partitions untouched
+    assert rows == [("Goa", 1, "North Goa", 300), ("Kerala", 1, "Idukki", 150), ("Kerala", 2, "Idukki", 110)]
+    assert mysql("SELECT `Registered_users` FROM `map_user_by_state_year_quarter` "
+                 "WHERE `State` = 'Kerala' AND `Year` = 2022 AND `Quarter` = 1")[0][0] == 150
+
+
+@needs_mysql
+def test_partition_upsert_keeps_vanished_rows(mysql):
+    loader.load_tables({TABLE: frame(ROWS)})
+    changed = frame([("Kerala", 2022, 1, "Idukki", 150, 9.8)])
+    loader.load_tables({TABLE: changed}, partitions={TABLE: {("Kerala", 2022, 1)}}, upsert=True)
+    rows = mysql(f"SELECT `District`, `Registered_users` FROM `{TABLE}` "
+                 "WHERE `State` = 'Kerala' AND `Quarter` = 1 ORDER BY `District`")
+    assert rows == [("Idukki", 150), ("Wayanad", 200)]
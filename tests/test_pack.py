@@ -0,0 +1,79 @@
+# tests/test_pack.py
+# pack.py: a pack extracts to the same tables as the tree it was built from,
+# and shares its manifest keys, so switching --root between them parses nothing.
+#
+#   python -m pytest -q tests/test_pack.py
+
+import os
+import sys
+import json
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import synthetic
+from extract import SOURCES, extract_all, extract_incremental, list_files
+from pack import write_pack, open_pack, iter_quarter_files
+
+TINY = dict(states=2, districts=3, pincodes=2, years=2, quarters=2, top=2, seed=1,
+            clean_dir=os.path.join(ROOT, "clean_data"))
+
+
+@pytest.fixture
+def packed(tmp_path):
+    root = str(tmp_path / "data")
+    files = synthetic.generate(root, **TINY)
+    pack_path = str(tmp_path / "pulse.pack")
+    assert write_pack(root, pack_path) == files
+    return root, pack_path
+
+
+def test_pack_extracts_like_the_tree(packed):
+    root, pack_path = packed
+    from_tree = extract_all(SOURCES, root, workers=1)
+    from_pack = extract_all(SOURCES, pack_path, workers=1)
+    assert set(from_pack) == set(from_tree)
+    for name, df in from_tree.items():
+        assert len(df), name
+        pd.testing.assert_frame_equal(from_pack[name], df, obj=name)
+
+
+def test_pack_payloads_and_keys(packed):
+    root, pack_path = packed
+    reader = open_pack(pack_path)
+    for source in SOURCES:
+        tree_files = list(list_files(source, root))
+        pack_files = list(list_files(source, pack_path))
+        assert [f[:3] for f in pack_files] == [f[:3] for f in tree_files]
+        for (_, _, _, path), (_, _, _, entry) in zip(tree_files, pack_files):
+            assert entry.key == os.path.relpath(path, root).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                assert reader.read(entry) == f.read()
+    assert sum(1 for _ in iter_quarter_files(root)) == sum(len(v) for v in reader.datasets.values())
+
+
+def test_switching_root_reparses_nothing(packed, tmp_path):
+    root, pack_path = packed
+    out = str(tmp_path / "raw")
+    extract_incremental(SOURCES, root, out, workers=1)
+
+    def snapshot():
+        files = {}
+        for name in sorted(os.listdir(out)):
+            with open(os.path.join(out, name), "rb") as f:
+                files[name] = f.read()
+        return files
+    before = snapshot()
+
+    for switched_to in (pack_path, root):
+        frames, changed = extract_incremental(SOURCES, switched_to, out, workers=1)
+        assert all(not partitions for partitions in changed.values()), switched_to
+        with open(os.path.join(out, "manifest.json")) as f:
+            manifest = json.load(f)
+        assert {name: set(entries) for name, entries in manifest.items()} == \
+            {name: set(entries) for name, entries in json.loads(before["manifest.json"]).items()}
+        assert {name: data for name, data in snapshot().items() if name != "manifest.json"} == \
+            {name: data for name, data in before.items() if name != "manifest.json"}
@@ -0,0 +1,112 @@
+# tests/test_rollup.py
+# rollup.py on the sqlite stand-in of loadtest.py: after a partial load, the
+# refreshed groups make every rollup equal to a full recompute.
+#
+#   python -m pytest -q tests/test_rollup.py
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import loadtest
+import rollup
+from schema import TABLES, ROLLUPS
+
+NEW_YEAR = 2030
+
+
+@pytest.fixture(scope="module")
+def standin(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("rollup") / "standin.sqlite")
+    loadtest.build_standin(path, os.path.join(ROOT, "clean_data"))
+    conn = loadtest.StandInConnection(path)
+    yield conn
+    conn.close()
+
+
+def query(conn, sql, params=()):
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def recomputed(conn, name):
+    table, group_by, measures = ROLLUPS[name]
+    groups = ", ".join(f"`{column}`" for column in group_by)
+    sums = ", ".join(f"SUM(`{column}`)" for column in measures)
+    return frame(query(conn, f"SELECT {groups}, {sums} FROM `{table}` GROUP BY {groups}"), group_by + measures)
+
+
+def stored(conn, name):
+    _, group_by, measures = ROLLUPS[name]
+    return frame(query(conn, f"SELECT * FROM `{name}`"), group_by + measures)
+
+
+def frame(rows, columns):
+    df = pd.DataFrame(rows, columns=columns)
+    return df.sort_values(columns).reset_index(drop=True)
+
+
+def partial_load(conn, table):
+    """Change one partition, delete one and add one; returns the three (State, Year, Quarter)."""
+    partitions = query(conn, f"SELECT DISTINCT `State`, `Year`, `Quarter` FROM `{table}` "
+                             "ORDER BY `State`, `Year`, `Quarter`")
+    changed, deleted, copied = partitions[0], partitions[-1], partitions[len(partitions) // 2]
+    added = (copied[0], NEW_YEAR, copied[2])
+    measures = sorted({column for name in rollup.rollups_of(table) for column in ROLLUPS[name][2]})
+    where = "WHERE `State` = %s AND `Year` = %s AND `Quarter` = %s"
+    cursor = conn.cursor()
+    cursor.execute(f"UPDATE `{table}` SET {', '.join(f'`{m}` = `{m}` * 2 + 1' for m in measures)} {where}", changed)
+    cursor.execute(f"DELETE FROM `{table}` {where}", deleted)
+    cursor.execute(f"CREATE TEMP TABLE `added` AS SELECT * FROM `{table}` {where}", copied)
+    cursor.execute(f"UPDATE `added` SET `Year` = %s", (NEW_YEAR,))
+    cursor.execute(f"INSERT INTO `{table}` SELECT * FROM `added`")
+    cursor.execute("DROP TABLE `added`")
+    cursor.close()
+    return {changed, deleted, added}
+
+
+@pytest.mark.parametrize("table", [table for table in TABLES if rollup.rollups_of(table)])
+def test_partial_refresh_equals_full_recompute(standin, table):
+    partitions = partial_load(standin, table)
+    names = rollup.rollups_of(table)
+    before = {name: stored(standin, name) for name in names}
+    assert any(not before[name].equals(recomputed(standin, name)) for name in names)  # the rollups are stale
+
+    cursor = standin.cursor()
+    rollup.refresh_rollups(cursor, table, partitions)
+    cursor.close()
+    standin.commit()
+    for name in names:
+        pd.testing.assert_frame_equal(stored(standin, name), recomputed(standin, name), obj=name)
+        if "Year" in ROLLUPS[name][1]:
+            assert NEW_YEAR in stored(standin, name)["Year"].tolist(), name
+
+
+def test_empty_partitions_leave_the_rollups_alone(standin):
+    name = "aggregatedtransaction_by_state"
+    before = stored(standin, name)
+    cursor = standin.cursor()
+    cursor.execute("UPDATE `aggregatedtransaction` SET `Transaction_Count` = 0")
+    rollup.refresh_rollup(cursor, name, set())
+    cursor.close()
+    pd.testing.assert_frame_equal(stored(standin, name), before)
+    standin.rollback()
+
+
+def test_affected_filter():
+    partitions = [("Goa", 2022, 1), ("Goa", 2022, 2), ("Kerala", 2021, 4)]
+    assert rollup.affected_filter(["Year"], partitions) == (" WHERE `Year` IN (%s, %s)", (2021, 2022))
+    assert rollup.affected_filter(["State"], partitions) == (" WHERE `State` IN (%s, %s)", ("Goa", "Kerala"))
+    where, params = rollup.affected_filter(["Year", "Quarter", "State"], partitions)
+    assert where == " WHERE (`State`, `Year`, `Quarter`) IN ((%s, %s, %s), (%s, %s, %s), (%s, %s, %s))"
+    assert params == ("Goa", 2022, 1, "Goa", 2022, 2, "Kerala", 2021, 4)
+    assert rollup.affected_filter(["Brand"], partitions) == ("", ())
+    assert rollup.affected_filter(["Year"], None) == ("", ())